@@ -6,8 +6,8 @@ from slack.errors import SlackApiError
 from slack.web.slack_response import SlackResponse
 
 from distutils.util import strtobool
+import aiohttp
 import asyncio
-import concurrent
 import requests
 import ssl
 from typing import Tuple, Optional
@@ -40,6 +40,9 @@ PLAYGROUND_INVESTIGATION_TYPE = 9
 WARNING_ENTRY_TYPE = 11
 ENDPOINT_URL = 'https://oproxy.demisto.ninja/slack-poll'
 POLL_INTERVAL_MINUTES = 1
+MAX_POLL_INTERVAL_MINUTES = 60
+MAX_CONCURRENT_POLLS = 10
+USER_CACHE_TTL_MINUTES = 30
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 ''' GLOBALS '''
@@ -63,6 +66,7 @@ BOT_NAME: str
 BOT_ICON_URL: str
 MAX_LIMIT_TIME: int
 PAGINATED_COUNT: int
+USER_DIRECTORY: 'UserDirectory'
 
 ''' HELPER FUNCTIONS '''
 
@@ -98,50 +102,157 @@ def test_module():
     demisto.results('ok')
 
 
+class UserDirectory:
+    """
+    An in-memory directory of the Slack users stored in the integration context.
+    The stored users are indexed by ID and by lowercase name, email and real name, and are reloaded only when the
+    'users' key of the integration context is changed by someone else.
+    Users seen while paging through users.list are kept in memory for USER_CACHE_TTL_MINUTES, together with the
+    cursor of an interrupted scan and the searches which were not found, and only the users which are actually
+    returned are written back to the integration context.
+    """
+
+    def __init__(self):
+        self.raw_users: Optional[str] = None
+        self.users: list = []
+        self.users_by_id: dict = {}
+        self.users_by_key: dict = {}
+        self.seen_by_id: dict = {}
+        self.seen_by_key: dict = {}
+        self.missing: set = set()
+        self.cursor: Optional[str] = None
+        self.expiry: float = 0
+
+    @staticmethod
+    def get_keys(user: dict) -> list:
+        """
+        Gets the lowercase name, email and real name of a user
+        :param user: The slack user
+        :return: The keys to index the user by
+        """
+        keys = [user.get('name'), user.get('profile', {}).get('email'), user.get('real_name')]
+        return [key.lower() for key in keys if key]
+
+    @staticmethod
+    def index_users(users: list, users_by_id: dict, users_by_key: dict):
+        """
+        Adds users to the indexes, keeping the first user for every key
+        :param users: The slack users
+        :param users_by_id: The ID index
+        :param users_by_key: The name, email and real name index
+        """
+        for user in users:
+            users_by_id.setdefault(user.get('id'), user)
+            for key in UserDirectory.get_keys(user):
+                users_by_key.setdefault(key, user)
+
+    def sync(self, integration_context: dict = None):
+        """
+        Reloads the directory if the users in the integration context were changed, and drops the users seen in
+        Slack if their TTL expired
+        :param integration_context: The integration context, the latest one is used if not provided
+        """
+        if integration_context is None:
+            integration_context = demisto.getIntegrationContext()
+        raw_users = integration_context.get('users')
+        if raw_users != self.raw_users:
+            self.raw_users = raw_users
+            self.users = json.loads(raw_users) if raw_users else []
+            self.users_by_id = {}
+            self.users_by_key = {}
+            self.index_users(self.users, self.users_by_id, self.users_by_key)
+            self.clear_seen()
+        elif time.time() > self.expiry:
+            self.clear_seen()
+
+    def clear_seen(self):
+        """
+        Drops the users seen in Slack and starts a new TTL period
+        """
+        self.seen_by_id = {}
+        self.seen_by_key = {}
+        self.missing = set()
+        self.cursor = None
+        self.expiry = time.time() + USER_CACHE_TTL_MINUTES * 60
+
+    def get_by_id(self, user_id: str) -> dict:
+        """
+        Gets a user from the directory by ID
+        :param user_id: The slack user ID
+        :return: The slack user, or an empty dict if it's not in the directory
+        """
+        return self.users_by_id.get(user_id) or self.seen_by_id.get(user_id) or {}
+
+    def get_by_name(self, user_to_search: str) -> dict:
+        """
+        Gets a user from the directory by name, email or real name
+        :param user_to_search: The lowercase user name, email or real name
+        :return: The slack user, or an empty dict if it's not in the directory
+        """
+        return self.users_by_key.get(user_to_search) or self.seen_by_key.get(user_to_search) or {}
+
+    def add_seen(self, users: list):
+        """
+        Adds users retrieved from Slack to the directory without storing them
+        :param users: The slack users
+        """
+        self.index_users([user for user in users if user.get('id')], self.seen_by_id, self.seen_by_key)
+
+    def store(self, users: list):
+        """
+        Adds users to the users in the latest integration context, the context is set only if a user was added
+        :param users: The slack users to store
+        """
+        if all(not user.get('id') or user['id'] in self.users_by_id for user in users):
+            return
+
+        integration_context = demisto.getIntegrationContext()
+        self.sync(integration_context)
+        new_users = [user for user in users if user.get('id') and user['id'] not in self.users_by_id]
+        if not new_users:
+            return
+
+        self.users.extend(new_users)
+        self.index_users(new_users, self.users_by_id, self.users_by_key)
+        self.raw_users = json.dumps(self.users)
+        integration_context['users'] = self.raw_users
+        demisto.setIntegrationContext(integration_context)
+
+
 def get_user_by_name(user_to_search: str) -> dict:
     """
     Gets a slack user by a user name
     :param user_to_search: The user name or email
     :return: A slack user object
     """
-
-    user: dict = {}
-    users: list = []
-    integration_context = demisto.getIntegrationContext()
-
     user_to_search = user_to_search.lower()
-    if integration_context.get('users'):
-        users = json.loads(integration_context['users'])
-        users_filter = list(filter(lambda u: u.get('name', '').lower() == user_to_search
-                                             or u.get('profile', {}).get('email', '').lower() == user_to_search
-                                             or u.get('real_name', '').lower() == user_to_search, users))
-        if users_filter:
-            user = users_filter[0]
+    USER_DIRECTORY.sync()
+    user = USER_DIRECTORY.get_by_name(user_to_search)
     if not user:
+        if user_to_search in USER_DIRECTORY.missing:
+            return {}
+        # Continue an interrupted scan of the workspace users if there is one, and keep every page in the directory
         body = {
             'limit': PAGINATED_COUNT
         }
-        response = send_slack_request_sync(CLIENT, 'users.list', http_verb='GET', body=body)
+        if USER_DIRECTORY.cursor:
+            body['cursor'] = USER_DIRECTORY.cursor
         while True:
+            response = send_slack_request_sync(CLIENT, 'users.list', http_verb='GET', body=body)
             workspace_users = response['members'] if response and response.get('members', []) else []
-            cursor = response.get('response_metadata', {}).get('next_cursor')
-            users_filter = list(filter(lambda u: u.get('name', '').lower() == user_to_search
-                                                 or u.get('profile', {}).get('email', '').lower() == user_to_search
-                                                 or u.get('real_name', '').lower() == user_to_search, workspace_users))
-            if users_filter:
-                break
-            if not cursor:
+            cursor = response.get('response_metadata', {}).get('next_cursor') if response else None
+            USER_DIRECTORY.add_seen(workspace_users)
+            USER_DIRECTORY.cursor = cursor
+            user = USER_DIRECTORY.get_by_name(user_to_search)
+            if user or not cursor:
                 break
             body = body.copy()
             body.update({'cursor': cursor})
-            response = send_slack_request_sync(CLIENT, 'users.list', http_verb='GET', body=body)
 
-        if users_filter:
-            user = users_filter[0]
-            users.append(user)
-            set_to_latest_integration_context('users', users)
-        else:
+        if not user:
+            USER_DIRECTORY.missing.add(user_to_search)
             return {}
+    USER_DIRECTORY.store([user])
 
     return user
 
@@ -325,18 +436,7 @@ async def get_slack_name(slack_id: str, client) -> str:
                                                            body=body)).get('channel', {})
         slack_name = conversation.get('name', '')
     elif prefix == 'U':
-        user: dict = {}
-        if integration_context.get('users'):
-            users = list(filter(lambda u: u['id'] == slack_id, json.loads(integration_context['users'])))
-            if users:
-                user = users[0]
-        if not user:
-            body = {
-                'user': slack_id
-            }
-            user = (await send_slack_request_async(client, 'users.info', http_verb='GET',
-                                                           body=body)).get('user', {})
-
+        user = await get_user_by_id_async(client, integration_context, slack_id)
         slack_name = user.get('name', '')
 
     return slack_name
@@ -552,7 +652,7 @@ def mirror_investigation():
     demisto.results('Investigation mirrored successfully, channel: {}'.format(conversation_name))
 
 
-def long_running_loop():
+async def long_running_loop():
     """
     Runs in a long running container - checking for newly mirrored investigations and answered questions.
     """
@@ -560,7 +660,7 @@ def long_running_loop():
         error = ''
         try:
             check_for_mirrors()
-            check_for_answers(datetime.utcnow())
+            await check_for_answers(datetime.utcnow())
         except requests.exceptions.ConnectionError as e:
             error = 'Could not connect to the Slack endpoint: {}'.format(str(e))
         except Exception as e:
@@ -569,10 +669,20 @@ def long_running_loop():
             if error:
                 demisto.error(error)
                 demisto.updateModuleHealth(error)
-            time.sleep(5)
+            await asyncio.sleep(5)
+
+
+def get_poll_interval(question: dict) -> int:
+    """
+    Gets the minutes to wait between polls for an answer to a question - POLL_INTERVAL_MINUTES,
+    doubled for every consecutive failed poll up to MAX_POLL_INTERVAL_MINUTES.
+    :param question: The question
+    :return: The poll interval in minutes
+    """
+    return min(POLL_INTERVAL_MINUTES * 2 ** question.get('poll_failures', 0), MAX_POLL_INTERVAL_MINUTES)
 
 
-def check_for_answers(now: datetime):
+async def check_for_answers(now: datetime):
     """
     Checks for answered questions
     :param now: The current date.
@@ -580,12 +690,11 @@ def check_for_answers(now: datetime):
 
     integration_context = demisto.getIntegrationContext()
     questions = integration_context.get('questions', [])
-    users = integration_context.get('users', [])
     if questions:
         questions = json.loads(questions)
-    if users:
-        users = json.loads(users)
     now_string = datetime.strftime(now, DATE_FORMAT)
+    questions_to_poll = []
+    updated = False
 
     for question in questions:
         if question.get('last_poll_time'):
@@ -593,88 +702,114 @@ def check_for_answers(now: datetime):
                 # Check if the question expired - if it did, answer it with the default response and remove it
                 expiry = datetime.strptime(question['expiry'], DATE_FORMAT)
                 if expiry < now:
-                    answer_question(question.get('default_response'), question, questions)
+                    answer_question(question.get('default_response'), question)
+                    updated = True
                     continue
             # Check if it has been enough time(determined by the POLL_INTERVAL_MINUTES parameter)
             # since the last polling time. if not, continue to the next question until it has.
             last_poll_time = datetime.strptime(question['last_poll_time'], DATE_FORMAT)
             delta = now - last_poll_time
             minutes = delta.total_seconds() / 60
-            if minutes < POLL_INTERVAL_MINUTES:
+            if minutes < get_poll_interval(question):
                 continue
-        demisto.info('Slack - polling for an answer for entitlement {}'.format(question.get('entitlement')))
         question['last_poll_time'] = now_string
+        questions_to_poll.append(question)
 
+    if questions_to_poll:
+        client = slack.WebClient(token=BOT_TOKEN, run_async=True, proxy=PROXY_URL, ssl=SSL_CONTEXT)
         headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
-        add_info_headers(headers, question.get('expiry'))
+        await add_info_headers(headers, client)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_POLLS)
+        async with aiohttp.ClientSession(headers=headers) as session:
+            payloads = await asyncio.gather(*[poll_for_answer(session, semaphore, question)
+                                              for question in questions_to_poll])
+
+        for question, payload in zip(questions_to_poll, payloads):
+            actions = payload.get('actions', [])
+            if actions:
+                demisto.info('Slack - received answer from user for entitlement {}.'.format(question.get('entitlement')))
+                user_id = payload.get('user', {}).get('id')
+                user = await get_user_by_id_async(client, integration_context, user_id)
+                answer_question(actions[0].get('text', {}).get('text'), question, user.get('profile', {}).get('email'))
+        updated = True
+
+    if updated:
+        questions = list(filter(lambda q: q.get('remove', False) is False, questions))
+        set_to_latest_integration_context('questions', questions)
+
+
+async def poll_for_answer(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, question: dict) -> dict:
+    """
+    Polls the Slack endpoint for an answer to a question, counting the failed polls in the question.
+    :param session: The HTTP session to poll with.
+    :param semaphore: Limits the number of concurrent polls.
+    :param question: The question to poll for.
+    :return: The answer payload, or an empty dict if there is no answer.
+    """
+    entitlement = question.get('entitlement')
+    body = {
+        'token': BOT_TOKEN,
+        'entitlement': entitlement
+    }
+    headers = {'X-Content-Expiry': question.get('expiry') or 'No expiry'}
 
-        body = {
-            'token': BOT_TOKEN,
-            'entitlement': question.get('entitlement')
-        }
-        res = requests.post(ENDPOINT_URL, data=json.dumps(body), headers=headers, proxies=PROXIES, verify=VERIFY_CERT)
-        if res.status_code != 200:
-            demisto.error('Slack - failed to poll for answers: {}, status code: {}'  # type: ignore[str-bytes-safe]
-                          .format(res.content, res.status_code))
-            continue
-        answer: dict = {}
+    async with semaphore:
+        demisto.info('Slack - polling for an answer for entitlement {}'.format(entitlement))
         try:
-            answer = res.json()
-        except Exception:
-            demisto.info('Slack - Could not parse response for entitlement {}: {}'  # type: ignore[str-bytes-safe]
-                         .format(question.get('entitlement'), res.content))
-            pass
-        if not answer:
-            continue
-        payload_json: str = answer.get('payload', '')
-        if not payload_json:
-            continue
-        payload = json.loads(payload_json)
-
-        actions = payload.get('actions', [])
-        if actions:
-            demisto.info('Slack - received answer from user for entitlement {}.'.format(question.get('entitlement')))
-            user_id = payload.get('user', {}).get('id')
-            user_filter = list(filter(lambda u: u['id'] == user_id, users))
-            if user_filter:
-                user = user_filter[0]
-            else:
-                body = {
-                    'user': user_id
-                }
-                user = send_slack_request_sync(CLIENT, 'users.info', http_verb='GET', body=body).get('user', {})
-                users.append(user)
-                set_to_latest_integration_context('users', users)
+            async with session.post(ENDPOINT_URL, data=json.dumps(body), headers=headers, proxy=PROXY_URL,
+                                    ssl=SSL_CONTEXT) as res:
+                status = res.status
+                content = await res.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            demisto.error('Slack - failed to poll for answers for entitlement {}: {}'.format(entitlement, str(e)))
+            question['poll_failures'] = question.get('poll_failures', 0) + 1
+            return {}
 
-            answer_question(actions[0].get('text', {}).get('text'), question, questions,
-                            user.get('profile', {}).get('email'))
+    if status != 200:
+        demisto.error('Slack - failed to poll for answers: {}, status code: {}'.format(content, status))
+        question['poll_failures'] = question.get('poll_failures', 0) + 1
+        return {}
+    question.pop('poll_failures', None)
 
-    questions = list(filter(lambda q: q.get('remove', False) is False, questions))
-    set_to_latest_integration_context('questions', questions)
+    answer: dict = {}
+    try:
+        answer = json.loads(content)
+    except Exception:
+        demisto.info('Slack - Could not parse response for entitlement {}: {}'.format(entitlement, content))
+    if not answer:
+        return {}
+    payload_json: str = answer.get('payload', '')
+    if not payload_json:
+        return {}
+
+    return json.loads(payload_json)
 
 
-def add_info_headers(headers, expiry):
+async def add_info_headers(headers: dict, client: slack.WebClient):
+    """
+    Adds the instance and the team names to the headers of the answers polling requests.
+    :param headers: The headers to add to.
+    :param client: The async Slack client, as this runs on the event loop of the listener.
+    """
     # pylint: disable=no-member
     try:
         calling_context = demisto.callingContext.get('context', {})  # type: ignore[attr-defined]
         instance_name = calling_context.get('IntegrationInstance', '')
-        auth = send_slack_request_sync(CLIENT, 'auth.test')
+        auth = await send_slack_request_async(client, 'auth.test')
         team = auth.get('team', '')
         headers['X-Content-Name'] = instance_name
         headers['X-Content-TeamName'] = team
-        headers['X-Content-Expiry'] = expiry if expiry else 'No expiry'
     except Exception as e:
         demisto.error('Failed getting integration info: {}'.format(str(e)))
 
 
-def answer_question(text: str, question: dict, questions: list, email: str = ''):
+def answer_question(text: str, question: dict, email: str = ''):
     content, guid, incident_id, task_id = extract_entitlement(question.get('entitlement', ''), text)
     try:
         demisto.handleEntitlementForUser(incident_id, guid, email, content, task_id)
     except Exception as e:
         demisto.error('Failed handling entitlement {}: {}'.format(question.get('entitlement'), str(e)))
     question['remove'] = True
-    set_to_latest_integration_context('questions', questions)
 
 
 def check_for_mirrors():
@@ -770,12 +905,9 @@ async def handle_listen_error(error: str):
 
 async def start_listening():
     """
-    Starts a Slack RTM client and checks for mirrored incidents.
+    Starts a Slack RTM client and checks for mirrored incidents and answered questions.
     """
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-    loop = asyncio.get_running_loop()
-    loop.run_in_executor(executor, long_running_loop)
-    await slack_loop()
+    await asyncio.gather(long_running_loop(), slack_loop())
 
 
 async def handle_dm(user: dict, text: str, client: slack.WebClient):
@@ -980,20 +1112,14 @@ async def listen(**payload):
 
 
 async def get_user_by_id_async(client, integration_context, user_id):
-    user: dict = {}
-    users: list = []
-    if integration_context.get('users'):
-        users = json.loads(integration_context['users'])
-        user_filter = list(filter(lambda u: u['id'] == user_id, users))
-        if user_filter:
-            user = user_filter[0]
+    USER_DIRECTORY.sync(integration_context)
+    user = USER_DIRECTORY.get_by_id(user_id)
     if not user:
         body = {
             'user': user_id
         }
-        user = (await send_slack_request_async(client, 'users.info', body=body)).get('user', {})
-        users.append(user)
-        set_to_latest_integration_context('users', users)
+        user = (await send_slack_request_async(client, 'users.info', http_verb='GET', body=body)).get('user', {})
+    USER_DIRECTORY.store([user])
 
     return user
 
@@ -1674,7 +1800,7 @@ def init_globals():
     """
     global BOT_TOKEN, ACCESS_TOKEN, PROXY_URL, PROXIES, DEDICATED_CHANNEL, CLIENT, CHANNEL_CLIENT
     global SEVERITY_THRESHOLD, ALLOW_INCIDENTS, NOTIFY_INCIDENTS, INCIDENT_TYPE, VERIFY_CERT
-    global BOT_NAME, BOT_ICON_URL, MAX_LIMIT_TIME, PAGINATED_COUNT, SSL_CONTEXT
+    global BOT_NAME, BOT_ICON_URL, MAX_LIMIT_TIME, PAGINATED_COUNT, SSL_CONTEXT, USER_DIRECTORY
 
     VERIFY_CERT = not demisto.params().get('unsecure', False)
     if not VERIFY_CERT:
@@ -1701,6 +1827,7 @@ def init_globals():
     BOT_ICON_URL = demisto.params().get('bot_icon')
     MAX_LIMIT_TIME = int(demisto.params().get('max_limit_time', '60'))
     PAGINATED_COUNT = int(demisto.params().get('paginated_count', '200'))
+    USER_DIRECTORY = UserDirectory()
 
 
 def main():
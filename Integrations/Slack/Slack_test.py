@@ -4,6 +4,7 @@ from CommonServerUserPython import *
 import slack
 import pytest
 import asyncio
+import aiohttp
 
 import json as js
 import datetime
@@ -319,6 +320,25 @@ def set_integration_context(integration_context):
     INTEGRATION_CONTEXT = integration_context
 
 
+async def add_info_headers(headers, client):
+    pass
+
+
+class MockResponse:
+    def __init__(self, json_data, status=200):
+        self.json_data = json_data
+        self.status = status
+
+    async def text(self):
+        return js.dumps(self.json_data)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
 RETURN_ERROR_TARGET = 'Slack.return_error'
 
 
@@ -548,6 +568,84 @@ def test_get_user_by_name_paging(mocker):
     assert slack.WebClient.api_call.call_count == 2
 
 
+def test_get_user_by_name_cached_pages(mocker):
+    import Slack
+    from Slack import get_user_by_name
+    # Set
+
+    def api_call(method: str, http_verb: str = 'POST', file: dict = None, params=None, json=None, data=None):
+        if 'cursor' not in params:
+            return {'members': [{
+                'id': 'U012B3CUI',
+                'name': 'perikles',
+                'profile': {
+                    'email': 'perikles@acropoli.com'
+                }
+            }], 'response_metadata': {
+                'next_cursor': 'dGVhbTpDQ0M3UENUTks='
+            }}
+        else:
+            return {'members': [{
+                'id': 'U248918AB',
+                'name': 'alexios'
+            }], 'response_metadata': {
+                'next_cursor': ''
+            }}
+
+    mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
+    mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
+    mocker.patch.object(slack.WebClient, 'api_call', side_effect=api_call)
+
+    # Arrange
+    alexios = get_user_by_name('alexios')
+    perikles = get_user_by_name('Perikles@acropoli.com')
+    users = js.loads(demisto.getIntegrationContext()['users'])
+
+    # Assert
+    assert alexios['id'] == 'U248918AB'
+    assert perikles['id'] == 'U012B3CUI'
+    assert slack.WebClient.api_call.call_count == 2
+    assert demisto.setIntegrationContext.call_count == 2
+    assert [user['id'] for user in users] == ['U012A3CDE', 'U07QCRPA4', 'U248918AB', 'U012B3CUI']
+
+    # Users which were not found are not searched again until the TTL expires
+    assert get_user_by_name('ikaros') == {}
+    assert get_user_by_name('ikaros') == {}
+    assert slack.WebClient.api_call.call_count == 4
+
+    Slack.USER_DIRECTORY.expiry = 0
+    assert get_user_by_name('ikaros') == {}
+    assert slack.WebClient.api_call.call_count == 6
+
+
+def test_get_user_by_name_context_changed(mocker):
+    from Slack import get_user_by_name
+    # Set
+
+    mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
+    mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
+    mocker.patch.object(slack.WebClient, 'api_call', return_value={'members': []})
+
+    # Arrange
+    user = get_user_by_name('glinda')
+    integration_context = get_integration_context()
+    users = js.loads(integration_context['users'])
+    users.append({
+        'id': 'U248918AB',
+        'name': 'alexios',
+        'real_name': 'Alexios of Sparta'
+    })
+    integration_context['users'] = js.dumps(users)
+    set_integration_context(integration_context)
+    new_user = get_user_by_name('alexios of sparta')
+
+    # Assert
+    assert user['id'] == 'U07QCRPA4'
+    assert new_user['id'] == 'U248918AB'
+    assert slack.WebClient.api_call.call_count == 0
+    assert demisto.setIntegrationContext.call_count == 0
+
+
 def test_mirror_investigation_new_mirror(mocker):
     from Slack import mirror_investigation
 
@@ -1588,7 +1686,9 @@ async def test_get_user_by_id_async_user_doesnt_exist(mocker):
     @asyncio.coroutine
     def api_call(method: str, http_verb: str = 'POST', file: dict = None, params=None, json=None, data=None):
         if method == 'users.info':
-            return {'user': js.loads(USERS)[0]}
+            user = js.loads(USERS)[0]
+            user['id'] = params['user']
+            return {'user': user}
 
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
@@ -1639,7 +1739,34 @@ async def test_handle_text(mocker):
     assert entry_args['footer'] == '\n**From Slack**'
 
 
-def test_check_for_answers_no_proxy(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_add_info_headers(mocker):
+    import Slack
+
+    # Set
+
+    @asyncio.coroutine
+    def api_call(method: str, http_verb: str = 'POST', file: dict = None, params=None, json=None, data=None):
+        if method == 'auth.test':
+            return {'team': 'ghostbusters'}
+
+    mocker.patch.object(demisto, 'callingContext', {'context': {'IntegrationInstance': 'Slack_instance'}},
+                        create=True)
+    mocker.patch.object(slack.WebClient, 'api_call', side_effect=api_call)
+    mocker.patch.object(Slack, 'send_slack_request_sync')
+    headers: dict = {}
+
+    # Arrange
+    await Slack.add_info_headers(headers, slack.WebClient)
+
+    # Assert
+    assert headers == {'X-Content-Name': 'Slack_instance', 'X-Content-TeamName': 'ghostbusters'}
+    assert slack.WebClient.api_call.call_args[0][0] == 'auth.test'
+    assert Slack.send_slack_request_sync.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_check_for_answers_no_proxy(mocker):
     import Slack
 
     # Set
@@ -1648,11 +1775,8 @@ def test_check_for_answers_no_proxy(mocker, requests_mock):
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
 
-    mocker.patch.object(Slack, 'add_info_headers')
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        json={'payload': PAYLOAD_JSON}
-    )
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse({'payload': PAYLOAD_JSON}))
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -1667,13 +1791,13 @@ def test_check_for_answers_no_proxy(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     result_args = demisto.handleEntitlementForUser.call_args_list[0][0]
 
     # Assert
     assert demisto.handleEntitlementForUser.call_count == 1
-    assert requests_mock._adapter.last_request.proxies == OrderedDict()
+    assert aiohttp.ClientSession.post.call_args[1]['proxy'] is None
     assert result_args[0] == '22'
     assert result_args[1] == 'e95cb5a1-e394-4bc5-8ce0-508973aaf298'
     assert result_args[2] == 'spengler@ghostbusters.example.com'
@@ -1684,24 +1808,19 @@ def test_check_for_answers_no_proxy(mocker, requests_mock):
     assert demisto.getIntegrationContext()['questions'] == js.dumps([])
 
 
-def test_check_for_answers_proxy(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_check_for_answers_proxy(mocker):
     import Slack
 
     # Set
     mocker.patch.object(Slack, 'handle_proxy', return_value={'https': 'https_proxy', 'http': 'http_proxy'})
     Slack.init_globals()
-    proxy_dict = OrderedDict()
-    proxy_dict['https'] = 'https_proxy'
-    proxy_dict['http'] = 'http_proxy'
     mocker.patch.object(demisto, 'handleEntitlementForUser')
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
-    mocker.patch.object(Slack, 'add_info_headers')
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
 
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        json={'payload': PAYLOAD_JSON}
-    )
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse({'payload': PAYLOAD_JSON}))
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -1716,13 +1835,13 @@ def test_check_for_answers_proxy(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     result_args = demisto.handleEntitlementForUser.call_args_list[0][0]
 
     # Assert
     assert demisto.handleEntitlementForUser.call_count == 1
-    assert requests_mock._adapter.last_request.proxies == proxy_dict
+    assert aiohttp.ClientSession.post.call_args[1]['proxy'] == 'http_proxy'
     assert result_args[0] == '22'
     assert result_args[1] == 'e95cb5a1-e394-4bc5-8ce0-508973aaf298'
     assert result_args[2] == 'spengler@ghostbusters.example.com'
@@ -1733,7 +1852,8 @@ def test_check_for_answers_proxy(mocker, requests_mock):
     assert demisto.getIntegrationContext()['questions'] == js.dumps([])
 
 
-def test_check_for_answers_continue(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_check_for_answers_continue(mocker):
     import Slack
 
     # Set
@@ -1741,15 +1861,13 @@ def test_check_for_answers_continue(mocker, requests_mock):
     mocker.patch.object(demisto, 'error')
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
-    mocker.patch.object(Slack, 'add_info_headers')
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
 
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        [{'json': {}, 'status_code': 200},
-         {'json': 'error', 'status_code': 401},
-         {'json': {'payload': PAYLOAD_JSON}, 'status_code': 200}]
-
-    )
+    mocker.patch.object(aiohttp.ClientSession, 'post', side_effect=[
+        MockResponse({}),
+        MockResponse('error', status=401),
+        MockResponse({'payload': PAYLOAD_JSON})
+    ])
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -1778,7 +1896,7 @@ def test_check_for_answers_continue(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     result_args = demisto.handleEntitlementForUser.call_args_list[0][0]
 
@@ -1806,23 +1924,22 @@ def test_check_for_answers_continue(mocker, requests_mock):
         'reply': 'Thanks bro',
         'expiry': '3000-09-26 18:38:25',
         'default_response': 'NoResponse',
-        'last_poll_time': '2019-09-26 18:38:25'
+        'last_poll_time': '2019-09-26 18:38:25',
+        'poll_failures': 1
     }])
 
 
-def test_check_for_answers_no_answer(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_check_for_answers_no_answer(mocker):
     import Slack
 
     # Set
     mocker.patch.object(demisto, 'handleEntitlementForUser')
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
-    mocker.patch.object(Slack, 'add_info_headers')
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
 
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        json={}
-    )
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse({}))
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -1844,7 +1961,7 @@ def test_check_for_answers_no_answer(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     # Assert
 
@@ -1868,19 +1985,17 @@ def test_check_for_answers_no_answer(mocker, requests_mock):
     }])
 
 
-def test_check_for_answers_no_answer_expires(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_check_for_answers_no_answer_expires(mocker):
     import Slack
 
     # Set
     mocker.patch.object(demisto, 'handleEntitlementForUser')
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
-    mocker.patch.object(Slack, 'add_info_headers')
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
 
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        json={}
-    )
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse({}))
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -1902,7 +2017,7 @@ def test_check_for_answers_no_answer_expires(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     result_args = demisto.handleEntitlementForUser.call_args_list[0][0]
 
@@ -1926,7 +2041,8 @@ def test_check_for_answers_no_answer_expires(mocker, requests_mock):
     }])
 
 
-def test_check_for_answers_error(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_check_for_answers_error(mocker):
     import Slack
 
     # Set
@@ -1934,13 +2050,9 @@ def test_check_for_answers_error(mocker, requests_mock):
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
     mocker.patch.object(demisto, 'error')
-    mocker.patch.object(Slack, 'add_info_headers')
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
 
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        json='error',
-        status_code=401
-    )
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse('error', status=401))
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -1958,7 +2070,7 @@ def test_check_for_answers_error(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     # Assert
 
@@ -1971,17 +2083,20 @@ def test_check_for_answers_error(mocker, requests_mock):
         'entitlement': 'e95cb5a1-e394-4bc5-8ce0-508973aaf298@22|43',
         'expiry': '3000-09-26 18:38:25',
         'default_response': 'NoResponse',
-        'last_poll_time': '2019-09-26 18:38:25'
+        'last_poll_time': '2019-09-26 18:38:25',
+        'poll_failures': 1
     }, {
         'thread': 'notcool',
         'entitlement': '4404dae8-2d45-46bd-85fa-64779c12abe8@30|44',
         'expiry': '3000-09-26 18:38:25',
         'default_response': 'NoResponse',
-        'last_poll_time': '2019-09-26 18:38:25'
+        'last_poll_time': '2019-09-26 18:38:25',
+        'poll_failures': 1
     }])
 
 
-def test_check_for_answers_handle_entitlement_error(mocker, requests_mock):
+@pytest.mark.asyncio
+async def test_check_for_answers_handle_entitlement_error(mocker):
     import Slack
 
     # Set
@@ -1989,13 +2104,9 @@ def test_check_for_answers_handle_entitlement_error(mocker, requests_mock):
     mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
     mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
     mocker.patch.object(demisto, 'error')
-    mocker.patch.object(Slack, 'add_info_headers')
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
 
-    requests_mock.post(
-        'https://oproxy.demisto.ninja/slack-poll',
-        json={'payload': PAYLOAD_JSON},
-        status_code=200
-    )
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse({'payload': PAYLOAD_JSON}))
 
     integration_context = get_integration_context()
     integration_context['questions'] = js.dumps([{
@@ -2008,7 +2119,7 @@ def test_check_for_answers_handle_entitlement_error(mocker, requests_mock):
     set_integration_context(integration_context)
 
     # Arrange
-    Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
 
     # Assert
 
@@ -2019,6 +2130,80 @@ def test_check_for_answers_handle_entitlement_error(mocker, requests_mock):
     assert demisto.getIntegrationContext()['questions'] == js.dumps([])
 
 
+@pytest.mark.asyncio
+async def test_check_for_answers_backoff(mocker):
+    import Slack
+
+    # Set
+    mocker.patch.object(demisto, 'handleEntitlementForUser')
+    mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
+    mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
+    mocker.patch.object(Slack, 'add_info_headers', side_effect=add_info_headers)
+    mocker.patch.object(aiohttp.ClientSession, 'post', return_value=MockResponse({}))
+
+    integration_context = get_integration_context()
+    integration_context['questions'] = js.dumps([{
+        'thread': 'cool',
+        'entitlement': 'e95cb5a1-e394-4bc5-8ce0-508973aaf298@22|43',
+        'expiry': '3000-09-26 18:38:25',
+        'default_response': 'NoResponse',
+        'last_poll_time': '2019-09-26 18:35:25',
+        'poll_failures': 2
+    }, {
+        'thread': 'notcool',
+        'entitlement': '4404dae8-2d45-46bd-85fa-64779c12abe8@30|44',
+        'expiry': '3000-09-26 18:38:25',
+        'default_response': 'NoResponse',
+        'last_poll_time': '2019-09-26 18:34:25',
+        'poll_failures': 2
+    }])
+
+    set_integration_context(integration_context)
+
+    # Arrange
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+    questions = js.loads(demisto.getIntegrationContext()['questions'])
+
+    # Assert
+    assert aiohttp.ClientSession.post.call_count == 1
+    assert aiohttp.ClientSession.post.call_args[1]['data'] == js.dumps({
+        'token': None,
+        'entitlement': '4404dae8-2d45-46bd-85fa-64779c12abe8@30|44'
+    })
+    assert questions[0]['last_poll_time'] == '2019-09-26 18:35:25'
+    assert questions[0]['poll_failures'] == 2
+    assert questions[1]['last_poll_time'] == '2019-09-26 18:38:25'
+    assert 'poll_failures' not in questions[1]
+
+
+@pytest.mark.asyncio
+async def test_check_for_answers_nothing_to_poll(mocker):
+    import Slack
+
+    # Set
+    mocker.patch.object(demisto, 'getIntegrationContext', side_effect=get_integration_context)
+    mocker.patch.object(demisto, 'setIntegrationContext', side_effect=set_integration_context)
+    mocker.patch.object(aiohttp.ClientSession, 'post')
+
+    integration_context = get_integration_context()
+    integration_context['questions'] = js.dumps([{
+        'thread': 'cool',
+        'entitlement': 'e95cb5a1-e394-4bc5-8ce0-508973aaf298@22|43',
+        'expiry': '3000-09-26 18:38:25',
+        'default_response': 'NoResponse',
+        'last_poll_time': '2019-09-26 18:38:00'
+    }])
+
+    set_integration_context(integration_context)
+
+    # Arrange
+    await Slack.check_for_answers(datetime.datetime(2019, 9, 26, 18, 38, 25))
+
+    # Assert
+    assert aiohttp.ClientSession.post.call_count == 0
+    assert demisto.setIntegrationContext.call_count == 0
+
+
 @pytest.mark.asyncio
 async def test_check_entitlement(mocker):
     from Slack import check_and_handle_entitlement
@@ -53,3 +53,198 @@ def test_socks_proxy(mocker, request):
     assert_results_ok()
     tmp.seek(0)
     assert 'connected to' in tmp.read()  # make sure we went through microsocks
+
+
+class MockSocket(object):
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def connect(self, address):
+        pass
+
+    def send(self, data):
+        pass
+
+    def recv(self, size):
+        return self.chunks.pop(0) if self.chunks else b''
+
+    def close(self):
+        pass
+
+
+def test_whois_request_cached(mocker):
+    mocker.patch.object(Whois, 'responses_cache', Whois.TTLCache(60))
+    mocker.patch.object(Whois.socket, 'socket', side_effect=lambda *args: MockSocket([b'Domain Name: ', b'EXAMPLE.COM\r\n']))
+    assert Whois.whois_request('example.com', 'whois.example.net') == u'Domain Name: EXAMPLE.COM\r\n'
+    assert Whois.whois_request('example.com', 'whois.example.net') == u'Domain Name: EXAMPLE.COM\r\n'
+    assert Whois.socket.socket.call_count == 1
+    Whois.whois_request('example.com', 'whois.example.org')
+    assert Whois.socket.socket.call_count == 2
+
+
+def test_root_server_cached(mocker):
+    mocker.patch.object(Whois, 'root_servers_cache', Whois.TTLCache(60))
+    mocker.patch.object(Whois, 'get_root_server', side_effect=Whois.get_root_server)
+    mocker.patch.object(Whois, 'whois_request', return_value='Domain Name: EXAMPLE.CO.UK')
+    assert Whois.get_whois_raw('example.co.uk', with_server_list=True)[1] == ['whois.nic.uk']
+    assert Whois.get_whois_raw('example2.co.uk', with_server_list=True)[1] == ['whois.nic.uk']
+    assert Whois.get_whois_raw('example.ac.uk', with_server_list=True)[1] == ['whois.ja.net']
+    assert Whois.get_root_server.call_count == 1
+
+
+def test_root_server_cache_exceptions(mocker):
+    mocker.patch.object(Whois, 'root_servers_cache', Whois.TTLCache(60))
+    mocker.patch.object(Whois, 'get_root_server', return_value='whois.nic.uk')
+    mocker.patch.object(Whois, 'whois_request', return_value='Domain Name: AC.UK')
+    assert Whois.get_whois_raw('ac.uk', with_server_list=True)[1] == ['whois.nic.uk']
+    assert Whois.get_whois_raw('example.ac.uk', with_server_list=True)[1] == ['whois.ja.net']
+
+
+@pytest.mark.parametrize('domain, expected', [
+    ('example.com', 'whois.verisign-grs.com'),
+    ('example.co.uk', 'whois.nic.uk'),
+    ('www.example.co.uk', 'whois.nic.uk'),
+    ('example.uk', 'whois.nic.uk'),
+    ('example.za.org', 'whois.za.org'),
+    ('fooza.org', 'whois.pir.org')
+])
+def test_get_root_server(domain, expected):
+    assert Whois.get_root_server(domain) == expected
+
+
+def test_get_root_server_unsupported():
+    with pytest.raises(Whois.WhoisQueryFailure):
+        Whois.get_root_server('example.aaa')
+    with pytest.raises(Whois.WhoisException):
+        Whois.get_root_server('example.notatld')
+
+
+def test_whois_command_multiple_domains(mocker):
+    def get_whois(domain):
+        if domain == 'example.net':
+            raise Whois.WhoisQueryFailure(domain, 'Whois returned - Couldn\'t connect with the socket-server')
+        return {'id': ['1234']}
+
+    mocker.patch.object(demisto, 'args', return_value={'query': 'example.com,example.net,example.org'})
+    mocker.patch.object(demisto, 'results')
+    mocker.patch.object(Whois, 'get_whois', side_effect=get_whois)
+    with pytest.raises(SystemExit):
+        Whois.whois_command()
+    results = [args[0][0] for args in demisto.results.call_args_list]
+    assert len(results) == 3
+    assert results[0]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Name'] == 'example.com'
+    assert results[0]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Whois']['QueryStatus'] == 'Success'
+    assert results[1]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Name'] == 'example.net'
+    assert results[1]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Whois']['QueryStatus'] == 'Failed'
+    assert results[2]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Name'] == 'example.org'
+
+
+def test_whois_command_date_parse_failure(mocker):
+    invalid_date = mocker.Mock()
+    invalid_date.strftime.side_effect = ValueError('year=1800 is before 1900')
+
+    def get_whois(domain):
+        if domain == 'example.com':
+            return {'id': ['1234'], 'creation_date': [invalid_date]}
+        return {'id': ['5678']}
+
+    mocker.patch.object(demisto, 'args', return_value={'query': 'example.com,example.org'})
+    mocker.patch.object(demisto, 'results')
+    mocker.patch.object(Whois, 'get_whois', side_effect=get_whois)
+    Whois.whois_command()
+    results = [args[0][0] for args in demisto.results.call_args_list]
+    assert len(results) == 2
+    assert results[0]['Type'] == Whois.entryTypes['error']
+    assert 'Date could not be parsed' in results[0]['Contents']
+    assert results[1]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Name'] == 'example.org'
+    assert results[1]['EntryContext']['Domain(val.Name && val.Name == obj.Name)']['Whois']['QueryStatus'] == 'Success'
+
+
+def load_raw_whois(file_name):
+    with open('./test_data/{}'.format(file_name)) as f:
+        return f.read().decode('utf-8')
+
+
+def test_get_required_literal():
+    assert Whois.get_required_literal(Whois.re.compile(r'\[Created on\]\s*(?P<val>.+)')) == u'[created on]'
+    assert Whois.get_required_literal(Whois.re.compile(r'Exp(?:iry)? Date\s?[.]*:\s?(?P<val>.+)')) == u' date'
+    assert Whois.get_required_literal(Whois.re.compile(r'(?P<val>[\w.-]+@[\w.-]+\.[\w]{2,6})')) == u'@'
+    assert Whois.get_required_literal(Whois.re.compile(r'(C|c)hanged:\s*(?P<val>.+)')) == u'hanged:'
+
+
+def test_parse_raw_whois():
+    raw_data = [load_raw_whois('google_com_markmonitor.txt'), load_raw_whois('google_com_verisign.txt')]
+    result = Whois.parse_raw_whois(raw_data, normalized=True)
+    assert result['id'] == [u'2138514_DOMAIN_COM-VRSN']
+    assert result['registrar'] == [u'MarkMonitor, Inc.']
+    assert result['whois_server'] == [u'whois.markmonitor.com']
+    assert result['nameservers'] == [u'ns3.google.com', u'ns2.google.com', u'ns4.google.com', u'ns1.google.com']
+    assert result['creation_date'][0].year == 1997
+    assert result['expiration_date'][0].year == 2028
+    assert len(result['status']) == 3
+
+
+@pytest.mark.parametrize('file_name, expected', [
+    ('bbc_co_uk_nominet.txt', {'registrar': [u'British Broadcasting Corporation [Tag = BBC]'],
+                               'status': [u'Registered until expiry date.']}),
+    ('yandex_ru_tcinet.txt', {'registrar': [u'RU-CENTER-RU'], 'status': [u'REGISTERED, DELEGATED, VERIFIED']}),
+    ('heise_de_denic.txt', {'status': [u'connect'],
+                            'nameservers': [u'ns.heise.de', u'ns.plusline.de', u'ns.pop-hannover.de',
+                                            u'ns.s.plusline.de', u'ns2.pop-hannover.net']})
+])
+def test_parse_raw_whois_registries(file_name, expected):
+    result = Whois.parse_raw_whois([load_raw_whois(file_name)])
+    for key, value in expected.items():
+        assert result[key] == value
+    assert result['nameservers']
+
+
+REGISTRY_FILES = ['google_com_verisign.txt', 'google_com_markmonitor.txt', 'bbc_co_uk_nominet.txt',
+                  'yandex_ru_tcinet.txt', 'heise_de_denic.txt']
+
+
+def parse_grammar_data_per_rule(segment, data):
+    """The grammar loop before the rules were dispatched by their required literals - every rule searches every line"""
+    for rule_key, rule_regexes in Whois.grammar['_data'].items():
+        if rule_key not in data:
+            for line in segment.splitlines():
+                for regex in rule_regexes:
+                    result = Whois.re.search(regex, line)
+
+                    if result is not None:
+                        val = result.group("val").strip()
+                        if val != "":
+                            data.setdefault(rule_key, []).append(val)
+
+
+def time_grammar_parsing(parse_grammar_data, segments, rounds):
+    start = time.time()
+    for _ in range(rounds):
+        data = {}  # type: dict
+        for segment in segments:
+            parse_grammar_data(segment, data)
+
+    return time.time() - start, data
+
+
+def test_parse_grammar_data_benchmark():
+    """
+    Given
+    - The raw whois responses of several registries.
+
+    When
+    - Parsing them with the literal dispatched grammar rules, and with every rule on every line.
+
+    Then
+    - Ensure the parsed data is identical, and the dispatched rules are faster.
+    """
+    rounds = 5
+    for file_name in REGISTRY_FILES:
+        segments = [load_raw_whois(file_name).replace('\r', '')]
+        per_rule_time, per_rule_data = time_grammar_parsing(parse_grammar_data_per_rule, segments, rounds)
+        dispatched_time, dispatched_data = time_grammar_parsing(Whois.parse_grammar_data, segments, rounds)
+
+        assert dispatched_data == per_rule_data
+        print('{}: {:.1f} ms per parse with every rule, {:.1f} ms with the dispatched rules'.format(
+            file_name, per_rule_time * 1000 / rounds, dispatched_time * 1000 / rounds))
+        assert dispatched_time < per_rule_time
@@ -12,6 +12,10 @@ import os
 import re
 import base64
 import logging
+import random
+import threading
+from multiprocessing.pool import ThreadPool
+from email.utils import parsedate_tz, mktime_tz
 from collections import OrderedDict
 import xml.etree.cElementTree as ET
 from datetime import datetime, timedelta
@@ -872,7 +876,7 @@ def appendContext(key, data, dedup=False):
         demisto.setContext(key, data)
 
 
-def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None):
+def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None, maxRows=None):
     """
        Converts a demisto table in JSON form to a Markdown table
 
@@ -895,20 +899,60 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
        :type metadata: ``str``
        :param metadata: Metadata about the table contents
 
+       :type maxRows: ``int``
+       :keyword maxRows: The maximal number of rows to present, the rest are summarized in a footer (optional)
+
        :return: A string representation of the markdown table
        :rtype: ``str``
     """
+    return ''.join(tableToMarkdownChunks(name, t, headers=headers, headerTransform=headerTransform,
+                                         removeNull=removeNull, metadata=metadata, maxRows=maxRows))
 
-    mdResult = ''
+
+def tableToMarkdownChunks(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None, maxRows=None,
+                          chunkSize=1000):
+    """
+       Converts a demisto table in JSON form to a Markdown table, yielding the table in chunks of rows.
+       Joining the chunks gives the same string as tableToMarkdown.
+
+       :type name: ``str``
+       :param name: The name of the table (required)
+
+       :type t: ``dict`` or ``list``
+       :param t: The JSON table - List of dictionaries with the same keys or a single dictionary (required)
+
+       :type headers: ``list`` or ``string``
+       :keyword headers: A list of headers to be presented in the output table (by order). If string will be passed
+            then table will have single header. Default will include all available headers.
+
+       :type headerTransform: ``function``
+       :keyword headerTransform: A function that formats the original data headers (optional)
+
+       :type removeNull: ``bool``
+       :keyword removeNull: Remove empty columns from the table. Default is False
+
+       :type metadata: ``str``
+       :param metadata: Metadata about the table contents
+
+       :type maxRows: ``int``
+       :keyword maxRows: The maximal number of rows to present, the rest are summarized in a footer (optional)
+
+       :type chunkSize: ``int``
+       :keyword chunkSize: The number of table rows in each chunk. Default is 1000
+
+       :return: A generator of the markdown table chunks
+       :rtype: ``generator``
+    """
+    title = ''
     if name:
-        mdResult = '### ' + name + '\n'
+        title = '### ' + name + '\n'
 
     if metadata:
-        mdResult += metadata + '\n'
+        title += metadata + '\n'
 
     if not t or len(t) == 0:
-        mdResult += '**No entries.**\n'
-        return mdResult
+        yield title + '**No entries.**\n'
+        return
 
     if not isinstance(t, list):
         t = [t]
@@ -921,7 +965,7 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
         # should be only one header
         if headers and len(headers) > 0:
             header = headers[0]
-            t = map(lambda item: dict((h, item) for h in [header]), t)
+            t = [{header: item} for item in t]
         else:
             raise Exception("Missing headers param for tableToMarkdown. Example: headers=['Some Header']")
 
@@ -931,41 +975,87 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
         headers.sort()
 
     if removeNull:
-        headers_aux = headers[:]
-        for header in headers_aux:
-            if all(obj.get(header) in ('', None, [], {}) for obj in t):
-                headers.remove(header)
-
-    if t and len(headers) > 0:
-        newHeaders = []
-        if headerTransform is None:  # noqa
-            headerTransform = lambda s: s  # noqa
-        for header in headers:
-            newHeaders.append(headerTransform(header))
-        mdResult += '|'
-        if len(newHeaders) == 1:
-            mdResult += newHeaders[0]
-        else:
-            mdResult += '|'.join(newHeaders)
-        mdResult += '|\n'
-        sep = '---'
-        mdResult += '|' + '|'.join([sep] * len(headers)) + '|\n'
-        for entry in t:
-            vals = [stringEscapeMD((formatCell(entry.get(h, ''), False) if entry.get(h) is not None else ''),
-                                   True, True) for h in headers]
-            # this pipe is optional
-            mdResult += '| '
-            try:
-                mdResult += ' | '.join(vals)
-            except UnicodeDecodeError:
-                vals = [str(v) for v in vals]
-                mdResult += ' | '.join(vals)
-            mdResult += ' |\n'
+        headers = removeNullColumns(t, headers)
 
+    if not headers:
+        yield title + '**No entries.**\n'
+        return
+
+    if headerTransform is None:
+        newHeaders = list(headers)
     else:
-        mdResult += '**No entries.**\n'
+        newHeaders = [headerTransform(header) for header in headers]
+
+    chunk = [title, '|' + '|'.join(newHeaders) + '|\n', '|' + '|'.join(['---'] * len(headers)) + '|\n']
+    rows = t if maxRows is None else t[:maxRows]
+    for entry in rows:
+        # plain strings are the common cell values, and need no formatting
+        vals = [value if type(value) is str and '|' not in value and '\n' not in value and '\r' not in value
+                else formatMarkdownCell(value) for value in map(entry.get, headers)]
+        # this pipe is optional
+        try:
+            chunk.append('| ' + ' | '.join(vals) + ' |\n')
+        except UnicodeDecodeError:
+            chunk.append('| ' + ' | '.join([str(v) for v in vals]) + ' |\n')
 
-    return mdResult
+        if len(chunk) >= chunkSize:
+            yield ''.join(chunk)
+            chunk = []
+
+    if len(rows) < len(t):
+        chunk.append('\n**{} more rows.**\n'.format(len(t) - len(rows)))
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+def removeNullColumns(t, headers):
+    """
+       Removes the headers of the columns which are empty in all the table rows, in a single pass over the table
+
+       :type t: ``list``
+       :param t: The JSON table - List of dictionaries (required)
+
+       :type headers: ``list``
+       :param headers: The table headers (required)
+
+       :return: The headers of the columns which have a value
+       :rtype: ``list``
+    """
+    nullHeaders = set(headers)
+    for obj in t:
+        if not nullHeaders:
+            break
+        nullHeaders = set(header for header in nullHeaders if obj.get(header) in ('', None, [], {}))
+
+    return [header for header in headers if header not in nullHeaders]
+
+
+def formatMarkdownCell(value):
+    """
+       Formats a table cell value as a markdown table cell, the same as stringEscapeMD with minimal and multiline
+       escaping of formatCell. Strings with no line breaks or pipes are kept as they are.
+
+       :type value: ``object``
+       :param value: The cell value (required)
+
+       :return: The markdown table cell
+       :rtype: ``str``
+    """
+    if value is None:
+        return ''
+
+    if type(value) is int:
+        # same as its json representation
+        return str(value)
+
+    if not isinstance(value, STRING_TYPES):
+        value = formatCell(value, False)
+
+    if isinstance(value, STRING_TYPES) and '|' not in value and '\n' not in value and '\r' not in value:
+        return value
+
+    return stringEscapeMD(value, True, True)
 
 
 tblToMd = tableToMarkdown
@@ -1499,6 +1589,135 @@ def return_outputs(readable_output, outputs=None, raw_response=None):
     demisto.results(return_entry)
 
 
+def run_concurrently(func, items, max_workers=10):
+    """
+        Runs the function on each of the items with a bounded thread pool, for commands that send a request per item,
+        for example reputation commands over a list of indicators. An error of an item does not stop the other items.
+        The function should not call the demisto object (executeCommand, results, etc.), only send its requests.
+
+        :type func: ``function``
+        :param func: The function to run, gets a single item.
+
+        :type items: ``list``
+        :param items: The items to run the function on.
+
+        :type max_workers: ``int``
+        :param max_workers: The maximal number of items to run concurrently.
+
+        :return: A (result, error) tuple per item, in the order of the items. The error is the exception that the
+            function raised for the item, or None.
+        :rtype: ``list``
+    """
+    def run(item):
+        try:
+            return func(item), None
+        except Exception as ex:
+            return None, ex
+
+    items = list(items)
+    workers = min(max_workers, len(items))
+    if workers <= 1:
+        return [run(item) for item in items]
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(run, items)
+    finally:
+        pool.terminate()
+
+
+def merge_entry_contexts(entry_contexts):
+    """
+        Merges EntryContext dicts, the values of a key that appears in several dicts are merged into a list.
+
+        :type entry_contexts: ``list``
+        :param entry_contexts: The EntryContext dicts to merge, None values are ignored.
+
+        :return: The merged EntryContext
+        :rtype: ``dict``
+    """
+    merged = {}  # type: dict
+    for entry_context in entry_contexts:
+        for key, value in (entry_context or {}).items():
+            if key not in merged:
+                # lists are copied, so merging does not change the given entry contexts
+                merged[key] = list(value) if isinstance(value, list) else value
+                continue
+
+            if not isinstance(merged[key], list):
+                merged[key] = [merged[key]]
+            if isinstance(value, list):
+                merged[key].extend(value)
+            else:
+                merged[key].append(value)
+
+    return merged
+
+
+def run_batch_command(func, items, max_workers=10, error_message='Failed to process {}: {}'):
+    """
+        Runs the function of a command on each of the items concurrently (see run_concurrently), and merges the
+        results into a single entry. An error entry is added for each item that failed.
+
+        :type func: ``function``
+        :param func:
+            The function to run, gets a single item and returns an entry dict, or a (readable_output, outputs,
+            raw_response) tuple like the arguments of return_outputs.
+
+        :type items: ``list``
+        :param items: The items to run the function on, for example argToList(demisto.args().get('ip')).
+
+        :type max_workers: ``int``
+        :param max_workers: The maximal number of items to run concurrently.
+
+        :type error_message: ``str``
+        :param error_message: The format of the error entries, gets the item and the error.
+
+        :return: The entries to pass to demisto.results, the merged entry first.
+        :rtype: ``list``
+    """
+    items = list(items)
+    readable_outputs = []
+    contents = []
+    entry_contexts = []
+    errors = []
+    for item, (result, error) in zip(items, run_concurrently(func, items, max_workers)):
+        if error is not None:
+            errors.append({
+                'Type': entryTypes['error'],
+                'ContentsFormat': formats['text'],
+                'Contents': error_message.format(item, error)
+            })
+            continue
+
+        if isinstance(result, tuple):
+            readable_output, outputs, raw_response = (tuple(result) + (None, None))[:3]
+            result = {
+                'HumanReadable': readable_output,
+                'Contents': outputs if raw_response is None else raw_response,
+                'EntryContext': outputs
+            }
+        readable_output = result.get('HumanReadable')
+        if readable_output is None and result.get('ContentsFormat') in (formats['text'], formats['markdown']):
+            readable_output = result.get('Contents')
+        if readable_output:
+            readable_outputs.append(readable_output)
+        contents.append(result.get('Contents'))
+        entry_contexts.append(result.get('EntryContext'))
+
+    entries = []
+    if contents:
+        entries.append({
+            'Type': entryTypes['note'],
+            'ContentsFormat': formats['json'],
+            'Contents': contents,
+            'HumanReadable': '\n'.join(readable_outputs),
+            'EntryContext': merge_entry_contexts(entry_contexts)
+        })
+
+    return entries + errors
+
+
 def return_error(message, error='', outputs=None):
     """
         Returns error entry with given message and exits the script
@@ -2195,6 +2414,160 @@ H || val.SSDeep && val.SSDeep == obj.SSDeep)': {'Malicious': {'Vendor': 'Vendor'
                                .format(indicator_type, INDICATOR_TYPE_TO_CONTEXT_KEY.keys()))
 
 
+class TokenBucket(object):
+    """Thread safe token bucket rate limiter, allows ``rate`` calls every ``period`` seconds with bursts of up
+    to ``rate`` calls (at least one call, so a fractional rate such as 0.5 allows a call every two periods).
+
+    :type rate: ``float``
+    :param rate: The number of calls allowed in a period.
+
+    :type period: ``float``
+    :param period: The period length in seconds.
+
+    :return: No data returned
+    :rtype: ``None``
+    """
+
+    def __init__(self, rate, period=1.0):
+        self.rate = float(rate)
+        self.period = float(period)
+        self.capacity = max(self.rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.time()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate / self.period)
+        self.updated_at = now
+
+    def acquire(self):
+        """Takes a token from the bucket, waits until a token is available if the bucket is empty.
+
+        :return: The time (in seconds) waited for the token.
+        :rtype: ``float``
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) * self.period / self.rate
+
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+# token buckets of the BaseClient instances, by base url
+_RATE_LIMITERS = {}  # type: dict
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(key, rate, period=1.0):
+    """Returns the token bucket of the key, creates it on the first call. Clients with the same base url and rate
+    limit share the same token bucket, so the rate limit holds for all the clients of the integration run.
+
+    :type key: ``str``
+    :param key: The token bucket key, for example the base url.
+
+    :type rate: ``int``
+    :param rate: The number of calls allowed in a period.
+
+    :type period: ``float``
+    :param period: The period length in seconds.
+
+    :return: The token bucket of the key.
+    :rtype: ``TokenBucket``
+    """
+    with _RATE_LIMITERS_LOCK:
+        rate_limiter = _RATE_LIMITERS.get((key, rate, period))
+        if rate_limiter is None:
+            rate_limiter = _RATE_LIMITERS[(key, rate, period)] = TokenBucket(rate, period)
+
+        return rate_limiter
+
+
+class BackgroundTask(object):
+    """Runs a function on a daemon thread, the result (or the exception) is returned by the result method.
+
+    :type func: ``function``
+    :param func: The function to run.
+
+    :return: No data returned
+    :rtype: ``None``
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._result = None
+        self._exception = None
+        self._thread = threading.Thread(target=self._run, args=(func, args, kwargs))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._result = func(*args, **kwargs)
+        except Exception as exception:
+            self._exception = exception
+
+    def result(self):
+        """Waits for the function to return.
+
+        :return: The return value of the function, raises the exception of the function if it failed.
+        :rtype: ``any``
+        """
+        self._thread.join()
+        if self._exception is not None:
+            raise self._exception
+
+        return self._result
+
+
+def get_path_value(obj, path):
+    """Returns the value of a dot separated path in a dict, for example 'meta.next_cursor'.
+
+    :type obj: ``dict``
+    :param obj: The dict to get the value from.
+
+    :type path: ``str``
+    :param path: The dot separated path of the value.
+
+    :return: The value, or None if the path does not exist.
+    :rtype: ``any``
+    """
+    for key in path.split('.'):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+
+    return obj
+
+
+def parse_retry_after(retry_after):
+    """Parses the value of a Retry-After header, which is either a number of seconds or an HTTP date.
+
+    :type retry_after: ``str``
+    :param retry_after: The Retry-After header value.
+
+    :return: The number of seconds to wait, or None if the value is not valid.
+    :rtype: ``float``
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    retry_at = parsedate_tz(retry_after)
+    if retry_at is None:
+        return None
+
+    return max(0.0, mktime_tz(retry_at) - time.time())
+
+
 # Will add only if 'requests' module imported
 if 'requests' in sys.modules:
     class BaseClient(object):
@@ -2223,17 +2596,58 @@ if 'requests' in sys.modules:
             The request authorization, for example: (username, password).
             Can be None.
 
+        :type retries: ``int``
+        :param retries:
+            The number of times to retry a request that failed with one of the status_list_to_retry status codes,
+            or with a connection error or a timeout. POST and PATCH requests are not retried after a read timeout,
+            as the server may have already handled them. The default is 0 (no retries).
+
+        :type status_list_to_retry: ``tuple``
+        :param status_list_to_retry: The status codes to retry, the default is (429, 500, 502, 503, 504).
+
+        :type backoff_factor: ``float``
+        :param backoff_factor:
+            The wait before retry N (counting from 0) is a random time between half and all of
+            backoff_factor * (2 ** N) seconds. A Retry-After header of the response overrides it.
+
+        :type max_backoff: ``float``
+        :param max_backoff: The maximal wait (in seconds) before a retry, including Retry-After waits.
+
+        :type rate_limit: ``float``
+        :param rate_limit:
+            The number of requests allowed to the base url in rate_limit_period seconds, shared by all
+            the clients of the same base url. The default is None (no rate limit).
+
+        :type rate_limit_period: ``float``
+        :param rate_limit_period: The rate limit period in seconds, the default is 1.
+
+        :type pool_size: ``int``
+        :param pool_size:
+            The number of connections to keep open per host, for clients that send requests from several
+            threads. The default is None (the requests default, 10).
+
         :return: No data returned
         :rtype: ``None``
         """
 
-        def __init__(self, base_url, verify=True, proxy=False, ok_codes=tuple(), headers=None, auth=None):
+        def __init__(self, base_url, verify=True, proxy=False, ok_codes=tuple(), headers=None, auth=None,
+                     retries=0, status_list_to_retry=(429, 500, 502, 503, 504), backoff_factor=0.5, max_backoff=60,
+                     rate_limit=None, rate_limit_period=1, pool_size=None):
             self._base_url = base_url
             self._verify = verify
             self._ok_codes = ok_codes
             self._headers = headers
             self._auth = auth
+            self._retries = retries
+            self._status_list_to_retry = status_list_to_retry
+            self._backoff_factor = backoff_factor
+            self._max_backoff = max_backoff
+            self._rate_limiter = get_rate_limiter(base_url, rate_limit, rate_limit_period) if rate_limit else None
             self._session = requests.Session()
+            if pool_size:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
             if proxy:
                 self._proxies = handle_proxy()
             else:
@@ -2301,9 +2715,10 @@ if 'requests' in sys.modules:
                 headers = headers if headers else self._headers
                 auth = auth if auth else self._auth
                 # Execute
-                res = self._session.request(
+                res = self._send_request(
                     method,
                     address,
+                    ok_codes,
                     verify=self._verify,
                     params=params,
                     data=data,
@@ -2363,6 +2778,221 @@ if 'requests' in sys.modules:
                     .format(err_type, exception.errno, exception.strerror)
                 raise DemistoException(err_msg, exception)
 
+        def _paginate(self, method, url_suffix, pagination='offset', results_key=None, page_size=50, limit=None,
+                      limit_param='limit', offset_param='offset', page_param='page', first_page=1, next_key=None,
+                      cursor_param='cursor', prefetch=False, params=None, **kwargs):
+            """Yields the results of a paginated API one by one, requesting the pages lazily, so only one page
+            (two with prefetch) is kept in memory.
+
+            :type method: ``str``
+            :param method: The HTTP method, for example: GET, POST, and so on.
+
+            :type url_suffix: ``str``
+            :param url_suffix: The API endpoint.
+
+            :type pagination: ``str``
+            :param pagination:
+                The pagination style of the API:
+                'offset' - sends the offset_param and limit_param parameters.
+                'page' - sends the page_param (starting from first_page) and limit_param parameters.
+                'cursor' - sends the cursor from the next_key field of the previous response in cursor_param.
+                'next_link' - requests the URL from the next_key field of the previous response.
+                'link_header' - requests the 'next' URL of the Link header of the previous response.
+                The offset and page styles stop at a page with less than page_size results, all the styles
+                stop at an empty page.
+
+            :type results_key: ``str``
+            :param results_key:
+                The dot separated path of the results list in the response, for example 'data.items'.
+                If None, the response should be the results list.
+
+            :type page_size: ``int``
+            :param page_size: The number of results to request in a page, sent in limit_param.
+
+            :type limit: ``int``
+            :param limit: The maximal number of results to yield. If None, yields all the results.
+
+            :type limit_param: ``str``
+            :param limit_param: The page size parameter name. If None, the page size is not sent.
+
+            :type offset_param: ``str``
+            :param offset_param: The offset parameter name, for the 'offset' style.
+
+            :type page_param: ``str``
+            :param page_param: The page number parameter name, for the 'page' style.
+
+            :type first_page: ``int``
+            :param first_page: The number of the first page, for the 'page' style.
+
+            :type next_key: ``str``
+            :param next_key: The dot separated path of the cursor or the next link in the response.
+
+            :type cursor_param: ``str``
+            :param cursor_param: The cursor parameter name, for the 'cursor' style.
+
+            :type prefetch: ``bool``
+            :param prefetch: Whether to request the next page on a background thread while the results of the
+                current page are consumed.
+
+            :type params: ``dict``
+            :param params: URL parameters to send with all the page requests.
+
+            :param kwargs: Other arguments of _http_request, for example: headers, json_data, timeout.
+
+            :return: A generator of the results.
+            :rtype: ``generator``
+            """
+            if pagination not in ('offset', 'page', 'cursor', 'next_link', 'link_header'):
+                raise ValueError('Unsupported pagination style: {}'.format(pagination))
+            if pagination in ('cursor', 'next_link') and not next_key:
+                raise ValueError('The next_key argument is required for {} pagination'.format(pagination))
+
+            request_params = dict(params or {})
+            if limit_param and page_size:
+                request_params[limit_param] = page_size
+            if pagination == 'offset':
+                request_params[offset_param] = 0
+            elif pagination == 'page':
+                request_params[page_param] = first_page
+
+            next_request = (None, request_params)
+            page = self._request_page(method, url_suffix, next_request, results_key, **kwargs)
+            count = 0
+            while True:
+                res, response, results = page
+                next_request = self._get_next_page_request(res, response, results, next_request, pagination,
+                                                           page_size, offset_param, page_param, next_key, cursor_param)
+                if limit is not None:
+                    results = results[:limit - count]
+                    count += len(results)
+                    if count >= limit:
+                        next_request = None
+
+                page_request = None
+                if next_request and prefetch:
+                    page_request = BackgroundTask(self._request_page, method, url_suffix, next_request, results_key,
+                                                  **kwargs)
+                # only the results of the current page are kept while they are consumed
+                res = response = page = None
+                for result in results:
+                    yield result
+
+                if not next_request:
+                    return
+                if page_request:
+                    page = page_request.result()
+                else:
+                    page = self._request_page(method, url_suffix, next_request, results_key, **kwargs)
+
+        def _request_page(self, method, url_suffix, page_request, results_key=None, **kwargs):
+            """Requests a page for _paginate.
+
+            :return: The response, its parsed json and its results list.
+            :rtype: ``tuple``
+            """
+            full_url, params = page_request
+            res = self._http_request(method, url_suffix, full_url=full_url, params=params, resp_type='response',
+                                     **kwargs)
+            try:
+                response = res.json()
+            except ValueError as exception:
+                raise DemistoException('Failed to parse json object from response: {}'.format(res.content), exception)
+
+            results = get_path_value(response, results_key) if results_key else response
+            if not isinstance(results, list):
+                results = [results] if results else []
+
+            return res, response, results
+
+        def _get_next_page_request(self, res, response, results, page_request, pagination, page_size, offset_param,
+                                   page_param, next_key, cursor_param):
+            """Returns the (full_url, params) of the page after the current page, or None if it was the last page.
+
+            :rtype: ``tuple``
+            """
+            if not results:
+                return None
+
+            full_url, params = page_request
+            if pagination in ('offset', 'page'):
+                if page_size and len(results) < page_size:
+                    return None
+                params = dict(params)
+                if pagination == 'offset':
+                    params[offset_param] += len(results)
+                else:
+                    params[page_param] += 1
+                return full_url, params
+
+            if pagination == 'link_header':
+                next_link = res.links.get('next', {}).get('url')
+            else:
+                next_value = get_path_value(response, next_key)
+                if pagination == 'cursor':
+                    if not next_value:
+                        return None
+                    params = dict(params)
+                    params[cursor_param] = next_value
+                    return full_url, params
+                next_link = next_value
+
+            if not next_link:
+                return None
+            # the next link already contains the query parameters, a relative link is relative to the requested url
+            return requests.compat.urljoin(res.url, next_link), None
+
+        def _send_request(self, method, address, ok_codes=None, **kwargs):
+            """Sends the request with the session, waits for the rate limiter before each attempt, and retries
+            the request according to the retry arguments of the client.
+
+            :return: The response of the last attempt.
+            :rtype: ``requests.Response``
+            """
+            attempt = 0
+            while True:
+                if self._rate_limiter:
+                    self._rate_limiter.acquire()
+                try:
+                    res = self._session.request(method, address, **kwargs)
+                except (requests.exceptions.SSLError, requests.exceptions.ProxyError):
+                    raise
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exception:
+                    # the server may have already handled a request which timed out while reading the response,
+                    # so a non idempotent request is not sent again
+                    is_handled = isinstance(exception, requests.exceptions.ReadTimeout) and \
+                        method.upper() in ('POST', 'PATCH')
+                    if attempt >= self._retries or is_handled:
+                        raise
+                    # buffered in LOG, as the request may be sent from a thread which must not call demisto
+                    LOG('Request to {} failed with {}, retrying'.format(address, exception.__class__.__name__))
+                else:
+                    if attempt >= self._retries or res.status_code not in self._status_list_to_retry or \
+                            self._is_status_code_valid(res, ok_codes):
+                        return res
+                    LOG('Request to {} failed with status code {}, retrying'.format(address, res.status_code))
+                    retry_after = parse_retry_after(res.headers.get('Retry-After'))
+                    # release the connection of the discarded response back to the pool
+                    res.close()
+                    if retry_after is not None:
+                        time.sleep(min(retry_after, self._max_backoff))
+                        attempt += 1
+                        continue
+
+                time.sleep(self._get_backoff_time(attempt))
+                attempt += 1
+
+        def _get_backoff_time(self, attempt):
+            """Returns the time (in seconds) to wait before the retry, exponential backoff with jitter.
+
+            :type attempt: ``int``
+            :param attempt: The number of the failed attempt, counting from 0.
+
+            :return: The time to wait.
+            :rtype: ``float``
+            """
+            backoff = min(self._max_backoff, self._backoff_factor * (2 ** attempt))
+            return backoff / 2 + random.uniform(0, backoff / 2)
+
         def _is_status_code_valid(self, response, ok_codes=None):
             """If the status code is OK, return 'True'.
 
@@ -2386,3 +3016,6 @@ if 'requests' in sys.modules:
 
 class DemistoException(Exception):
     pass
+
+
+# END OF COMMON SERVER PYTHON
@@ -4,10 +4,12 @@ import copy
 import json
 import os
 import sys
+import time
 import requests
 from pytest import raises, mark
 import pytest
 from CommonServerPython import xml2json, json2xml, entryTypes, formats, tableToMarkdown, underscoreToCamelCase, \
+    tableToMarkdownChunks, \
     flattenCell, date_to_timestamp, datetime, camelize, pascalToSpace, argToList, \
     remove_nulls_from_dictionary, is_error, get_error, hash_djb2, fileResult, is_ip_valid, get_demisto_version, \
     IntegrationLogger, parse_date_string, IS_PY3, DebugLogger, b64_encode, parse_date_range, return_outputs
@@ -315,6 +317,30 @@ def test_tbl_to_md_dict_with_special_character():
     assert table_with_character == expected_string_with_special_character
 
 
+def test_tbl_to_md_max_rows():
+    table_max_rows = tableToMarkdown('tableToMarkdown test with max rows', DATA, maxRows=1)
+    expected_table_max_rows = '''### tableToMarkdown test with max rows
+|header_1|header_2|header_3|
+|---|---|---|
+| a1 | b1 | c1 |
+
+**2 more rows.**
+'''
+    assert table_max_rows == expected_table_max_rows
+
+
+def test_tbl_to_md_chunks():
+    data = [{'header_1': 'a{}'.format(i), 'header_2': None, 'header_3': 'c|{}'.format(i)} for i in range(10)]
+    chunks = list(tableToMarkdownChunks('tableToMarkdown test with chunks', data, removeNull=True, chunkSize=4))
+    assert len(chunks) == 4
+    assert ''.join(chunks) == tableToMarkdown('tableToMarkdown test with chunks', data, removeNull=True)
+    assert chunks[0] == '''### tableToMarkdown test with chunks
+|header_1|header_3|
+|---|---|
+| a0 | c\\|0 |
+'''
+
+
 def test_tbl_to_md_header_with_special_character():
     data = {
         'header_1': u'foo'
@@ -670,6 +696,68 @@ def test_exception_in_return_error(mocker):
     assert IntegrationLogger.__call__.call_count == 2
 
 
+def test_run_concurrently():
+    import threading
+    from CommonServerPython import run_concurrently
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def double(item):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        if item == 3:
+            raise ValueError('bad item')
+        return item * 2
+
+    results = run_concurrently(double, range(10), max_workers=4)
+    assert [result for result, _ in results] == [0, 2, 4, None, 8, 10, 12, 14, 16, 18]
+    assert [str(error) for _, error in results if error] == ['bad item']
+    assert 1 < running[1] <= 4
+    assert run_concurrently(double, []) == []
+
+
+def test_merge_entry_contexts():
+    from CommonServerPython import merge_entry_contexts
+    dbot_scores = [{'Indicator': '1.1.1.1'}]
+    merged = merge_entry_contexts([
+        {'DBotScore': dbot_scores, 'IP(val.Address == obj.Address)': {'Address': '1.1.1.1'}},
+        None,
+        {'DBotScore': {'Indicator': '2.2.2.2'}, 'IP(val.Address == obj.Address)': {'Address': '2.2.2.2'}},
+        {'DBotScore': [{'Indicator': '3.3.3.3'}], 'Other': 1}
+    ])
+    assert merged == {
+        'DBotScore': [{'Indicator': '1.1.1.1'}, {'Indicator': '2.2.2.2'}, {'Indicator': '3.3.3.3'}],
+        'IP(val.Address == obj.Address)': [{'Address': '1.1.1.1'}, {'Address': '2.2.2.2'}],
+        'Other': 1
+    }
+    assert dbot_scores == [{'Indicator': '1.1.1.1'}]
+
+
+def test_run_batch_command():
+    from CommonServerPython import run_batch_command
+
+    def ip_command(ip):
+        if ip == 'bad':
+            raise ValueError('invalid ip')
+        if ip == '2.2.2.2':
+            return '### 2.2.2.2', {'IP': {'Address': ip}}, {'raw': ip}
+        return {'Type': entryTypes['note'], 'ContentsFormat': formats['json'], 'Contents': {'ip': ip},
+                'HumanReadable': '### ' + ip, 'EntryContext': {'IP': {'Address': ip}}}
+
+    entries = run_batch_command(ip_command, ['1.1.1.1', 'bad', '2.2.2.2'], error_message='IP {} failed: {}')
+    assert entries[0]['Contents'] == [{'ip': '1.1.1.1'}, {'raw': '2.2.2.2'}]
+    assert entries[0]['HumanReadable'] == '### 1.1.1.1\n### 2.2.2.2'
+    assert entries[0]['EntryContext'] == {'IP': [{'Address': '1.1.1.1'}, {'Address': '2.2.2.2'}]}
+    assert entries[1] == {'Type': entryTypes['error'], 'ContentsFormat': formats['text'],
+                          'Contents': 'IP bad failed: invalid ip'}
+    assert len(entries) == 2
+    assert run_batch_command(ip_command, ['bad'])[0]['Type'] == entryTypes['error']
+
+
 def test_get_demisto_version(mocker):
     # verify expected server version and build returned in case Demisto class has attribute demistoVersion
     mocker.patch.object(
@@ -890,6 +978,249 @@ class TestBaseClient:
         response.status_code = 400
         assert not self.client._is_status_code_valid(response)
 
+    def test_http_request_no_retries_by_default(self, requests_mock):
+        from CommonServerPython import DemistoException
+        requests_mock.get('http://example.com/api/v2/event', status_code=503)
+        with raises(DemistoException, match="[503]"):
+            self.client._http_request('get', 'event')
+        assert requests_mock.call_count == 1
+
+    def test_http_request_retry_status(self, mocker, requests_mock):
+        import CommonServerPython
+        from CommonServerPython import BaseClient
+        sleep = mocker.patch.object(CommonServerPython.time, 'sleep')
+        requests_mock.get('http://example.com/api/v2/event', [
+            {'status_code': 503},
+            {'status_code': 429, 'headers': {'Retry-After': '7'}},
+            {'text': json.dumps(self.text)}
+        ])
+        client = BaseClient('http://example.com/api/v2/', retries=3, backoff_factor=2)
+        assert client._http_request('get', 'event') == self.text
+        assert requests_mock.call_count == 3
+        first_backoff, retry_after = [call[0][0] for call in sleep.call_args_list]
+        assert 1 <= first_backoff <= 2
+        assert retry_after == 7
+
+    def test_http_request_retries_exhausted(self, mocker, requests_mock):
+        import CommonServerPython
+        from CommonServerPython import BaseClient, DemistoException
+        sleep = mocker.patch.object(CommonServerPython.time, 'sleep')
+        requests_mock.get('http://example.com/api/v2/event', status_code=502,
+                          headers={'Retry-After': '3600'})
+        client = BaseClient('http://example.com/api/v2/', retries=2, max_backoff=10)
+        with raises(DemistoException, match="[502]"):
+            client._http_request('get', 'event')
+        assert requests_mock.call_count == 3
+        assert [call[0][0] for call in sleep.call_args_list] == [10, 10]
+
+    def test_http_request_retry_connection_error(self, mocker, requests_mock):
+        import CommonServerPython
+        from CommonServerPython import BaseClient
+        mocker.patch.object(CommonServerPython.time, 'sleep')
+        requests_mock.get('http://example.com/api/v2/event', [
+            {'exc': requests.exceptions.ConnectTimeout},
+            {'text': json.dumps(self.text)}
+        ])
+        client = BaseClient('http://example.com/api/v2/', retries=1)
+        assert client._http_request('get', 'event') == self.text
+
+    def test_http_request_no_retry_post_read_timeout(self, mocker, requests_mock):
+        import CommonServerPython
+        from CommonServerPython import BaseClient
+        mocker.patch.object(CommonServerPython.time, 'sleep')
+        requests_mock.post('http://example.com/api/v2/event', exc=requests.exceptions.ReadTimeout)
+        requests_mock.get('http://example.com/api/v2/event', [
+            {'exc': requests.exceptions.ReadTimeout},
+            {'text': json.dumps(self.text)}
+        ])
+        client = BaseClient('http://example.com/api/v2/', retries=3)
+        with raises(requests.exceptions.ReadTimeout):
+            client._http_request('post', 'event')
+        assert requests_mock.call_count == 1
+        assert client._http_request('get', 'event') == self.text
+        assert requests_mock.call_count == 3
+
+    def test_http_request_retry_logs_without_demisto(self, mocker, requests_mock):
+        import CommonServerPython
+        from CommonServerPython import BaseClient
+        mocker.patch.object(CommonServerPython.time, 'sleep')
+        debug = mocker.patch.object(demisto, 'debug')
+        log = mocker.patch.object(CommonServerPython, 'LOG')
+        close = mocker.spy(requests.Response, 'close')
+        requests_mock.get('http://example.com/api/v2/event', [
+            {'status_code': 503},
+            {'text': json.dumps(self.text)}
+        ])
+        client = BaseClient('http://example.com/api/v2/', retries=1)
+        assert client._http_request('get', 'event') == self.text
+        assert not debug.called
+        log.assert_called_once_with('Request to http://example.com/api/v2/event failed with status code 503, retrying')
+        assert close.call_count == 1
+
+    def test_http_request_no_retry_ssl_error(self, mocker, requests_mock):
+        import CommonServerPython
+        from CommonServerPython import BaseClient, DemistoException
+        mocker.patch.object(CommonServerPython.time, 'sleep')
+        requests_mock.get('http://example.com/api/v2/event', exc=requests.exceptions.SSLError)
+        client = BaseClient('http://example.com/api/v2/', retries=3)
+        with raises(DemistoException, match="SSL Certificate Verification Failed"):
+            client._http_request('get', 'event')
+        assert requests_mock.call_count == 1
+
+    def test_http_request_rate_limit(self, mocker, requests_mock):
+        from CommonServerPython import BaseClient
+        requests_mock.get('http://example.com/api/v3/event', text=json.dumps(self.text))
+        client = BaseClient('http://example.com/api/v3/', rate_limit=2, rate_limit_period=60)
+        acquire = mocker.spy(client._rate_limiter, 'acquire')
+        client._http_request('get', 'event')
+        assert acquire.call_count == 1
+        assert BaseClient('http://example.com/api/v3/', rate_limit=2, rate_limit_period=60)._rate_limiter is \
+            client._rate_limiter
+
+    def test_pool_size(self):
+        from CommonServerPython import BaseClient
+        client = BaseClient('http://example.com/api/v2/', pool_size=20)
+        adapter = client._session.get_adapter('https://example.com')
+        assert adapter._pool_maxsize == 20
+
+    ITEMS = list(range(23))
+
+    def offset_page(self, request, context):
+        offset, limit = int(request.qs['offset'][0]), int(request.qs['limit'][0])
+        return {'data': {'items': self.ITEMS[offset:offset + limit]}}
+
+    @pytest.mark.parametrize('prefetch', [False, True])
+    def test_paginate_offset(self, requests_mock, prefetch):
+        requests_mock.get('http://example.com/api/v2/items', json=self.offset_page)
+        results = self.client._paginate('get', 'items', results_key='data.items', page_size=10, prefetch=prefetch)
+        assert list(results) == self.ITEMS
+        assert requests_mock.call_count == 3
+
+    def test_paginate_limit(self, requests_mock):
+        requests_mock.get('http://example.com/api/v2/items', json=self.offset_page)
+        results = self.client._paginate('get', 'items', results_key='data.items', page_size=10, limit=15,
+                                        prefetch=True)
+        assert list(results) == self.ITEMS[:15]
+        assert requests_mock.call_count == 2
+
+    def test_paginate_lazy(self, requests_mock):
+        requests_mock.get('http://example.com/api/v2/items', json=self.offset_page)
+        results = self.client._paginate('get', 'items', results_key='data.items', page_size=10)
+        assert requests_mock.call_count == 0
+        assert next(results) == 0
+        assert requests_mock.call_count == 1
+
+    def test_paginate_page(self, requests_mock):
+        def page(request, context):
+            number = int(request.qs['page_number'][0])
+            return self.ITEMS[number * 5:number * 5 + 5]
+
+        requests_mock.get('http://example.com/api/v2/items', json=page)
+        results = self.client._paginate('get', 'items', pagination='page', page_size=5, page_param='page_number',
+                                        first_page=0, params={'q': 'all'})
+        assert list(results) == self.ITEMS
+        assert all(request.qs['q'] == ['all'] for request in requests_mock.request_history)
+
+    def test_paginate_cursor(self, requests_mock):
+        def page(request, context):
+            start = int(request.qs.get('after', [0])[0])
+            end = min(start + 10, len(self.ITEMS))
+            return {'items': self.ITEMS[start:end], 'meta': {'next': str(end) if end < len(self.ITEMS) else None}}
+
+        requests_mock.get('http://example.com/api/v2/items', json=page)
+        results = self.client._paginate('get', 'items', pagination='cursor', results_key='items',
+                                        next_key='meta.next', cursor_param='after', limit_param=None)
+        assert list(results) == self.ITEMS
+        assert requests_mock.call_count == 3
+
+    def test_paginate_next_link(self, requests_mock):
+        requests_mock.get('http://example.com/api/v2/items', json={'value': [1, 2], 'next': 'items2?token=a'})
+        requests_mock.get('http://example.com/api/v2/items2?token=a', json={'value': [3], 'next': None})
+        results = self.client._paginate('get', 'items', pagination='next_link', results_key='value',
+                                        next_key='next', prefetch=True)
+        assert list(results) == [1, 2, 3]
+
+    @pytest.mark.parametrize('next_link', ['items?page=2', '?page=2', '/api/v1/items?page=2'])
+    def test_paginate_relative_next_link(self, requests_mock, next_link):
+        from CommonServerPython import BaseClient
+        requests_mock.get('https://example.com/api/v1/items', [
+            {'json': {'value': [1, 2], 'next': next_link}},
+            {'json': {'value': [3], 'next': None}}
+        ])
+        client = BaseClient('https://example.com/api/v1')
+        results = client._paginate('get', '/items', pagination='next_link', results_key='value', next_key='next')
+        assert list(results) == [1, 2, 3]
+        assert requests_mock.request_history[1].url == 'https://example.com/api/v1/items?page=2'
+
+    def test_paginate_link_header(self, requests_mock):
+        requests_mock.get('http://example.com/api/v2/items', json=[1, 2],
+                          headers={'Link': '<http://example.com/api/v2/items?page=2>; rel="next"'})
+        requests_mock.get('http://example.com/api/v2/items?page=2', json=[3])
+        results = self.client._paginate('get', 'items', pagination='link_header', limit_param=None)
+        assert list(results) == [1, 2, 3]
+
+    def test_paginate_error_in_prefetch(self, requests_mock):
+        from CommonServerPython import DemistoException
+        requests_mock.get('http://example.com/api/v2/items', [{'json': [1, 2]}, {'status_code': 500}])
+        results = self.client._paginate('get', 'items', page_size=2, prefetch=True)
+        assert next(results) == 1
+        assert next(results) == 2
+        with raises(DemistoException, match="[500]"):
+            next(results)
+
+    def test_paginate_unsupported(self):
+        with raises(ValueError, match="Unsupported pagination style"):
+            next(self.client._paginate('get', 'items', pagination='bookmark'))
+
+
+def test_token_bucket(mocker):
+    import CommonServerPython
+    from CommonServerPython import TokenBucket
+    now = [1000.0]
+    mocker.patch.object(CommonServerPython.time, 'time', side_effect=lambda: now[0])
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    mocker.patch.object(CommonServerPython.time, 'sleep', side_effect=sleep)
+    bucket = TokenBucket(2, 10)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 5
+    now[0] += 20
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 5
+
+
+def test_token_bucket_fractional_rate(mocker):
+    import CommonServerPython
+    from CommonServerPython import TokenBucket
+    now = [1000.0]
+    mocker.patch.object(CommonServerPython.time, 'time', side_effect=lambda: now[0])
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    mocker.patch.object(CommonServerPython.time, 'sleep', side_effect=sleep)
+    bucket = TokenBucket(0.5)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 2
+    assert bucket.acquire() == 2
+    now[0] += 10
+    # the bucket holds a single call, so a burst is not accumulated
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 2
+
+
+def test_parse_retry_after():
+    from CommonServerPython import parse_retry_after
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('not a date') is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert 0 < parse_retry_after(time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 100))) <= 100
+
 
 def test_parse_date_string():
     # test unconverted data remains: Z
@@ -1,7 +1,13 @@
 # type: ignore
+import base64
+import hashlib
+import zlib
+
 import dateutil.parser
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
 
 from CommonServerPython import *
 
@@ -14,17 +20,90 @@ INCIDENT_TEXT_FIELD = 'incident_text_for_tfidf'
 MIN_TEXT_LENGTH = int(demisto.args()['minTextLength'])
 MAX_CANDIDATES_IN_LIST = int(demisto.args()['maxResults'])
 TIME_FIELD = demisto.args()['timeField']
+INDEX_LIST_NAME = demisto.args().get('indexListName')
+
+# the words are hashed, so the terms counts of incidents can be stored and combined without a shared vocabulary
+N_FEATURES = 2 ** 20
+vectorizer = HashingVectorizer(n_features=N_FEATURES, stop_words='english', alternate_sign=False, norm=None)
 
 
 def parse_datetime(datetime_str):
     return dateutil.parser.parse(datetime_str)
 
 
-def get_similar_texts(text, other_texts):
-    vect = TfidfVectorizer(min_df=1, stop_words='english')
-    tfidf = vect.fit_transform([text] + other_texts)
-    similarity_vector = linear_kernel(tfidf[0:1], tfidf).flatten()
-    return similarity_vector[1:]
+def get_text_hash(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def load_index(list_name):
+    """
+    Loads the terms counts of the incidents that were already tokenized, by incident id.
+    """
+    if not list_name:
+        return {}
+
+    res = demisto.executeCommand('getList', {'listName': list_name})
+    if isError(res[0]) or not res[0]['Contents']:
+        return {}
+
+    try:
+        index = json.loads(zlib.decompress(base64.b64decode(res[0]['Contents'])))
+    except Exception:
+        demisto.debug('Failed to load the terms counts index from list {}'.format(list_name))
+        return {}
+
+    if index.get('nFeatures') != N_FEATURES:
+        return {}
+    return index['incidents']
+
+
+def save_index(list_name, index):
+    index_data = json.dumps({'nFeatures': N_FEATURES, 'incidents': index})
+    res = demisto.executeCommand('createList', {'listName': list_name,
+                                                'listData': base64.b64encode(zlib.compress(index_data))})
+    if isError(res[0]):
+        demisto.debug('Failed to save the terms counts index to list {}: {}'.format(list_name, res[0]['Contents']))
+
+
+def get_terms_counts(incident_ids, texts, index):
+    """
+    Returns the terms counts matrix of the texts, a row per text. Only texts of incidents that are not in the index
+    (or whose text changed) are tokenized, the index is updated with them.
+    """
+    new_positions = []
+    for i, (incident_id, text) in enumerate(zip(incident_ids, texts)):
+        indexed = index.get(incident_id)
+        if not indexed or indexed['textHash'] != get_text_hash(text):
+            new_positions.append(i)
+
+    if new_positions:
+        new_counts = vectorizer.transform([texts[i] for i in new_positions])
+        for row, i in enumerate(new_positions):
+            counts = new_counts[row]
+            index[incident_ids[i]] = {'textHash': get_text_hash(texts[i]),
+                                      'indices': counts.indices.tolist(),
+                                      'counts': counts.data.astype(int).tolist()}
+
+    rows = []
+    for incident_id in incident_ids:
+        indexed = index[incident_id]
+        rows.append(csr_matrix((indexed['counts'], indexed['indices'], [0, len(indexed['indices'])]),
+                               shape=(1, N_FEATURES), dtype=np.float64))
+    return vstack(rows, format='csr'), len(new_positions)
+
+
+def get_similar_texts(terms_counts):
+    """
+    Returns the TF-IDF cosine similarity of the first row of the terms counts to the other rows, the document
+    frequencies are of the given texts (the same as TfidfVectorizer(min_df=1) fitted on the texts).
+    """
+    documents_count = terms_counts.shape[0]
+    document_frequency = np.bincount(terms_counts.indices, minlength=N_FEATURES)
+    idf = np.log(float(1 + documents_count) / (1 + document_frequency[terms_counts.indices])) + 1
+    tfidf = csr_matrix((terms_counts.data * idf, terms_counts.indices, terms_counts.indptr),
+                       shape=terms_counts.shape)
+    tfidf = normalize(tfidf)
+    return tfidf[1:].dot(tfidf[0].T).toarray().ravel()
 
 
 def get_texts_from_incident(incident, text_fields):
@@ -93,49 +172,62 @@ def incident_to_record(incident):
             }
 
 
-incident = demisto.incidents()[0]
-incident_text = get_texts_from_incident(incident, TEXT_FIELDS)
-if len(incident_text) < MIN_TEXT_LENGTH:
-    demisto.results("The text is too short to compare - minimum of %d chars required" % MIN_TEXT_LENGTH)
-    sys.exit(0)
-
-# get initial candidates list
-candidates = get_incidents_by_time(incident[TIME_FIELD], incident['type'], incident['id'], HOURS_TIME_FRAME,
-                                   IGNORE_CLOSED, INCIDENT_QUERY_SIZE)
-
-# filter candidates with minimum length constraint
-map(lambda x: add_text_to_incident(x, TEXT_FIELDS), candidates)
-candidates = [x for x in candidates if len(x.get(INCIDENT_TEXT_FIELD, 0)) >= MIN_TEXT_LENGTH]
-
-# compare candidates to the orginial incident using TF-IDF
-similarity_vector = get_similar_texts(incident_text, map(lambda x: x[INCIDENT_TEXT_FIELD], candidates))
-similar_incidents = []
-for (i, similarity) in enumerate(similarity_vector):
-    candidates[i]['similarity'] = similarity
-    if similarity >= THRESHOLD:
-        similar_incidents.append(candidates[i])
-
-# update context
-if len(similar_incidents or []) > 0:
-    similar_incidents_rows = map(incident_to_record, similar_incidents)
-    similar_incidents_rows = sorted(similar_incidents_rows, key=lambda x: x['Time'])
-    context = {
-        'similarIncidentList': similar_incidents_rows[:MAX_CANDIDATES_IN_LIST],
-        'similarIncident': similar_incidents_rows[0],
-        'isSimilarIncidentFound': True
-    }
-    markdown_result = tableToMarkdown("Similar incidents",
-                                      similar_incidents_rows,
-                                      headers=['id', 'name', 'closedTime', 'Time', 'similarity'])
-    demisto.results({'ContentsFormat': formats['markdown'],
-                     'Type': entryTypes['note'],
-                     'Contents': markdown_result,
-                     'EntryContext': context})
-else:
-    context = {
-        'isSimilarIncidentFound': False
-    }
-    demisto.results({'ContentsFormat': formats['markdown'],
-                     'Type': entryTypes['note'],
-                     'Contents': 'No similar incidents has been found',
-                     'EntryContext': context})
+def main():
+    incident = demisto.incidents()[0]
+    incident_text = get_texts_from_incident(incident, TEXT_FIELDS)
+    if len(incident_text) < MIN_TEXT_LENGTH:
+        demisto.results("The text is too short to compare - minimum of %d chars required" % MIN_TEXT_LENGTH)
+        return
+
+    # get initial candidates list
+    candidates = get_incidents_by_time(incident[TIME_FIELD], incident['type'], incident['id'], HOURS_TIME_FRAME,
+                                       IGNORE_CLOSED, INCIDENT_QUERY_SIZE)
+
+    # filter candidates with minimum length constraint
+    map(lambda x: add_text_to_incident(x, TEXT_FIELDS), candidates)
+    candidates = [x for x in candidates if len(x.get(INCIDENT_TEXT_FIELD, 0)) >= MIN_TEXT_LENGTH]
+
+    # compare candidates to the orginial incident using TF-IDF, the stored terms counts of candidates are reused
+    index = load_index(INDEX_LIST_NAME)
+    incident_ids = [incident['id']] + [x['id'] for x in candidates]
+    terms_counts, new_count = get_terms_counts(incident_ids, [incident_text] + [x[INCIDENT_TEXT_FIELD] for x in candidates],
+                                               index)
+    similarity_vector = get_similar_texts(terms_counts)
+    if INDEX_LIST_NAME and (new_count or len(index) > len(incident_ids)):
+        # keep only the incidents of the current time frame, the time frames of the next incidents mostly overlap it
+        save_index(INDEX_LIST_NAME, {incident_id: index[incident_id] for incident_id in incident_ids})
+
+    similar_incidents = []
+    for (i, similarity) in enumerate(similarity_vector):
+        candidates[i]['similarity'] = similarity
+        if similarity >= THRESHOLD:
+            similar_incidents.append(candidates[i])
+
+    # update context
+    if len(similar_incidents or []) > 0:
+        similar_incidents_rows = map(incident_to_record, similar_incidents)
+        similar_incidents_rows = sorted(similar_incidents_rows, key=lambda x: x['Time'])
+        context = {
+            'similarIncidentList': similar_incidents_rows[:MAX_CANDIDATES_IN_LIST],
+            'similarIncident': similar_incidents_rows[0],
+            'isSimilarIncidentFound': True
+        }
+        markdown_result = tableToMarkdown("Similar incidents",
+                                          similar_incidents_rows,
+                                          headers=['id', 'name', 'closedTime', 'Time', 'similarity'])
+        demisto.results({'ContentsFormat': formats['markdown'],
+                         'Type': entryTypes['note'],
+                         'Contents': markdown_result,
+                         'EntryContext': context})
+    else:
+        context = {
+            'isSimilarIncidentFound': False
+        }
+        demisto.results({'ContentsFormat': formats['markdown'],
+                         'Type': entryTypes['note'],
+                         'Contents': 'No similar incidents has been found',
+                         'EntryContext': context})
+
+
+if __name__ in ['__builtin__', '__main__']:
+    main()
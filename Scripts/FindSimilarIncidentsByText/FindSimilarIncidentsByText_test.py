@@ -0,0 +1,83 @@
+import demistomock
+
+
+def get_args():
+    return {
+        'textFields': 'name,details',
+        'threshold': '0.95',
+        'maximumNumberOfIncidents': '1000',
+        'timeFrameHours': '72',
+        'ignoreClosedIncidents': 'no',
+        'timeField': 'occurred',
+        'maxResults': '10',
+        'minTextLength': '50',
+        'indexListName': 'SimilarIncidentsIndex'
+    }
+
+
+demistomock.args = get_args
+
+import FindSimilarIncidentsByText  # noqa
+from FindSimilarIncidentsByText import get_terms_counts, get_similar_texts, load_index, save_index  # noqa
+import numpy as np  # noqa
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa
+from sklearn.metrics.pairwise import linear_kernel  # noqa
+
+INCIDENT_IDS = ['1', '2', '3', '4', '5']
+TEXTS = [
+    'Phishing email from attacker@evil.com with a malicious invoice attachment',
+    'Phishing email from attacker@evil.com with a malicious invoice attachment',
+    'Another phishing email with a malicious attachment, the invoice is attached',
+    'Malware detected on the endpoint of the finance department',
+    'Suspicious login to the finance department mailbox from a new country'
+]
+
+
+def test_get_similar_texts():
+    terms_counts, new_count = get_terms_counts(INCIDENT_IDS, TEXTS, {})
+    assert new_count == len(TEXTS)
+
+    tfidf = TfidfVectorizer(min_df=1, stop_words='english').fit_transform(TEXTS)
+    expected = linear_kernel(tfidf[0], tfidf[1:]).ravel()
+    similarities = get_similar_texts(terms_counts)
+    assert np.allclose(similarities, expected)
+    assert np.isclose(similarities[0], 1)
+
+
+def test_index_round_trip(mocker):
+    lists = {}
+
+    def execute_command(command, args):
+        if command == 'createList':
+            lists[args['listName']] = args['listData']
+            return [{'Type': 1, 'Contents': 'Done'}]
+        return [{'Type': 1, 'Contents': lists.get(args['listName'], '')}]
+
+    mocker.patch.object(demistomock, 'executeCommand', side_effect=execute_command)
+    assert load_index('SimilarIncidentsIndex') == {}
+
+    index = {}
+    terms_counts, _ = get_terms_counts(INCIDENT_IDS, TEXTS, index)
+    save_index('SimilarIncidentsIndex', index)
+    loaded_index = load_index('SimilarIncidentsIndex')
+    assert loaded_index == index
+    old_text_hash = loaded_index['5']['textHash']
+
+    # the stored terms counts are used as they are, only a changed text is tokenized again
+    transform = mocker.spy(FindSimilarIncidentsByText.vectorizer, 'transform')
+    changed_texts = TEXTS[:4] + ['Malware detected on the endpoint of the finance department']
+    loaded_terms_counts, new_count = get_terms_counts(INCIDENT_IDS, changed_texts, loaded_index)
+    assert new_count == 1
+    transform.assert_called_once_with([changed_texts[4]])
+    assert (loaded_terms_counts[:4] != terms_counts[:4]).nnz == 0
+    assert (loaded_terms_counts[4] != loaded_terms_counts[3]).nnz == 0
+    assert loaded_index['5']['textHash'] != old_text_hash
+
+
+def test_load_index_of_other_features_count(mocker):
+    import base64
+    import json
+    import zlib
+    index_data = base64.b64encode(zlib.compress(json.dumps({'nFeatures': 1024, 'incidents': {'1': {}}})))
+    mocker.patch.object(demistomock, 'executeCommand', return_value=[{'Type': 1, 'Contents': index_data}])
+    assert load_index('SimilarIncidentsIndex') == {}
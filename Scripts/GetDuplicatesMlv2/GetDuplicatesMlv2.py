@@ -3,6 +3,7 @@ from CommonServerPython import *
 import collections
 import re
 import dateutil.parser
+import dateutil.tz
 import pickle
 import ipaddress
 import tldextract
@@ -10,6 +11,7 @@ import editdistance
 import zlib
 from rfc822 import parseaddr  # type:ignore
 from urlparse import urlparse
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from datetime import datetime, timedelta
@@ -45,6 +47,9 @@ EMAIL_LABELS_MAP = {}  # type: dict
 FEATURES = []  # type: list
 INDICATORS_FOR_JACCARD = []  # type: list
 
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=dateutil.tz.tzutc())
+
 #############################################################################################
 
 
@@ -52,11 +57,16 @@ class Utils():
     email_pattern = re.compile(
         r"""[a-zA-Z0-9.!#$%&'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*""")  # noqa: E501
 
+    tld_extract = None
+
     @staticmethod
     def extract_domain_from_url(url):
-        extract = tldextract.TLDExtract(cache_file='/tmp/.tld_set')
-        domain = extract(url).domain.lower()
-        suffix = extract(url).suffix.lower()
+        # the suffixes list is loaded once
+        if Utils.tld_extract is None:
+            Utils.tld_extract = tldextract.TLDExtract(cache_file='/tmp/.tld_set')
+        extract_result = Utils.tld_extract(url)
+        domain = extract_result.domain.lower()
+        suffix = extract_result.suffix.lower()
         if len(domain) > 0 and len(suffix) > 0:
             return ".".join([domain, suffix])
 
@@ -83,11 +93,7 @@ class Utils():
     @staticmethod
     def ip_address_in_network(ip, net):
         try:
-            ipaddr = int(''.join(['%02x' % int(x) for x in ip.split('.')]), 16)
-            netstr, bits = net.split('/')
-            netaddr = int(''.join(['%02x' % int(x) for x in netstr.split('.')]), 16)
-            mask = (0xffffffff << (32 - int(bits))) & 0xffffffff
-            return (ipaddr & mask) == (netaddr & mask)
+            return ipaddress.IPv4Address(unicode(ip)) in ipaddress.IPv4Network(unicode(net), strict=False)
         except Exception:
             return None
 
@@ -202,109 +208,219 @@ class Utils():
         return intersection_cardinality / float(union_cardinality)
 
     @staticmethod
-    def canonize_ip_to_netrok(ip_address, mast_bits):
+    def get_hashable_set(x):
+        if x is None:
+            return set()
+        if isinstance(x, dict):
+            x = Utils.get_hashable_from_dict(x)
+        return set(v for v in x if isinstance(v, collections.Hashable))
+
+    @staticmethod
+    def jaccard_similarity_vector(x, others):
+        """
+        Returns the jaccard similarity of the set x to each of the sets in others (the same as jaccard_similarity),
+        a None in others is an empty set
+        """
+        sizes = np.array([len(other) if other is not None else 0 for other in others], dtype=float)
+        rows = np.repeat(np.arange(len(others)), sizes.astype(int))
+        in_x = np.fromiter((v in x for other in others if other is not None for v in other), dtype=float,
+                           count=len(rows))
+        intersection_cardinality = np.bincount(rows, weights=in_x, minlength=len(others))
+        union_cardinality = len(x) + sizes - intersection_cardinality
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = intersection_cardinality / union_cardinality
+        return np.where((sizes > 0) & (len(x) > 0), similarity, 0)
+
+    @staticmethod
+    def parse_datetime(date):
         try:
-            return str(ipaddress.IPv4Network(unicode("%s/%d" % (ip_address, mast_bits)), strict=False).broadcast_address)
+            if 'datetime' in str(type(date)):
+                return date
+            return dateutil.parser.parse(date)
         except Exception:
-            return ip_address
+            return None
 
+    @staticmethod
+    def get_datetime_microseconds(date):
+        """
+        Returns whether the datetime is timezone aware and its microseconds since the epoch, None if it is not a
+        datetime. The difference of two datetimes in microseconds is exact, and is the same as subtracting them
+        """
+        try:
+            is_aware = date.tzinfo is not None and date.utcoffset() is not None
+            delta = date - (EPOCH_UTC if is_aware else EPOCH)
+            return is_aware, (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds
+        except Exception:
+            return None
+
+    @staticmethod
+    def get_ip_network(ip_address, mask_bits):
+        """
+        Returns the network of the ip as an int, ip addresses of the same network get the same int
+        """
+        try:
+            return int(ipaddress.IPv4Network(unicode("%s/%d" % (ip_address, mask_bits)), strict=False).network_address)
+        except Exception:
+            return ip_address
 
-class IncidentFeatures:
-    def __init__(self, incident1, incident2):
-
-        self.incident1 = incident1
-        self.incident2 = incident2
-
-        self.indicators1 = incident1['indicators']
-        self.indicators2 = incident2['indicators']
-
-        self.labels_map1 = Utils.get_incident_labels_map(self.incident1['labels'])
-        self.labels_map2 = Utils.get_incident_labels_map(self.incident2['labels'])
-
-        domains1 = Utils.get_unique_list(
-            self.indicators1.get('Domain', []) + Utils.get_domains(self.indicators1, self.labels_map2))
-        domains2 = Utils.get_unique_list(
-            self.indicators2.get('Domain', []) + Utils.get_domains(self.indicators2, self.labels_map2))
-
-        if len(domains1) > 0:
-            self.indicators1['Domain'] = domains1
-        if len(domains2) > 0:
-            self.indicators2['Domain'] = domains2
-
-        if IP_MASK_BITS_FOR_COMPARISON < 32 and IP_MASK_BITS_FOR_COMPARISON > 0:
-            if 'IP' in self.indicators1:
-                self.indicators1['IP'] = map(lambda ip: Utils.canonize_ip_to_netrok(
-                    ip, IP_MASK_BITS_FOR_COMPARISON), self.indicators1['IP'])
-            if 'IP' in self.indicators2:
-                self.indicators2['IP'] = map(lambda ip: Utils.canonize_ip_to_netrok(
-                    ip, IP_MASK_BITS_FOR_COMPARISON), self.indicators2['IP'])
-
-    def get_email_labels_features(self):
-        def add_label_ld_feature(label_name):
-            if label_name in labels1 and label_name in labels2:
-                features[label_name] = editdistance.eval(labels1[label_name], labels2[label_name])
-
-        def add_label_text_feature(label_name):
-            if label_name in labels1 and label_name in labels2:
-                features[label_name] = Utils.jaccard_similarity(
-                    labels1[label_name].split(), labels2[label_name].split())
-
-        features = {}
-        labels1 = self.labels_map1
-        labels2 = self.labels_map2
-
-        if EMAIL_SENDER_ADDRESS_LABEL in labels1 and EMAIL_SENDER_ADDRESS_LABEL in labels2:
-            sender1 = Utils.get_email_address(labels1[EMAIL_SENDER_ADDRESS_LABEL])
-            sender2 = Utils.get_email_address(labels2[EMAIL_SENDER_ADDRESS_LABEL])
-            if sender1 and sender2:
-                features[EMAIL_SENDER_ADDRESS_LABEL] = editdistance.eval(sender1, sender2)
-
-        if EMAIL_DATE_LABEL in labels1 and EMAIL_DATE_LABEL in labels2:
-            time_diff = Utils.get_time_diff_seconds(labels1[EMAIL_DATE_LABEL],
-                                                    labels2[EMAIL_DATE_LABEL])
-            if time_diff is not None:
-                features[EMAIL_DATE_LABEL] = time_diff
-
-        add_label_ld_feature(EMAIL_SUBJECT_LABEL)
-        add_label_ld_feature(EMAIL_ATTACHMENT_LABEL)
-        add_label_text_feature(EMAIL_TEXT_LABEL)
-        add_label_text_feature(EMAIL_HTML_LABEL)
-
-        return features
-
-    def get_incident_features(self):
-        features = {}
-        incident_time_diff = Utils.get_time_diff_seconds(self.incident1[TIME_FIELD], self.incident2[TIME_FIELD])
-        features['incident_time_diff'] = incident_time_diff
-        features['same_type'] = self.incident1['type'] == self.incident2['type']
-        features['same_severity'] = self.incident1['severity'] == self.incident2['severity']
-        features['custom_fields_jaccard'] = Utils.jaccard_similarity(self.incident1.get('CustomFields', []),
-                                                                     self.incident2.get('CustomFields', []))
-        features['labels_jaccard'] = Utils.jaccard_similarity(
-            [(k, v) for (k, v) in self.labels_map1.items() if k not in LABELS_BLACKLIST],
-            [(k, v) for (k, v) in self.labels_map2.items() if k not in LABELS_BLACKLIST]
-        )
-
-        if INSTANCE_LABEL in self.labels_map1 and INSTANCE_LABEL in self.labels_map2:
-            features['same_instance'] = self.labels_map1[INSTANCE_LABEL] == self.labels_map2[INSTANCE_LABEL]
 
+class NormalizedIncident:
+    """
+    The values of an incident that the features are calculated from, calculated once per incident
+    """
+    def __init__(self, incident):
+        self.id = incident['id']
+        self.type = incident['type']
+        self.severity = incident['severity']
+        self.custom_fields = Utils.get_hashable_set(incident.get('CustomFields', []))
+
+        self.labels_map = Utils.get_incident_labels_map(incident['labels'])
+        self.labels = Utils.get_hashable_set(
+            [(k, v) for (k, v) in self.labels_map.items() if k not in LABELS_BLACKLIST])
+        self.instance = self.labels_map.get(INSTANCE_LABEL)
+
+        indicators = dict(incident['indicators'])
+        domains = Utils.get_unique_list(indicators.get('Domain', []) + Utils.get_domains(indicators, self.labels_map))
+        if len(domains) > 0:
+            indicators['Domain'] = domains
+        if 0 < IP_MASK_BITS_FOR_COMPARISON < 32 and 'IP' in indicators:
+            indicators['IP'] = [Utils.get_ip_network(ip, IP_MASK_BITS_FOR_COMPARISON) for ip in indicators['IP']]
+        self.indicators = {indicator_type: Utils.get_hashable_set(values)
+                           for indicator_type, values in indicators.items()}
+
+        # email labels
+        self.sender_address = None
+        if EMAIL_SENDER_ADDRESS_LABEL in self.labels_map:
+            self.sender_address = Utils.get_email_address(self.labels_map[EMAIL_SENDER_ADDRESS_LABEL])
+        self.email_words = {label: Utils.get_hashable_set(self.labels_map[label].split())
+                            for label in (EMAIL_TEXT_LABEL, EMAIL_HTML_LABEL) if label in self.labels_map}
+
+        # the dates are parsed on first use, only if the compared incident has the date
+        self.dates = {'time': incident[TIME_FIELD], EMAIL_DATE_LABEL: self.labels_map.get(EMAIL_DATE_LABEL)}
+        self.parsed_dates = {}  # type: dict
+
+    def get_date(self, date_name):
+        if date_name not in self.parsed_dates:
+            date = self.dates[date_name]
+            self.parsed_dates[date_name] = Utils.parse_datetime(date) if date is not None else None
+        return self.parsed_dates[date_name]
+
+
+class CandidatesFeatures:
+    """
+    Calculates the features of an incident and each of its candidates, a column per feature. The values of the
+    candidates are taken once into the columns of a frame, and each feature is calculated over the whole columns
+    """
+    def __init__(self, incident, candidates):
+        self.incident = incident
+        self.normalized_candidates = candidates
+        columns = {
+            'type': [c.type for c in candidates],
+            'severity': [c.severity for c in candidates],
+            'instance': [c.instance for c in candidates],
+            'sender_address': [c.sender_address for c in candidates],
+            'custom_fields': [c.custom_fields for c in candidates],
+            'labels': [c.labels for c in candidates],
+        }
+        for label_name in (EMAIL_SUBJECT_LABEL, EMAIL_ATTACHMENT_LABEL):
+            columns[label_name] = [c.labels_map.get(label_name) for c in candidates]
+        for label_name in (EMAIL_TEXT_LABEL, EMAIL_HTML_LABEL):
+            columns[label_name] = [c.email_words.get(label_name) for c in candidates]
         for indicator_type in INDICATORS_FOR_JACCARD:
-            if indicator_type in self.indicators1 and indicator_type in self.indicators2:
-                features['indicator_%s_jaccard' % indicator_type] = Utils.jaccard_similarity(
-                    self.indicators1[indicator_type],
-                    self.indicators2[indicator_type])
+            columns['indicator_' + indicator_type] = [c.indicators.get(indicator_type) for c in candidates]
+        self.candidates = pd.DataFrame(columns, dtype=object)
+        self.columns = {}  # type: dict
+
+    def add_column(self, feature, has_value, values):
+        # the feature is missing for candidates without a value, and is not added if all are missing
+        if has_value.any():
+            self.columns[feature] = np.where(has_value, values, None).tolist()
+
+    def add_label_ld_feature(self, label_name, has_value, incident_value, candidates_values):
+        distances = np.zeros(len(has_value), dtype=int)
+        if has_value.any():
+            # the distance is calculated once for each distinct value of the candidates
+            codes, unique_values = pd.factorize(candidates_values[has_value])
+            unique_distances = np.array([editdistance.eval(incident_value, value) for value in unique_values],
+                                        dtype=int)
+            distances[has_value] = unique_distances[codes]
+        self.add_column(label_name, has_value, distances)
+
+    def get_time_diffs(self, date_name):
+        """
+        Returns which candidates have a time diff from the incident, and the time diffs in seconds
+        """
+        incident_time = Utils.get_datetime_microseconds(self.incident.get_date(date_name))
+        if incident_time is None:
+            return np.zeros(len(self.candidates), dtype=bool), np.zeros(len(self.candidates))
+
+        is_aware, incident_microseconds = incident_time
+        candidates_times = [Utils.get_datetime_microseconds(c.get_date(date_name)) for c in self.normalized_candidates]
+        # naive and aware datetimes cannot be compared
+        has_value = np.array([time is not None and time[0] == is_aware for time in candidates_times], dtype=bool)
+        microseconds = np.array([time[1] if has else 0 for time, has in zip(candidates_times, has_value)],
+                                dtype=np.int64)
+        return has_value, np.abs(microseconds - incident_microseconds) / 1e6
+
+    def add_jaccard_feature(self, feature, has_value, incident_set, candidates_sets):
+        similarity = Utils.jaccard_similarity_vector(incident_set, candidates_sets)
+        self.add_column(feature, has_value, similarity)
+
+    def add_email_labels_features(self):
+        incident = self.incident
+        candidates = self.candidates
+
+        has_senders = candidates['sender_address'].astype(bool).values & bool(incident.sender_address)
+        self.add_label_ld_feature(EMAIL_SENDER_ADDRESS_LABEL, has_senders, incident.sender_address,
+                                  candidates['sender_address'])
+
+        has_time_diffs, time_diffs = self.get_time_diffs(EMAIL_DATE_LABEL)
+        self.add_column(EMAIL_DATE_LABEL, has_time_diffs, time_diffs)
+
+        for label_name in (EMAIL_SUBJECT_LABEL, EMAIL_ATTACHMENT_LABEL):
+            has_labels = candidates[label_name].notnull().values & (label_name in incident.labels_map)
+            self.add_label_ld_feature(label_name, has_labels, incident.labels_map.get(label_name),
+                                      candidates[label_name])
+        for label_name in (EMAIL_TEXT_LABEL, EMAIL_HTML_LABEL):
+            if label_name in incident.email_words:
+                self.add_jaccard_feature(label_name, candidates[label_name].notnull().values,
+                                         incident.email_words[label_name], candidates[label_name].values)
+
+    def add_incident_features(self):
+        incident = self.incident
+        candidates = self.candidates
+        all_candidates = np.ones(len(candidates), dtype=bool)
+
+        has_time_diffs, time_diffs = self.get_time_diffs('time')
+        self.columns['incident_time_diff'] = np.where(has_time_diffs, time_diffs, None).tolist()
+        self.columns['same_type'] = (candidates['type'] == incident.type).values
+        self.columns['same_severity'] = (candidates['severity'] == incident.severity).values
+        self.add_jaccard_feature('custom_fields_jaccard', all_candidates, incident.custom_fields,
+                                 candidates['custom_fields'].values)
+        self.add_jaccard_feature('labels_jaccard', all_candidates, incident.labels, candidates['labels'].values)
+
+        if INSTANCE_LABEL in incident.labels_map:
+            self.add_column('same_instance', candidates['instance'].notnull().values,
+                            (candidates['instance'] == incident.instance).values)
 
-        return features
+        for indicator_type in INDICATORS_FOR_JACCARD:
+            if indicator_type in incident.indicators:
+                indicators = candidates['indicator_' + indicator_type]
+                self.add_jaccard_feature('indicator_%s_jaccard' % indicator_type, indicators.notnull().values,
+                                         incident.indicators[indicator_type], indicators.values)
 
     def calculate_features(self, expected_features=FEATURES):
-        features = {}  # type: dict
-        features.update(self.get_incident_features())
-        features.update(self.get_email_labels_features())
+        self.add_incident_features()
+        self.add_email_labels_features()
+
+        for key in set(expected_features).difference(self.columns.keys()):
+            self.columns[key] = [None] * len(self.candidates)
+
+        return pd.DataFrame(self.columns, columns=sorted(self.columns.keys()))
 
-        for key in set(expected_features).difference(set(features.keys())):
-            features[key] = None
 
-        return features
+def get_candidates_features(incident, candidates):
+    return CandidatesFeatures(NormalizedIncident(incident), map(NormalizedIncident, candidates)).calculate_features()
 
 
 ##################################################################################
@@ -372,7 +488,8 @@ def get_my_duplicate_incidents_features(incident_type, days_to_fetch_duplicates,
         return None
     incidents = enrich_incidents_by_indicators(incident_list, max_indicators)
 
-    related_features = {}  # type: dict
+    related_pairs = {}  # type: dict
+    pairs_keys_by_incident = collections.defaultdict(list)  # type: dict
     for incident in incidents.values():
         related_incidents = incident.get('linkedIncidents')
         if related_incidents:
@@ -381,11 +498,28 @@ def get_my_duplicate_incidents_features(incident_type, days_to_fetch_duplicates,
                     related_incidents += list(set(incidents[related_incident_id]['linkedIncidents']).difference(related_incidents))  # noqa E501 line too long
             for related_incident_id in related_incidents:
                 key = get_unique_key_for_pair(incident['id'], related_incident_id)
-                if incident['id'] == related_incident_id or key in related_features or related_incident_id not in incidents:
+                if incident['id'] == related_incident_id or key in related_pairs or related_incident_id not in incidents:
                     continue
-                related_features[key] = IncidentFeatures(incident, incidents[related_incident_id]).calculate_features()
-                related_features[key][DUPLICATE_COL] = 1
-    return pd.DataFrame.from_dict(related_features.values())
+                related_pairs[key] = related_incident_id
+                pairs_keys_by_incident[incident['id']].append(key)
+
+    if len(related_pairs) == 0:
+        return pd.DataFrame()
+
+    # the features of the related incidents of each incident are calculated together
+    normalized_incidents = {}  # type: dict
+    for incident_id in set(pairs_keys_by_incident.keys()).union(related_pairs.values()):
+        normalized_incidents[incident_id] = NormalizedIncident(incidents[incident_id])
+    incidents_features = []
+    for incident_id, keys in pairs_keys_by_incident.items():
+        features = CandidatesFeatures(normalized_incidents[incident_id],
+                                      [normalized_incidents[related_pairs[key]] for key in keys]).calculate_features()
+        features.index = keys
+        incidents_features.append(features)
+
+    related_features = pd.concat(incidents_features).reindex(related_pairs.keys()).reset_index(drop=True)
+    related_features[DUPLICATE_COL] = 1
+    return related_features[sorted(related_features.columns)]
 
 
 def filter_features(features, selected_features=FEATURES):
@@ -507,16 +641,12 @@ def main():
                                                                            MAX_INCIDENTS, TIME_DIFF_HOURS), MAX_INDICATORS)
     candidates.pop(incident['id'], None)
 
-    candidates_features_list = []
-    for candidate in candidates.values():
-        feature_dict = IncidentFeatures(incident, candidate).calculate_features()
-        feature_dict['id'] = candidate['id']
-        candidates_features_list.append(feature_dict)
-    if len(candidates_features_list) == 0:
+    if len(candidates) == 0:
         demisto.results('Did not find any duplicate incidents candidates')
         return
 
-    candidates_features = pd.DataFrame.from_dict(candidates_features_list)
+    candidates_features = get_candidates_features(incident, candidates.values())
+    candidates_features['id'] = [candidate['id'] for candidate in candidates.values()]
     candidates_features = candidates_features.dropna(axis=0, thresh=(len(use_features) * (1 - CANDIDATES_FEATURES_NA_RATIO)))
     candidates_features_x = filter_features(candidates_features, use_features)
     candidates_features_x = union_complete_missing_values(X, candidates_features_x, ['features', 'candidates']).loc['candidates']
@@ -1,5 +1,5 @@
 import demistomock as demisto
-from GetDuplicatesMlv2 import main, Utils
+from GetDuplicatesMlv2 import main, Utils, get_candidates_features
 from CommonServerPython import entryTypes
 
 
@@ -42,3 +42,58 @@ def test_extract_domain_from_url():
     assert res == 'google.com'
     res = Utils.extract_domain_from_url("https://www.google.co.il")  # disable-secrets-detection
     assert res == 'google.co.il'
+
+
+def test_jaccard_similarity_vector():
+    others = [{'a', 'b'}, set(), {'c'}, {'a', 'b', 'c', 'd'}]
+    res = Utils.jaccard_similarity_vector({'a', 'b'}, others)
+    assert res.tolist() == [Utils.jaccard_similarity(['a', 'b'], other) for other in others] == [1, 0, 0, 0.5]
+    assert Utils.jaccard_similarity_vector(set(), others).tolist() == [0, 0, 0, 0]
+    assert Utils.jaccard_similarity_vector({'a', 'b'}, [None, {'a'}]).tolist() == [0, 0.5]
+
+
+def test_get_candidates_features(mocker):
+    import GetDuplicatesMlv2
+    mocker.patch.object(GetDuplicatesMlv2, 'INDICATORS_FOR_JACCARD', ['IP', 'URL'])
+
+    def incident(incident_id, subject, indicators, created):
+        return {'id': incident_id, 'type': 'Phishing', 'severity': 1, 'created': created, 'CustomFields': {'a': 1},
+                'labels': [{'type': 'Email/headers/Subject', 'value': subject}], 'indicators': indicators}
+
+    features = get_candidates_features(
+        incident('1', 'hello', {'IP': ['1.1.1.1', '2.2.2.2']}, '2019-12-01T10:00:00Z'),
+        [incident('2', 'hallo', {'IP': ['1.1.1.1']}, '2019-12-01T11:00:00Z'),
+         incident('3', 'hello', {}, 'not a date')])
+    assert features['Email/headers/Subject'].tolist() == [1, 0]
+    assert features['same_type'].tolist() == [True, True]
+    assert features['custom_fields_jaccard'].tolist() == [1, 1]
+    assert features['incident_time_diff'].tolist()[0] == 3600
+    assert features['incident_time_diff'].isnull().tolist() == [False, True]
+    assert features['indicator_IP_jaccard'].tolist()[0] == 0.5
+    assert features['indicator_IP_jaccard'].isnull().tolist() == [False, True]
+    assert 'indicator_URL_jaccard' not in features
+
+
+def test_get_candidates_features_labels(mocker):
+    import GetDuplicatesMlv2
+    mocker.patch.object(GetDuplicatesMlv2, 'INDICATORS_FOR_JACCARD', [])
+
+    def incident(incident_id, labels, created):
+        return {'id': incident_id, 'type': 'Phishing', 'severity': 1, 'created': created, 'CustomFields': {},
+                'labels': [{'type': label_type, 'value': value} for label_type, value in labels.items()],
+                'indicators': {}}
+
+    features = get_candidates_features(
+        incident('1', {'Email/headers/Subject': 'hello', 'Instance': 'a', 'Email/text': 'a b'}, '2019-12-01T10:00:00Z'),
+        [incident('2', {'Email/headers/Subject': 'hallo', 'Instance': 'a'}, '2019-12-01T10:00:00.5Z'),
+         incident('3', {'Instance': 'b', 'Email/text': 'b c'}, '2019-12-01T09:00:00'),
+         incident('4', {'Email/headers/Subject': 'hallo'}, '2019-12-01T09:00:00+01:00')])
+    assert features['Email/headers/Subject'].tolist()[0::2] == [1, 1]
+    assert features['Email/headers/Subject'].isnull().tolist() == [False, True, False]
+    assert features['same_instance'].tolist()[:2] == [True, False]
+    assert features['same_instance'].isnull().tolist() == [False, False, True]
+    assert features['Email/text'].tolist()[1] == 1 / 3.0
+    assert features['Email/text'].isnull().tolist() == [True, False, True]
+    # a naive date cannot be compared with an aware date
+    assert features['incident_time_diff'].tolist()[0::2] == [0.5, 7200]
+    assert features['incident_time_diff'].isnull().tolist() == [False, True, False]
@@ -20,28 +20,31 @@ REPLACE_URLS = demisto.args()['replaceUrls'] == 'yes'
 REPLACE_NUMBERS = demisto.args()['replaceNumbers'] == 'yes'
 LEMMATIZER = demisto.args()['useLemmatization'] == 'yes'
 VALUE_IS_JSON = demisto.args()['isValueJson'] == 'yes'
+BATCH_SIZE = int(demisto.args().get('batchSize') or 1000)
+
+# script and style blocks, comments, tags, &nbsp; and spaces - a sequence of them is replaced by a single space
+HTML_PATTERN = re.compile(r"(?:<(script|style).*?>.*?</\1>|<!--.*?-->\n?|<.*?>|&nbsp;| )+", re.IGNORECASE | re.DOTALL)
+
+
+def get_disabled_pipes():
+    # the tokens flags don't need the parser and the named entities, the tagger is needed for the lemmas and the
+    # part of speech of numbers
+    disabled_pipes = ['parser', 'ner']
+    if not LEMMATIZER and not REPLACE_NUMBERS:
+        disabled_pipes.append('tagger')
+    return disabled_pipes
 
-HTML_PATTERNS = [
-    re.compile(r"(?is)<(script|style).*?>.*?(</\1>)"),
-    re.compile(r"(?s)<!--(.*?)-->[\n]?"),
-    re.compile(r"(?s)<.*?>"),
-    re.compile(r"&nbsp;"),
-    re.compile(r" +")
-]
 
 # define global parsers
 html_parser = HTMLParser()
-nlp = spacy.load('en_core_web_sm')
+nlp = spacy.load('en_core_web_sm', disable=get_disabled_pipes())
 
 
 def clean_html(text):
     if not CLEAN_HTML:
         return text
 
-    cleaned = text
-    for pattern in HTML_PATTERNS:
-        cleaned = pattern.sub(" ", cleaned)
-    return html_parser.unescape(cleaned).strip()
+    return html_parser.unescape(HTML_PATTERN.sub(" ", text)).strip()
 
 
 def remove_line_breaks(text):
@@ -55,12 +58,24 @@ def hash_word(word):
     return str(hash_djb2(word, int(HASH_SEED)))
 
 
-def tokenize_text(text):
+def to_unicode(text):
     try:
         unicode_text = unicode(text)
     except Exception:
         unicode_text = text
-    doc = nlp(unicode(unicode_text))
+    return unicode(unicode_text)
+
+
+def tokenize_text(text):
+    return tokenize_doc(nlp(to_unicode(text)))
+
+
+def tokenize_docs(texts):
+    for doc in nlp.pipe((to_unicode(text) for text in texts), batch_size=BATCH_SIZE):
+        yield tokenize_doc(doc)
+
+
+def tokenize_doc(doc):
     words = []
     for token in doc:
         if token.is_space:
@@ -104,11 +119,8 @@ def word_tokenize(text):
         text = [text]
 
     result = []
-    for t in text:
-        original_text = t
-        t = remove_line_breaks(t)
-        t = clean_html(t)
-        tokenized_text, hash_tokenized_text = tokenize_text(t)
+    cleaned_texts = (clean_html(remove_line_breaks(t)) for t in text)
+    for original_text, (tokenized_text, hash_tokenized_text) in zip(text, tokenize_docs(cleaned_texts)):
         text_result = {
             'originalText': original_text,
             'tokenizedText': tokenized_text,
@@ -12,7 +12,7 @@ def get_args():
 
 demistomock.args = get_args
 
-from WordTokenizer import remove_line_breaks, clean_html, tokenize_text, word_tokenize  # noqa
+from WordTokenizer import remove_line_breaks, clean_html, tokenize_text, word_tokenize, get_disabled_pipes  # noqa
 
 
 def test_remove_line_breaks():
@@ -25,6 +25,12 @@ def test_remove_line_breaks():
 def test_clean_html():
     text = """<html>hello</html>"""
     assert clean_html(text) == "hello"
+    text = """<html><style>p {}</style><!-- comment -->\n<p>hello</p>&nbsp;<b> world</b> &amp; <SCRIPT>x</SCRIPT></html>"""
+    assert clean_html(text) == "hello world &"
+
+
+def test_get_disabled_pipes():
+    assert get_disabled_pipes() == ['parser', 'ner']
 
 
 def test_tokenize_text():
@@ -38,3 +44,11 @@ def test_word_tokenize():
     assert "EMAIL_PATTERN NUMBER_PATTERN go URL_PATTERN bla bla" == entry['Contents']['tokenizedText']
     assert "2074773130 1320446219 5863419 1810208405 193487380 193487380" == entry['Contents'][
         'hashedTokenizedText']
+
+
+def test_word_tokenize_list():
+    texts = ["test@demisto.com is 100 going to http://google.com bla bla", "<p>bla</p>"]
+    entry = word_tokenize(texts)
+    assert ["EMAIL_PATTERN NUMBER_PATTERN go URL_PATTERN bla bla", "bla"] == [
+        result['tokenizedText'] for result in entry['Contents']]
+    assert texts == [result['originalText'] for result in entry['Contents']]
@@ -9,6 +9,7 @@ import json
 import glob
 import random
 import argparse
+from collections import deque
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../..')
@@ -16,7 +17,8 @@ sys.path.append(CONTENT_DIR)
 
 from Tests.scripts.constants import *  # noqa: E402
 from Tests.test_utils import get_yaml, str2bool, get_from_version, get_to_version, \
-    collect_ids, get_script_or_integration_id, run_command, LOG_COLORS, print_error, print_color, print_warning  # noqa: E402
+    collect_ids, get_script_or_integration_id, run_command, LOG_COLORS, print_error, print_color, print_warning, \
+    get_file_changes, format_file_changes, git_diff_name_status  # noqa: E402
 
 # Search Keyword for the changed file
 NO_TESTS_FORMAT = 'No test( - .*)?'
@@ -60,16 +62,8 @@ def get_modified_files(files_string):
     all_tests = []
     modified_files_list = []
     modified_tests_list = []
-    all_files = files_string.split('\n')
-
-    for _file in all_files:
-        file_data = _file.split()
-        if not file_data:
-            continue
-
-        file_path = file_data[1]
-        file_status = file_data[0]
 
+    for file_status, file_path, _ in get_file_changes(files_string):
         # ignoring renamed and deleted files.
         # also, ignore files in ".circle", ".github" and ".hooks" directories and .gitignore
         if (file_status.lower() == 'm' or file_status.lower() == 'a') and not file_path.startswith('.'):
@@ -321,23 +315,22 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
     with open("./Tests/id_set.json", 'r') as conf_file:
         id_set = json.load(conf_file)
 
-    script_set = id_set['scripts']
-    playbook_set = id_set['playbooks']
     integration_set = id_set['integrations']
+    dependencies = ReverseDependencies(id_set['scripts'], id_set['playbooks'])
 
     for script_id in script_names:
-        enrich_for_script_id(script_id, script_to_version[script_id], script_names, script_set, playbook_set,
+        enrich_for_script_id(script_id, script_to_version[script_id], script_names, dependencies,
                              playbook_names, updated_script_names, updated_playbook_names, catched_scripts,
                              catched_playbooks, tests_set)
 
     integration_to_command = get_integration_commands(integration_ids, integration_set)
     for integration_id, integration_commands in integration_to_command.items():
         enrich_for_integration_id(integration_id, integration_to_version[integration_id], integration_commands,
-                                  script_set, playbook_set, playbook_names, script_names, updated_script_names,
+                                  dependencies, playbook_names, script_names, updated_script_names,
                                   updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
 
     for playbook_id in playbook_names:
-        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, script_set, playbook_set,
+        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, dependencies,
                                updated_playbook_names, catched_playbooks, tests_set)
 
     for new_script in updated_script_names:
@@ -358,7 +351,47 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
     return tests_set, catched_scripts, catched_playbooks
 
 
-def enrich_for_integration_id(integration_id, given_version, integration_commands, script_set, playbook_set,
+class ReverseDependencies(object):
+    """Reverse dependency indexes of the id_set, so the affected ids are found without scanning the whole set.
+
+    Every index maps an id to the id_set data of the entities using it, in the order of the id_set.
+
+    Attributes:
+        command_to_playbooks (dict): integration command -> playbooks running the command.
+        command_to_scripts (dict): integration command -> non deprecated scripts depending on the command.
+        script_to_scripts (dict): script id -> non deprecated scripts executing the script.
+        script_to_playbooks (dict): script id -> playbooks implementing the script.
+        playbook_to_playbooks (dict): playbook id -> playbooks implementing the playbook.
+    """
+
+    def __init__(self, script_set, playbook_set):
+        self.command_to_playbooks = {}  # type: dict
+        self.command_to_scripts = {}  # type: dict
+        self.script_to_scripts = {}  # type: dict
+        self.script_to_playbooks = {}  # type: dict
+        self.playbook_to_playbooks = {}  # type: dict
+
+        for script in script_set:
+            script_data = list(script.values())[0]
+            if script_data.get('deprecated'):
+                continue
+
+            for command in set(script_data.get('depends_on', [])):
+                self.command_to_scripts.setdefault(command, []).append(script_data)
+            for script_id in set(script_data.get('script_executions', [])):
+                self.script_to_scripts.setdefault(script_id, []).append(script_data)
+
+        for playbook in playbook_set:
+            playbook_data = list(playbook.values())[0]
+            for command in playbook_data.get('command_to_integration', {}):
+                self.command_to_playbooks.setdefault(command, []).append(playbook_data)
+            for script_id in set(playbook_data.get('implementing_scripts', [])):
+                self.script_to_playbooks.setdefault(script_id, []).append(playbook_data)
+            for playbook_id in set(playbook_data.get('implementing_playbooks', [])):
+                self.playbook_to_playbooks.setdefault(playbook_id, []).append(playbook_data)
+
+
+def enrich_for_integration_id(integration_id, given_version, integration_commands, dependencies,
                               playbook_names, script_names, updated_script_names, updated_playbook_names,
                               catched_scripts, catched_playbooks, tests_set):
     """Enrich the list of affected scripts/playbooks by your change set.
@@ -366,8 +399,7 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
     :param integration_id: The name of the integration we changed.
     :param given_version: the version of the integration we changed.
     :param integration_commands: The commands of the changed integation
-    :param script_set: The set of existing scripts within Content repo.
-    :param playbook_set: The set of existing playbooks within Content repo.
+    :param dependencies: The reverse dependencies of the existing scripts and playbooks within Content repo.
     :param playbook_names: The names of the playbooks affected by your changes.
     :param script_names: The names of the scripts affected by your changes.
     :param updated_script_names: The names of scripts we identify as affected to your change set.
@@ -376,125 +408,99 @@ def enrich_for_integration_id(integration_id, given_version, integration_command
     :param catched_playbooks: The names of playbooks we found tests for.
     :param tests_set: The names of the caught tests.
     """
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
-        playbook_name = playbook_data.get('name')
-        playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
-        playbook_toversion = playbook_data.get('toversion', '99.99.99')
-        command_to_integration = playbook_data.get('command_to_integration', {})
-        implementing_commands = command_to_integration.keys()
-        for integration_command in integration_commands:
-            if integration_command in implementing_commands and playbook_toversion >= given_version[1]:
-                if playbook_name not in playbook_names and playbook_name not in updated_playbook_names:
-                    if not command_to_integration.get(integration_command) or \
-                            command_to_integration.get(integration_command) == integration_id:
-
-                        tests = playbook_data.get('tests', [])
-                        if tests:
-                            catched_playbooks.add(playbook_name)
-                            update_test_set(tests, tests_set)
-
-                        updated_playbook_names.add(playbook_name)
-                        new_versions = (playbook_fromversion, playbook_toversion)
-                        enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
-                                               updated_playbook_names, catched_playbooks, tests_set)
-
-    for script in script_set:
-        script_data = list(script.values())[0]
-        script_name = script_data.get('name')
-        script_file_path = script_data.get('file_path')
-        script_fromversion = script_data.get('fromversion', '0.0.0')
-        script_toversion = script_data.get('toversion', '99.99.99')
-        command_to_integration = script_data.get('command_to_integration', {})
-        for integration_command in integration_commands:
-            if integration_command in script_data.get('depends_on', []) and not script_data.get('deprecated'):
-                if integration_command in command_to_integration.keys() and \
-                        command_to_integration[integration_command] == integration_id and \
-                        script_toversion >= given_version[1]:
-
-                    if script_name not in script_names and script_name not in updated_script_names:
-                        tests = script_data.get('tests', [])
-                        if tests:
-                            catched_scripts.add(script_name)
-                            update_test_set(tests, tests_set)
-
-                        package_name = os.path.dirname(script_file_path)
-                        if glob.glob(package_name + "/*_test.py"):
-                            catched_scripts.add(script_name)
-                            tests.add('Found a unittest for the script {}'.format(script_name))
-
-                        updated_script_names.add(script_name)
-                        new_versions = (script_fromversion, script_toversion)
-                        enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set,
-                                             playbook_names, updated_script_names, updated_playbook_names,
-                                             catched_scripts, catched_playbooks, tests_set)
-
-
-def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, script_set, playbook_set,
+    affected_queue = deque()
+    for integration_command in integration_commands:
+        for playbook_data in dependencies.command_to_playbooks.get(integration_command, []):
+            command_integration = playbook_data.get('command_to_integration', {}).get(integration_command)
+            if playbook_data.get('toversion', '99.99.99') >= given_version[1] and \
+                    command_integration in ('', None, integration_id):
+                add_affected_playbook(playbook_data, affected_queue, playbook_names, updated_playbook_names,
+                                      catched_playbooks, tests_set)
+
+        for script_data in dependencies.command_to_scripts.get(integration_command, []):
+            command_to_integration = script_data.get('command_to_integration', {})
+            if command_to_integration.get(integration_command) == integration_id and \
+                    script_data.get('toversion', '99.99.99') >= given_version[1]:
+                add_affected_script(script_data, affected_queue, script_names, updated_script_names,
+                                    catched_scripts, tests_set)
+
+    walk_affected_ids(affected_queue, dependencies, playbook_names, script_names, updated_script_names,
+                      updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
+
+
+def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, dependencies,
                            updated_playbook_names, catched_playbooks, tests_set):
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
-        playbook_name = playbook_data.get('name')
-        playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
-        playbook_toversion = playbook_data.get('toversion', '99.99.99')
-        if given_playbook_id in playbook_data.get('implementing_playbooks', []) and \
-                playbook_toversion >= given_version[1]:
-
-            if playbook_name not in playbook_names and playbook_name not in updated_playbook_names:
-                tests = set(playbook_data.get('tests', []))
-                if tests:
-                    catched_playbooks.add(playbook_name)
-                    update_test_set(tests, tests_set)
-
-                updated_playbook_names.add(playbook_name)
-                new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
-                                       updated_playbook_names, catched_playbooks, tests_set)
-
-
-def enrich_for_script_id(given_script_id, given_version, script_names, script_set, playbook_set, playbook_names,
+    affected_queue = deque([('playbook', given_playbook_id, given_version)])
+    walk_affected_ids(affected_queue, dependencies, playbook_names, set(), set(), updated_playbook_names,
+                      set(), catched_playbooks, tests_set)
+
+
+def enrich_for_script_id(given_script_id, given_version, script_names, dependencies, playbook_names,
                          updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks, tests_set):
-    for script in script_set:
-        script_data = list(script.values())[0]
-        script_name = script_data.get('name')
-        script_file_path = script_data.get('file_path')
-        script_fromversion = script_data.get('fromversion', '0.0.0')
-        script_toversion = script_data.get('toversion', '99.99.99')
-        if given_script_id in script_data.get('script_executions', []) and not script_data.get('deprecated') and \
-                script_toversion >= given_version[1]:
-            if script_name not in script_names and script_name not in updated_script_names:
-                tests = set(script_data.get('tests', []))
-                if tests:
-                    catched_scripts.add(script_name)
-                    update_test_set(tests, tests_set)
-
-                package_name = os.path.dirname(script_file_path)
-                if glob.glob(package_name + "/*_test.py"):
-                    catched_scripts.add(script_name)
-                    tests.add('Found a unittest for the script {}'.format(script_name))
-
-                updated_script_names.add(script_name)
-                new_versions = (script_fromversion, script_toversion)
-                enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set, playbook_names,
-                                     updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks,
-                                     tests_set)
-
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
-        playbook_name = playbook_data.get('name')
-        playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
-        playbook_toversion = playbook_data.get('toversion', '99.99.99')
-        if given_script_id in playbook_data.get('implementing_scripts', []) and playbook_toversion >= given_version[1]:
-            if playbook_name not in playbook_names and playbook_name not in updated_playbook_names:
-                tests = set(playbook_data.get('tests', []))
-                if tests:
-                    catched_playbooks.add(playbook_name)
-                    update_test_set(tests, tests_set)
-
-                updated_playbook_names.add(playbook_name)
-                new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
-                                       updated_playbook_names, catched_playbooks, tests_set)
+    affected_queue = deque([('script', given_script_id, given_version)])
+    walk_affected_ids(affected_queue, dependencies, playbook_names, script_names, updated_script_names,
+                      updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
+
+
+def walk_affected_ids(affected_queue, dependencies, playbook_names, script_names, updated_script_names,
+                      updated_playbook_names, catched_scripts, catched_playbooks, tests_set):
+    """Walk (BFS) the reverse dependencies of the queued scripts and playbooks and collect all the ids they affect.
+
+    :param affected_queue: deque of ('script' or 'playbook', id, (fromversion, toversion)) to start the walk from.
+    :param dependencies: The reverse dependencies of the existing scripts and playbooks within Content repo.
+    """
+    while affected_queue:
+        entity_type, given_id, given_version = affected_queue.popleft()
+        if entity_type == 'script':
+            for script_data in dependencies.script_to_scripts.get(given_id, []):
+                if script_data.get('toversion', '99.99.99') >= given_version[1]:
+                    add_affected_script(script_data, affected_queue, script_names, updated_script_names,
+                                        catched_scripts, tests_set)
+
+            parent_playbooks = dependencies.script_to_playbooks.get(given_id, [])
+        else:
+            parent_playbooks = dependencies.playbook_to_playbooks.get(given_id, [])
+
+        for playbook_data in parent_playbooks:
+            if playbook_data.get('toversion', '99.99.99') >= given_version[1]:
+                add_affected_playbook(playbook_data, affected_queue, playbook_names, updated_playbook_names,
+                                      catched_playbooks, tests_set)
+
+
+def add_affected_script(script_data, affected_queue, script_names, updated_script_names, catched_scripts,
+                        tests_set):
+    script_name = script_data.get('name')
+    if script_name in script_names or script_name in updated_script_names:
+        return
+
+    tests = set(script_data.get('tests', []))
+    if tests:
+        catched_scripts.add(script_name)
+        update_test_set(tests, tests_set)
+
+    package_name = os.path.dirname(script_data.get('file_path'))
+    if glob.glob(package_name + "/*_test.py"):
+        catched_scripts.add(script_name)
+
+    updated_script_names.add(script_name)
+    new_versions = (script_data.get('fromversion', '0.0.0'), script_data.get('toversion', '99.99.99'))
+    affected_queue.append(('script', script_name, new_versions))
+
+
+def add_affected_playbook(playbook_data, affected_queue, playbook_names, updated_playbook_names, catched_playbooks,
+                          tests_set):
+    playbook_name = playbook_data.get('name')
+    if playbook_name in playbook_names or playbook_name in updated_playbook_names:
+        return
+
+    tests = set(playbook_data.get('tests', []))
+    if tests:
+        catched_playbooks.add(playbook_name)
+        update_test_set(tests, tests_set)
+
+    updated_playbook_names.add(playbook_name)
+    new_versions = (playbook_data.get('fromversion', '0.0.0'), playbook_data.get('toversion', '99.99.99'))
+    affected_queue.append(('playbook', playbook_name, new_versions))
 
 
 def update_test_set(tests_set, tests):
@@ -572,7 +578,7 @@ def get_test_list(files_string, branch_name):
     if sample_tests:  # Choosing 3 random tests for infrastructure testing
         print_warning('Collecting sample tests due to: {}'.format(','.join(sample_tests)))
         test_ids = get_test_ids(check_nightly_status=True)[0]
-        rand = random.Random(files_string + branch_name)
+        rand = random.Random(format_file_changes(get_file_changes(files_string)) + branch_name)
         while len(tests) < 3:
             tests.add(rand.choice(test_ids))
 
@@ -599,12 +605,12 @@ def create_test_file(is_nightly, skip_save=False):
 
         print("Getting changed files from the branch: {0}".format(branch_name))
         if branch_name != 'master':
-            files_string = run_command("git diff --name-status origin/master...{0}".format(branch_name))
+            files_string = git_diff_name_status("origin/master...{0}".format(branch_name))
         else:
             commit_string = run_command("git log -n 2 --pretty='%H'")
             commit_string = commit_string.replace("'", "")
             last_commit, second_last_commit = commit_string.split()
-            files_string = run_command("git diff --name-status {}...{}".format(second_last_commit, last_commit))
+            files_string = git_diff_name_status("{}...{}".format(second_last_commit, last_commit))
 
         tests = get_test_list(files_string, branch_name)
 
@@ -1,13 +1,12 @@
 import os
 import re
 import json
-from distutils.version import LooseVersion
 
 from Tests.test_utils import get_script_or_integration_id, collect_ids, print_error
 from Tests.scripts.constants import INTEGRATION_REGEX, TEST_PLAYBOOK_REGEX, SCRIPT_JS_REGEX, \
     SCRIPT_REGEX, TEST_SCRIPT_REGEX, INTEGRATION_YML_REGEX, PLAYBOOK_REGEX, SCRIPT_YML_REGEX, SCRIPT_PY_REGEX
 from Tests.scripts.update_id_set import get_script_data, get_playbook_data, \
-    get_integration_data, get_script_package_data
+    get_integration_data, get_script_package_data, is_versions_overlap
 
 
 class IDSetValidator(object):
@@ -143,31 +142,20 @@ class IDSetValidator(object):
         Returns:
             bool. Whether the ID already exist in the system or not.
         """
-        is_duplicated = False
-        dict_value = obj_data.values()[0]
-        obj_toversion = dict_value.get('toversion', '99.99.99')
-        obj_fromversion = dict_value.get('fromversion', '0.0.0')
-
+        dict_value = obj_data[obj_id]
+        entities = [dict_value]
         for section, section_data in self.id_set.items():
             for instance in section_data:
-                instance_id = instance.keys()[0]
-                instance_to_version = instance[instance_id].get('toversion', '99.99.99')
-                instance_from_version = instance[instance_id].get('fromversion', '0.0.0')
-                if obj_id == instance_id:
-                    if section != obj_type and LooseVersion(obj_fromversion) < LooseVersion(instance_to_version):
-                        is_duplicated = True
-                        break
-
-                    elif obj_fromversion == instance_from_version and obj_toversion == instance_to_version:
-                        if instance[instance_id] != obj_data[obj_id]:
-                            is_duplicated = True
-                            break
-
-                    elif (LooseVersion(obj_fromversion) <= LooseVersion(instance_to_version)
-                          and (LooseVersion(obj_toversion) >= LooseVersion(instance_from_version))):
-                        is_duplicated = True
-                        break
+                if obj_id not in instance:
+                    continue
+
+                # the entry of the given file itself
+                if section == obj_type and instance[obj_id] == dict_value:
+                    continue
+
+                entities.append(instance[obj_id])
 
+        is_duplicated = len(entities) > 1 and is_versions_overlap(entities)
         if is_duplicated:
             print_error("The ID {0} already exists, please update the file or update the "
                         "id_set.json toversion field of this id to match the "
@@ -5,6 +5,8 @@ import math
 import json
 import string
 import argparse
+from collections import Counter
+from multiprocessing import Pool, cpu_count
 import PyPDF2
 
 from bs4 import BeautifulSoup
@@ -12,6 +14,12 @@ from Tests.scripts.constants import *
 from Tests.test_utils import run_command, print_error, str2bool, print_color, LOG_COLORS, checked_type,\
     is_file_path_in_pack, get_pack_name
 
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional, without it the entropy of every string is calculated separately
+    np = None
+
 # secrets settings
 # Entropy score is determined by shanon's entropy algorithm, most English words will score between 1.5 and 3.5
 ENTROPY_THRESHOLD = 4.0
@@ -51,15 +59,38 @@ IPV4_REGEX = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0
 DATES_REGEX = r'((\d{4}[/.-]\d{2}[/.-]\d{2})[T\s](\d{2}:?\d{2}:?\d{2}:?(\.\d{5,10})?([+-]\d{2}:?\d{2})?Z?)?)'
 # false positives
 UUID_REGEX = r'([\w]{8}-[\w]{4}-[\w]{4}-[\w]{4}-[\w]{8,12})'
+DOCKER_IMAGE_VERSION_REGEX = r'dockerimage:\s*\w*demisto/\w+:(\d+.\d+.\d+.\d+)'
 # disable-secrets-detection-end
 
-
-def get_secrets(branch_name, is_circle):
+# compiled once, regex_for_secrets runs for every line of every scanned file
+DATES_PATTERN = re.compile(DATES_REGEX)
+UUID_PATTERN = re.compile(UUID_REGEX)
+DOCKER_IMAGE_VERSION_PATTERN = re.compile(DOCKER_IMAGE_VERSION_REGEX)
+URLS_PATTERN = re.compile(URLS_REGEX)
+EMAIL_PATTERN = re.compile(EMAIL_REGEX)
+IPV6_PATTERN = re.compile(IPV6_REGEX)
+IPV4_PATTERN = re.compile(IPV4_REGEX)
+IOCS_REGEXES = (URLS_REGEX, EMAIL_REGEX, IPV6_REGEX, IPV4_REGEX)
+# a line has an IOC only if one of the alternatives matches, so most lines are scanned once instead of four times
+IOCS_PATTERN = re.compile('|'.join('(?:{})'.format(regex) for regex in IOCS_REGEXES))
+
+# the entropy sums the characters in this order, so it does not depend on the order they appear in the data
+PRINTABLE_ORDER = {char: index for index, char in enumerate(string.printable)}
+# number of strings calculated together in a single numpy histogram
+ENTROPY_BATCH_SIZE = 4096
+
+# white lists loaded from disk, by (is_pack, pack_name)
+_WHITE_LISTS = {}  # type: dict
+# white list matchers, by the white list they were built from
+_WHITE_LIST_MATCHERS = {}  # type: dict
+
+
+def get_secrets(branch_name, is_circle, workers=None):
     secrets_found = {}
     # make sure not in middle of merge
     if not run_command('git rev-parse -q --verify MERGE_HEAD'):
         secrets_file_paths = get_all_diff_text_files(branch_name, is_circle)
-        secrets_found = search_potential_secrets(secrets_file_paths)
+        secrets_found = search_potential_secrets(secrets_file_paths, workers)
         if secrets_found:
             secrets_found_string = 'Secrets were found in the following files:\n'
             for file_name in secrets_found:
@@ -119,74 +150,176 @@ def is_text_file(file_path):
     return False
 
 
-def search_potential_secrets(secrets_file_paths: list):
+def search_potential_secrets(secrets_file_paths: list, workers=None):
     """Returns potential secrets(sensitive data) found in committed and added files
     :param secrets_file_paths: paths of files that are being commited to git repo
+    :param workers: number of processes to scan the files with, defaults to the number of CPUs
     :return: dictionary(filename: (list)secrets) of strings sorted by file name for secrets found in files
     """
     secrets_found = {}
-    for file_path in secrets_file_paths:
-        # Get if file path in pack and pack name
-        is_pack = is_file_path_in_pack(file_path)
-        pack_name = get_pack_name(file_path)
-        # Get generic/ioc/files white list sets based on if pack or not
-        secrets_white_list, ioc_white_list, files_white_list = get_white_listed_items(is_pack, pack_name)
-        # Skip white listed files
-        if file_path in files_white_list:
-            print("Skipping secrets detection for file: {} as it is white listed".format(file_path))
-            continue
-        # Init vars for current loop
-        file_name = os.path.basename(file_path)
-        high_entropy_strings = []
-        secrets_found_with_regex = []
-        _, file_extension = os.path.splitext(file_path)
-        skip_secrets = {'skip_once': False, 'skip_multi': False}
-        # get file contents
-        file_contents = get_file_contents(file_path, file_extension)
-        # in packs regard all items as regex as well, reset pack's whitelist in order to avoid repetition later
-        if is_pack:
-            file_contents = remove_white_list_regex(file_contents, secrets_white_list)
-            secrets_white_list = set()
-        yml_file_contents = get_related_yml_contents(file_path)
-        # Add all context output paths keywords to whitelist temporary
-        if file_extension == YML_FILE_EXTENSION or yml_file_contents:
-            temp_white_list = create_temp_white_list(yml_file_contents if yml_file_contents else file_contents)
-            secrets_white_list = secrets_white_list.union(temp_white_list)
-        # Search by lines after strings with high entropy / IoCs regex as possibly suspicious
-        for line in file_contents.split('\n'):
-            # if detected disable-secrets comments, skip the line/s
-            skip_secrets = is_secrets_disabled(line, skip_secrets)
-            if skip_secrets['skip_once'] or skip_secrets['skip_multi']:
-                skip_secrets['skip_once'] = False
-                continue
-            # REGEX scanning for IOCs and false positive groups
-            regex_secrets, false_positives = regex_for_secrets(line)
-            for regex_secret in regex_secrets:
-                if not any(ioc.lower() in regex_secret.lower() for ioc in ioc_white_list):
-                    secrets_found_with_regex.append(regex_secret)
-            # added false positives into white list array before testing the strings in line
-            secrets_white_list = secrets_white_list.union(false_positives)
-            # due to nature of eml files, skip string by string secret detection - only regex
-            if file_extension in SKIP_FILE_TYPE_ENTROPY_CHECKS or \
-                    any(demisto_type in file_name for demisto_type in SKIP_DEMISTO_TYPE_ENTROPY_CHECKS):
-                continue
-            line = remove_false_positives(line)
-            # calculate entropy for each string in the file
-            for string_ in line.split():
-                # compare the lower case of the string against both generic whitelist & temp white list
-                if not any(white_list_string.lower() in string_.lower() for white_list_string in secrets_white_list):
-                    entropy = calculate_shannon_entropy(string_)
-                    if entropy >= ENTROPY_THRESHOLD:
-                        high_entropy_strings.append(string_)
-
-        if high_entropy_strings or secrets_found_with_regex:
-            # uniquify identical matches between lists
-            file_secrets = list(set(high_entropy_strings + secrets_found_with_regex))
-            secrets_found[file_name] = file_secrets
+    secrets_file_paths = list(secrets_file_paths)
+    workers = min(workers or cpu_count(), len(secrets_file_paths))
+    if workers > 1:
+        pool = Pool(processes=workers)
+        try:
+            files_secrets = pool.map(search_file_secrets, secrets_file_paths)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        files_secrets = [search_file_secrets(file_path) for file_path in secrets_file_paths]
+
+    for file_path, file_secrets in zip(secrets_file_paths, files_secrets):
+        if file_secrets:
+            secrets_found[os.path.basename(file_path)] = file_secrets
 
     return secrets_found
 
 
+def search_file_secrets(file_path):
+    """Returns potential secrets(sensitive data) found in a single file
+    :param file_path: path of a file that is being commited to git repo
+    :return: list of the secrets found in the file
+    """
+    # Get if file path in pack and pack name
+    is_pack = is_file_path_in_pack(file_path)
+    pack_name = get_pack_name(file_path)
+    # Get generic/ioc/files white list sets based on if pack or not
+    secrets_white_list, ioc_white_list, files_white_list = get_white_listed_items(is_pack, pack_name)
+    # Skip white listed files
+    if file_path in files_white_list:
+        print("Skipping secrets detection for file: {} as it is white listed".format(file_path))
+        return []
+    # Init vars for current file
+    file_name = os.path.basename(file_path)
+    # the entropy of every distinct string is calculated once, in a single batch after the scan
+    entropy_candidates = set()  # type: set
+    secrets_found_with_regex = []
+    _, file_extension = os.path.splitext(file_path)
+    skip_secrets = {'skip_once': False, 'skip_multi': False}
+    ioc_white_list = [ioc.lower() for ioc in ioc_white_list]
+    # due to nature of eml files, skip string by string secret detection - only regex
+    skip_entropy_checks = file_extension in SKIP_FILE_TYPE_ENTROPY_CHECKS or \
+        any(demisto_type in file_name for demisto_type in SKIP_DEMISTO_TYPE_ENTROPY_CHECKS)
+    # get file contents
+    file_contents = get_file_contents(file_path, file_extension)
+    # in packs regard all items as regex as well, reset pack's whitelist in order to avoid repetition later
+    if is_pack:
+        file_contents = remove_white_list_regex(file_contents, secrets_white_list)
+        secrets_white_list = frozenset()
+    white_list_matchers = [get_white_list_matcher(secrets_white_list)]
+    yml_file_contents = get_related_yml_contents(file_path)
+    # Add all context output paths keywords to whitelist temporary
+    if file_extension == YML_FILE_EXTENSION or yml_file_contents:
+        temp_white_list = create_temp_white_list(yml_file_contents if yml_file_contents else file_contents)
+        white_list_matchers.append(WhiteListMatcher(temp_white_list))
+    # false positives found along the file are white listed as well, there are usually only a few of them
+    false_positives_white_list = set()  # type: set
+    # Search by lines after strings with high entropy / IoCs regex as possibly suspicious
+    for line in file_contents.split('\n'):
+        # if detected disable-secrets comments, skip the line/s
+        skip_secrets = is_secrets_disabled(line, skip_secrets)
+        if skip_secrets['skip_once'] or skip_secrets['skip_multi']:
+            skip_secrets['skip_once'] = False
+            continue
+        # REGEX scanning for IOCs and false positive groups
+        regex_secrets, false_positives = regex_for_secrets(line)
+        for regex_secret in regex_secrets:
+            if not any(ioc in regex_secret.lower() for ioc in ioc_white_list):
+                secrets_found_with_regex.append(regex_secret)
+        # added false positives into white list array before testing the strings in line
+        false_positives_white_list.update(false_positive.lower() for false_positive in false_positives)
+        if skip_entropy_checks:
+            continue
+        line = remove_false_positives(line)
+        # calculate entropy for each string in the file
+        for string_ in line.split():
+            # compare the lower case of the string against both generic whitelist & temp white list
+            lower_string = string_.lower()
+            if not any(white_list_matcher.search(lower_string) for white_list_matcher in white_list_matchers) and \
+                    not any(white_list_string in lower_string for white_list_string in false_positives_white_list):
+                entropy_candidates.add(string_)
+
+    entropy_candidates = list(entropy_candidates)
+    high_entropy_strings = [string_ for string_, entropy in
+                            zip(entropy_candidates, calculate_shannon_entropies(entropy_candidates))
+                            if entropy >= ENTROPY_THRESHOLD]
+    # uniquify identical matches between lists
+    return list(set(high_entropy_strings + secrets_found_with_regex))
+
+
+def get_white_list_matcher(white_list):
+    """Get the matcher of a white list, which is built only once for every white list
+    :param white_list: frozenset of the white listed strings
+    :return: WhiteListMatcher of the white list
+    """
+    if white_list not in _WHITE_LIST_MATCHERS:
+        _WHITE_LIST_MATCHERS[white_list] = WhiteListMatcher(white_list)
+    return _WHITE_LIST_MATCHERS[white_list]
+
+
+class WhiteListMatcher(object):
+    """Aho-Corasick automaton of white listed strings.
+
+    Tells in a single pass over a string whether it contains any of the white listed strings, instead of looking
+    for every one of them separately.
+
+    Attributes:
+        goto (list): transitions (char -> state) of every state.
+        fail (list): the state to fall back to when there is no transition, for every state.
+        is_match (list): whether a white listed string ends in the state, for every state.
+    """
+
+    def __init__(self, white_list):
+        self.goto = [{}]  # type: list
+        self.fail = [0]
+        self.is_match = [False]
+        for white_list_string in white_list:
+            state = 0
+            for char in white_list_string.lower():
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.is_match.append(False)
+                state = next_state
+            self.is_match[state] = True
+
+        # set the fail transitions in BFS order, so the fail state of the parent is always ready
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.goto[fail_state].get(char, 0)
+                self.is_match[next_state] = self.is_match[next_state] or self.is_match[self.fail[next_state]]
+                queue.append(next_state)
+
+    def search(self, data):
+        """Check if the lower cased data contains any of the white listed strings
+
+        :param data: lower cased string to search in
+        :return: True if a white listed string was found
+        """
+        if self.is_match[0]:
+            # an empty string is white listed
+            return True
+        goto = self.goto
+        fail = self.fail
+        is_match = self.is_match
+        state = 0
+        for char in data:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if is_match[state]:
+                return True
+        return False
+
+
 def remove_white_list_regex(file_contents, secrets_white_list):
     for regex in secrets_white_list:
         file_contents = re.sub(regex, '', file_contents)
@@ -231,36 +364,38 @@ def regex_for_secrets(line):
     false_positives = []
 
     # Dates REGEX for false positive preventing since they have high entropy
-    dates = re.findall(DATES_REGEX, line)
+    dates = DATES_PATTERN.findall(line)
     if dates:
         false_positives += [date[0].lower() for date in dates]
     # UUID REGEX
-    uuids = re.findall(UUID_REGEX, line)
+    uuids = UUID_PATTERN.findall(line)
     if uuids:
         false_positives += uuids
     # docker images version are detected as ips. so we ignore and whitelist them
     # example: dockerimage: demisto/duoadmin:1.0.0.147
-    re_res = re.search(r'dockerimage:\s*\w*demisto/\w+:(\d+.\d+.\d+.\d+)', line)
+    re_res = DOCKER_IMAGE_VERSION_PATTERN.search(line)
     if re_res:
         docker_version = re_res.group(1)
         false_positives.append(docker_version)
         line = line.replace(docker_version, '')
+    if not IOCS_PATTERN.search(line):
+        return potential_secrets, false_positives
     # URL REGEX
-    urls = re.findall(URLS_REGEX, line)
+    urls = URLS_PATTERN.findall(line)
     if urls:
         potential_secrets += urls
     # EMAIL REGEX
-    emails = re.findall(EMAIL_REGEX, line)
+    emails = EMAIL_PATTERN.findall(line)
     if emails:
         potential_secrets += emails
     # IPV6 REGEX
-    ipv6_list = re.findall(IPV6_REGEX, line)
+    ipv6_list = IPV6_PATTERN.findall(line)
     if ipv6_list:
         for ipv6 in ipv6_list:
             if ipv6 != '::' and len(ipv6) > 4:
                 potential_secrets.append(ipv6)
     # IPV4 REGEX
-    ipv4_list = re.findall(IPV4_REGEX, line)
+    ipv4_list = IPV4_PATTERN.findall(line)
     if ipv4_list:
         potential_secrets += ipv4_list
 
@@ -276,21 +411,75 @@ def calculate_shannon_entropy(data):
     if not data:
         return 0
     entropy = 0
-    # each unicode code representation of all characters which are considered printable
-    for char in (ord(c) for c in string.printable):
+    data_len = float(len(data))
+    # count all the characters in a single pass, only characters which are considered printable are scored
+    char_counts = Counter(data)
+    for char in sorted((char for char in char_counts if char in PRINTABLE_ORDER), key=PRINTABLE_ORDER.get):
         # probability of event X
-        p_x = float(data.count(chr(char))) / len(data)
-        if p_x > 0:
-            # the information in every possible news, in bits
-            entropy += - p_x * math.log(p_x, 2)
+        p_x = char_counts[char] / data_len
+        # the information in every possible news, in bits
+        entropy += - p_x * math.log(p_x, 2)
     return entropy
 
 
+def calculate_shannon_entropies(strings):
+    """Calculate the entropy of a batch of strings.
+    With numpy, the ASCII strings are scored together from a byte histogram of the whole batch, the rest are
+    scored separately by calculate_shannon_entropy.
+    :param strings: list of strings.
+    :return: list of the entropy scores of the strings, in the same order.
+    """
+    entropies = [0] * len(strings)
+    if np is None:
+        ascii_indices = []  # type: list
+    else:
+        ascii_indices = [index for index, string_ in enumerate(strings) if string_ and is_ascii(string_)]
+    for index in set(range(len(strings))).difference(ascii_indices):
+        entropies[index] = calculate_shannon_entropy(strings[index])
+
+    for batch_start in range(0, len(ascii_indices), ENTROPY_BATCH_SIZE):
+        batch_indices = ascii_indices[batch_start:batch_start + ENTROPY_BATCH_SIZE]
+        batch = [strings[index] for index in batch_indices]
+        for index, entropy in zip(batch_indices, calculate_ascii_entropies(batch)):
+            entropies[index] = entropy
+    return entropies
+
+
+def calculate_ascii_entropies(strings):
+    """Calculate the entropy of non empty ASCII strings with a numpy byte histogram.
+    :param strings: list of non empty ASCII strings.
+    :return: list of the entropy scores of the strings, in the same order.
+    """
+    lengths = np.array([len(string_) for string_ in strings])
+    data = np.frombuffer(''.join(strings).encode('ascii'), dtype=np.uint8)
+    string_ids = np.repeat(np.arange(len(strings)), lengths)
+    histogram = np.bincount(string_ids * 128 + data, minlength=len(strings) * 128).reshape(len(strings), 128)
+    entropies = np.zeros(len(strings))
+    # add the characters one by one in the order of string.printable, as calculate_shannon_entropy does
+    for char in string.printable:
+        counts = histogram[:, ord(char)]
+        has_char = counts > 0
+        p_x = counts[has_char] / lengths[has_char]
+        entropies[has_char] += - p_x * (np.log(p_x) / math.log(2))
+    return entropies.tolist()
+
+
+def is_ascii(data):
+    try:
+        data.encode('ascii')
+    except UnicodeError:
+        return False
+    return True
+
+
 def get_white_listed_items(is_pack, pack_name):
-    whitelist_path = os.path.join(PACKS_DIR, pack_name, PACKS_WHITELIST_FILE_NAME) if is_pack else WHITELIST_PATH
-    final_white_list, ioc_white_list, files_while_list = get_packs_white_list(whitelist_path) if is_pack else\
-        get_generic_white_list(whitelist_path)
-    return set(final_white_list), set(ioc_white_list), set(files_while_list)
+    if (is_pack, pack_name) not in _WHITE_LISTS:
+        whitelist_path = os.path.join(PACKS_DIR, pack_name, PACKS_WHITELIST_FILE_NAME) if is_pack else WHITELIST_PATH
+        final_white_list, ioc_white_list, files_while_list = get_packs_white_list(whitelist_path) if is_pack else\
+            get_generic_white_list(whitelist_path)
+        _WHITE_LISTS[(is_pack, pack_name)] = (frozenset(final_white_list), frozenset(ioc_white_list),
+                                              frozenset(files_while_list))
+    return _WHITE_LISTS[(is_pack, pack_name)]
 
 
 def get_generic_white_list(whitelist_path):
@@ -407,6 +596,8 @@ def get_branch_name():
 def parse_script_arguments():
     parser = argparse.ArgumentParser(description='Utility CircleCI usage')
     parser.add_argument('-c', '--circle', type=str2bool, default=False, help='Is CircleCi or not')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of processes used for scanning the files (default: number of CPUs)')
     options = parser.parse_args()
     return options
 
@@ -417,7 +608,7 @@ def main():
     branch_name = get_branch_name()
     is_forked = re.match(EXTERNAL_PR_REGEX, branch_name) is not None
     if not is_forked:
-        secrets_found = get_secrets(branch_name, is_circle)
+        secrets_found = get_secrets(branch_name, is_circle, options.workers)
         if secrets_found:
             sys.exit(1)
         else:
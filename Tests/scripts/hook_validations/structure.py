@@ -1,5 +1,3 @@
-import json
-import yaml
 import os
 import re
 import sys
@@ -270,8 +268,8 @@ class StructureValidator(object):
 
     def load_data_from_file(self):
         file_type_suffix_to_loading_func = {
-            '.yml': yaml.safe_load,
-            '.json': json.load,
+            '.yml': get_yaml,
+            '.json': get_json,
         }
 
         file_extension = os.path.splitext(self.file_path)[1]
@@ -279,9 +277,7 @@ class StructureValidator(object):
             print_error("An unknown error has occurred. Please retry.")
 
         load_function = file_type_suffix_to_loading_func[file_extension]
-        with open(self.file_path, 'r') as file_obj:
-            loaded_file_data = load_function(file_obj)
-            return loaded_file_data
+        return load_function(self.file_path)
 
     @staticmethod
     def get_file_id_from_loaded_file_data(loaded_file_data):
@@ -18,6 +18,26 @@ class TestGetFile:
     def test_get_file(self, file_path, func, expected):
         assert func(file_path) == expected
 
+    def test_get_file_is_parsed_once(self, tmpdir, mocker):
+        yml_path = str(tmpdir.join('fake_integration.yml'))
+        with open(yml_path, 'w') as yml_file:
+            yml_file.write('name: fake\n')
+        load_yaml = mocker.spy(test_utils, 'load_yaml')
+
+        assert test_utils.get_yaml(yml_path) == {'name': 'fake'}
+        assert test_utils.get_yaml(yml_path) == {'name': 'fake'}
+        assert load_yaml.call_count == 1
+
+    def test_changed_file_is_parsed_again(self, tmpdir):
+        yml_path = str(tmpdir.join('fake_integration.yml'))
+        with open(yml_path, 'w') as yml_file:
+            yml_file.write('name: fake\n')
+        assert test_utils.get_yaml(yml_path) == {'name': 'fake'}
+
+        with open(yml_path, 'w') as yml_file:
+            yml_file.write('name: changed\n')
+        assert test_utils.get_yaml(yml_path) == {'name': 'changed'}
+
 
 class TestGetRemoteFile:
     def test_get_remote_file_sanity(self):
@@ -51,3 +71,69 @@ class TestGetRemoteFile:
     def test_get_remote_file_invalid_origin_branch(self):
         invalid_yml = test_utils.get_remote_file('Integrations/Gmail/Gmail.yml', 'origin/NoSuchBranch')
         assert not invalid_yml
+
+
+class TestGetRemoteFileFromGit:
+    @pytest.fixture(autouse=True)
+    def remote_files_cache(self, mocker):
+        mocker.patch.object(test_utils, '_REMOTE_FILES_CACHE', {})
+
+    def test_remote_branch_is_tried_first(self):
+        assert test_utils.GitObjectResolver.get_revisions('master') == ['origin/master', 'master']
+        assert test_utils.GitObjectResolver.get_revisions('origin/master') == ['origin/master', 'master']
+
+    def test_get_remote_file_from_local_repository(self, mocker):
+        fetch_remote_file = mocker.patch.object(test_utils, 'fetch_remote_file')
+        gmail_yml = test_utils.get_remote_file('Integrations/Gmail/Gmail.yml', 'HEAD')
+        assert gmail_yml['commonfields']['id'] == 'Gmail'
+        assert not fetch_remote_file.called
+
+    def test_missing_files_are_fetched_once(self, mocker):
+        fetch_remote_file = mocker.patch.object(test_utils, 'fetch_remote_file',
+                                                return_value=({'name': 'Recorded Future'}, None))
+        test_utils.prefetch_remote_files(['Integrations/integration-Recorded_Future.yml',
+                                          'Integrations/Gmail/Gmail.yml'], 'HEAD')
+        assert test_utils.get_remote_file('Integrations/integration-Recorded_Future.yml', 'HEAD') == \
+            {'name': 'Recorded Future'}
+        assert test_utils.get_remote_file('Integrations/Gmail/Gmail.yml', 'HEAD')['commonfields']['id'] == 'Gmail'
+        fetch_remote_file.assert_called_once_with('Integrations/integration-Recorded_Future.yml', 'HEAD')
+
+    def test_failed_fetch(self, mocker):
+        mocker.patch.object(test_utils, 'fetch_remote_file', return_value=({}, 'Could not find the old entity file'))
+        print_warning = mocker.patch.object(test_utils, 'print_warning')
+        assert test_utils.get_remote_file('Integrations/integration-Recorded_Future.yml', 'HEAD') == {}
+        print_warning.assert_called_once_with('Could not find the old entity file')
+
+
+class TestGitDiffNameStatus:
+    FILE_CHANGES = [
+        test_utils.GitFileChange('M', 'Integrations/Gmail/Gmail.yml', None),
+        test_utils.GitFileChange('R100', 'Scripts/New Name/New Name.yml', 'Scripts/script-OldName.yml'),
+        test_utils.GitFileChange('A', 'Playbooks/playbook-New.yml', None),
+    ]
+
+    def test_get_file_changes_with_null_separator(self):
+        files_string = 'M\0Integrations/Gmail/Gmail.yml\0R100\0Scripts/script-OldName.yml\0' \
+                       'Scripts/New Name/New Name.yml\0A\0Playbooks/playbook-New.yml\0'
+        assert test_utils.get_file_changes(files_string) == self.FILE_CHANGES
+
+    def test_get_file_changes_without_null_separator(self):
+        files_string = 'M       Integrations/Gmail/Gmail.yml\n' \
+                       'R100    Scripts/script-OldName.yml  Scripts/NewName/NewName.yml\n'
+        assert test_utils.get_file_changes(files_string) == [
+            test_utils.GitFileChange('M', 'Integrations/Gmail/Gmail.yml', None),
+            test_utils.GitFileChange('R100', 'Scripts/NewName/NewName.yml', 'Scripts/script-OldName.yml'),
+        ]
+
+    def test_format_file_changes(self):
+        assert test_utils.format_file_changes(self.FILE_CHANGES) == \
+            'M\tIntegrations/Gmail/Gmail.yml\n' \
+            'R100\tScripts/script-OldName.yml\tScripts/New Name/New Name.yml\n' \
+            'A\tPlaybooks/playbook-New.yml'
+
+    def test_diff_runs_once(self, mocker):
+        mocker.patch.object(test_utils, '_GIT_DIFFS_CACHE', {})
+        run_command = mocker.patch.object(test_utils, 'run_command', return_value='M\0Integrations/Gmail/Gmail.yml\0')
+        assert test_utils.git_diff_name_status('origin/master...my_branch') == self.FILE_CHANGES[:1]
+        assert test_utils.git_diff_name_status('origin/master...my_branch') == self.FILE_CHANGES[:1]
+        run_command.assert_called_once_with(['git', 'diff', '--name-status', '-z', 'origin/master...my_branch'])
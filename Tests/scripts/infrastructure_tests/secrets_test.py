@@ -2,7 +2,8 @@ import os
 from Tests.scripts.hook_validations.secrets import get_secrets, get_diff_text_files, is_text_file, \
     search_potential_secrets, remove_white_list_regex, create_temp_white_list, get_file_contents, \
     retrieve_related_yml, regex_for_secrets, calculate_shannon_entropy, get_packs_white_list, get_generic_white_list, \
-    remove_false_positives, is_secrets_disabled, ignore_base64
+    remove_false_positives, is_secrets_disabled, ignore_base64, search_file_secrets, WhiteListMatcher, \
+    calculate_shannon_entropies
 
 
 class TestSecrets:
@@ -64,6 +65,12 @@ class TestSecrets:
         entropy = calculate_shannon_entropy(test_string)
         assert entropy == 2.0
 
+    def test_calculate_shannon_entropies(self):
+        test_strings = ['SADE', 'OCSn7JGqKehoyIyMCm7gPFjKXpawXvh2M32', '', 'sadé', 'aaaa', '0123456789abcdef']
+        entropies = calculate_shannon_entropies(test_strings)
+        assert entropies == [calculate_shannon_entropy(test_string) for test_string in test_strings]
+        assert entropies[-1] == 4.0
+
     def test_get_packs_white_list(self):
         final_white_list, ioc_white_list, files_while_list = get_packs_white_list(self.TEST_WHITELIST_FILE_PACKS)
         assert ioc_white_list == []
@@ -98,3 +105,19 @@ class TestSecrets:
         file_contents = self.TEST_BASE_64_STRING
         file_contents = ignore_base64(file_contents)
         assert file_contents.lstrip() == 'sade'
+
+    def test_search_potential_secrets_in_parallel(self):
+        files = [self.TEST_YML_FILE, self.TEST_PY_FILE]
+        secrets_found = search_potential_secrets(files, workers=2)
+        assert secrets_found == search_potential_secrets(files, workers=1)
+        assert not secrets_found
+        assert search_file_secrets(self.TEST_PY_FILE) == []
+
+    def test_white_list_matcher(self):
+        matcher = WhiteListMatcher(['Sade', 'boop', 'shmoop', 'oops'])
+        assert matcher.search('meeseeks_sade')
+        assert matcher.search('shmoops')
+        assert matcher.search('shmoo-oops')
+        assert not matcher.search('shmoo')
+        assert not matcher.search('')
+        assert WhiteListMatcher(['']).search('anything')
@@ -1,6 +1,9 @@
 import unittest
 import pytest
-from Tests.scripts.update_id_set import has_duplicate, get_integration_data, get_script_data, get_playbook_data
+from Tests.scripts import update_id_set
+from Tests.scripts.update_id_set import has_duplicate, get_integration_data, get_script_data, get_playbook_data, \
+    get_cached_data, get_cache_key, get_duplicate_ids, is_versions_overlap, init_id_set_cache, prune_id_set_cache, \
+    process_script, process_id_set_task
 
 MOCKED_DATA = [
     (
@@ -83,6 +86,52 @@ def test_had_duplicates(id_set, id_to_check, result):
     assert result == has_duplicate(id_set, id_to_check)
 
 
+def test_get_duplicate_ids():
+    """
+    Given
+    - An id_set section with IDs that appear several times, some of them with overlapping versions.
+
+    When
+    - Looking for the duplicated IDs.
+
+    Then
+    - Ensure only the IDs with overlapping versions are returned, in the order they appear.
+    """
+    id_set_section = [entity for id_set, _, _ in reversed(MOCKED_DATA) for entity in id_set]
+    id_set_section.extend([
+        {'Test4': {'name': 'Test4', 'toversion': '4.9.9'}},
+        {'Test4': {'name': 'Test4', 'fromversion': '5.0.0'}},
+        {'Test5': {'name': 'Test5'}},
+    ])
+
+    assert get_duplicate_ids(id_set_section) == ['Test3', 'BluecatAddressManager']
+
+
+@pytest.mark.parametrize('version_ranges, result', [
+    ([('4.0.0', '4.0.0'), ('4.0.0', '4.0.0')], False),
+    ([('1.0.0', '5.0.0'), ('5.0.0', '9.0.0')], False),
+    ([('1.0.0', '5.0.0'), ('5.0.0', '5.0.0')], True),
+    ([('1.0.0', '1.0.0'), ('1.0.0', '5.0.0')], True),
+    ([('1.0.0', '5.0.0'), ('3.0.0', '3.0.0')], True),
+    ([('1.0.0', '5.0.0'), ('6.0.0', '6.0.0')], False),
+])
+def test_is_versions_overlap_with_empty_ranges(version_ranges, result):
+    """
+    Given
+    - Version ranges of entities with the same ID, some of them empty.
+
+    When
+    - Checking if the version ranges overlap.
+
+    Then
+    - Ensure an empty range overlaps a non-empty range it is within or at the boundary of, and not another empty range.
+    """
+    entities = [{'name': 'Test', 'fromversion': from_version, 'toversion': to_version}
+                for from_version, to_version in version_ranges]
+
+    assert is_versions_overlap(entities) is result
+
+
 INTEGRATION_DATA = {
     "Cortex XDR - IR": {
         "name": "Cortex XDR - IR",
@@ -161,5 +210,103 @@ class TestIntegration(unittest.TestCase):
         self.assertDictEqual(data['command_to_integration'], PLAYBOOK_DATA['command_to_integration'])
 
 
+def test_process_id_set_task():
+    """
+    Given
+    - Tasks of different content types.
+
+    When
+    - Processing them in the id_set pool.
+
+    Then
+    - Ensure every task is routed to the processor of its content type.
+    """
+    integration_path = 'Packs/CortexXDR/Integrations/PaloAltoNetworks_XDR'
+    playbook_path = 'Packs/CortexXDR/Playbooks/Cortex_XDR_Incident_Handling.yml'
+
+    assert process_id_set_task((0, 'integrations', integration_path)) == (0, 'integrations', [INTEGRATION_DATA])
+    index, content_type, result = process_id_set_task((1, 'playbooks', playbook_path))
+    assert (index, content_type) == (1, 'playbooks')
+    assert list(result[0].keys()) == ['Cortex XDR Incident Handling']
+
+
+class TestIdSetCache:
+    FILE_PATH = 'Packs/CortexXDR/Integrations/PaloAltoNetworks_XDR/PaloAltoNetworks_XDR.yml'
+
+    def teardown_method(self):
+        init_id_set_cache(None)
+
+    def test_cached_data_is_not_parsed_again(self, tmpdir, mocker):
+        """
+        Given
+        - An integration which was already processed with the id_set cache.
+
+        When
+        - Processing it again.
+
+        Then
+        - Ensure the record is taken from the cache and the yml is not parsed again.
+        """
+        init_id_set_cache(str(tmpdir))
+        assert get_cached_data(get_integration_data, self.FILE_PATH) == INTEGRATION_DATA
+        assert len(tmpdir.listdir()) == 1
+
+        mocker.patch.object(update_id_set, 'get_yaml', side_effect=AssertionError('yml should not be parsed'))
+        assert get_cached_data(get_integration_data, self.FILE_PATH) == INTEGRATION_DATA
+
+    def test_changed_script_package_is_parsed_again(self, tmpdir, monkeypatch):
+        """
+        Given
+        - A package script which was already processed with the id_set cache.
+
+        When
+        - Processing it again after its code was changed.
+
+        Then
+        - Ensure a new record is created and the old one is pruned.
+        """
+        package_dir = tmpdir.mkdir('package')
+        package_dir.join('MyScript.yml').write('commonfields:\n  id: MyScript\nname: MyScript\ntype: python\n')
+        code_file = package_dir.join('MyScript.py')
+        code_file.write('demisto.results("ok")\n')
+        cache_dir = tmpdir.mkdir('cache')
+        init_id_set_cache(str(cache_dir))
+        monkeypatch.chdir(tmpdir)
+
+        assert 'script_executions' not in process_script('package')[0]['MyScript']
+        old_entry = cache_dir.listdir()[0]
+        old_entry.setmtime(old_entry.mtime() - 10)
+
+        code_file.write('demisto.executeCommand("getIncidents", {})\n')
+        data = process_script('package')[0]
+        assert data['MyScript']['script_executions'] == ['getIncidents']
+        assert len(cache_dir.listdir()) == 2
+
+        prune_id_set_cache(str(cache_dir), old_entry.mtime() + 5)
+        assert len(cache_dir.listdir()) == 1
+        assert old_entry not in cache_dir.listdir()
+
+    def test_changed_extractor_is_not_served_from_cache(self, tmpdir, mocker):
+        """
+        Given
+        - An integration which was already processed with the id_set cache.
+
+        When
+        - Processing it again after the id_set extractors were changed.
+
+        Then
+        - Ensure the cached record is not used and the yml is parsed again.
+        """
+        init_id_set_cache(str(tmpdir))
+        get_cached_data(get_integration_data, self.FILE_PATH)
+        old_key = get_cache_key(get_integration_data, [self.FILE_PATH])
+
+        mocker.patch.object(update_id_set, '_id_set_extractor_digest', None)
+        mocker.patch.object(update_id_set, 'ID_SET_CACHE_VERSION', update_id_set.ID_SET_CACHE_VERSION + 1)
+        assert get_cache_key(get_integration_data, [self.FILE_PATH]) != old_key
+        assert get_cached_data(get_integration_data, self.FILE_PATH) == INTEGRATION_DATA
+        assert len(tmpdir.listdir()) == 2
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,3 +1,7 @@
+import sys
+
+from Tests import test_utils
+from Tests.test_utils import get_remote_file, get_yaml
 from Tests.scripts.validate_files import FilesValidator
 # from Tests.scripts.hook_validations.conf_json import ConfJsonValidator
 
@@ -74,3 +78,90 @@ D       Integrations/integration-Recorded_Future.yml'''
     assert len(modified) == 0
     assert len(added) == 0
     assert len(deleted) == 0
+
+
+def validate_file_scheme_mock(self, file_path, file_name):
+    print('Validating ' + file_name)
+    if 'invalid' in file_name:
+        self._is_valid = False
+
+
+def test_run_validations_in_parallel(mocker, capsys):
+    mocker.patch('Tests.scripts.hook_validations.conf_json.ConfJsonValidator.load_conf_file', return_value={})
+    mocker.patch.object(FilesValidator, 'validate_file_scheme', validate_file_scheme_mock)
+    files_args = [('Integrations/{}.yml'.format(name), name) for name in ['first', 'second', 'third']]
+
+    file_validator = FilesValidator(jobs=2)
+    file_validator.run_validations('validate_file_scheme', files_args)
+    assert file_validator._is_valid
+    assert capsys.readouterr().out == 'Validating first\nValidating second\nValidating third\n'
+
+    file_validator.run_validations('validate_file_scheme', files_args + [('Integrations/invalid.yml', 'invalid')])
+    assert not file_validator._is_valid
+
+
+def validate_file_scheme_exit_mock(self, file_path, file_name):
+    print('Validating ' + file_name)
+    if file_name == 'second':
+        sys.exit(1)
+
+
+def test_run_validations_in_parallel_with_exiting_validation(mocker, capsys):
+    mocker.patch('Tests.scripts.hook_validations.conf_json.ConfJsonValidator.load_conf_file', return_value={})
+    mocker.patch.object(FilesValidator, 'validate_file_scheme', validate_file_scheme_exit_mock)
+    files_args = [('Integrations/{}.yml'.format(name), name) for name in ['first', 'second', 'third']]
+
+    file_validator = FilesValidator(jobs=2)
+    file_validator.run_validations('validate_file_scheme', files_args)
+    assert not file_validator._is_valid
+    assert capsys.readouterr().out == 'Validating first\nValidating second\nValidating third\n'
+
+
+def test_get_old_entity_files():
+    modified_files = {
+        'Integrations/integration-Cylance_Protect.yml',
+        ('Scripts/script-OldName.yml', 'Scripts/script-NewName.yml'),
+        'Scripts/FindSimilarIncidentsByText/FindSimilarIncidentsByText.py',
+        'Scripts/FindSimilarIncidentsByText/FindSimilarIncidentsByText.yml',
+        'Beta_Integrations/AWS-Athena/AWS-Athena.yml',
+        'Playbooks/playbook-Phishing.yml'
+    }
+
+    old_entity_files = FilesValidator.get_old_entity_files(modified_files, 'origin/my_branch')
+    assert sorted(old_entity_files['origin/my_branch']) == [
+        'Integrations/integration-Cylance_Protect.yml',
+        'Scripts/FindSimilarIncidentsByText/FindSimilarIncidentsByText.yml',
+        'Scripts/script-OldName.yml'
+    ]
+    assert old_entity_files['master'] == ['Beta_Integrations/AWS-Athena/AWS-Athena.yml']
+
+
+def test_validate_modified_files_without_backward_check(mocker):
+    mocker.patch('Tests.scripts.hook_validations.conf_json.ConfJsonValidator.load_conf_file', return_value={})
+    prefetch_remote_files = mocker.patch('Tests.scripts.validate_files.prefetch_remote_files')
+    mocker.patch.object(FilesValidator, 'validate_modified_file')
+
+    file_validator = FilesValidator()
+    file_validator.validate_modified_files({'Integrations/integration-Cylance_Protect.yml'}, is_backward_check=False)
+    assert not prefetch_remote_files.called
+    file_validator.validate_modified_files({'Integrations/integration-Cylance_Protect.yml'})
+    prefetch_remote_files.assert_called_once_with(['Integrations/integration-Cylance_Protect.yml'], 'master')
+
+
+def validate_remote_file_mock(self, file_path):
+    print('{} {}'.format(file_path, get_remote_file(file_path, 'HEAD')['commonfields']['id']))
+
+
+def test_run_validations_in_parallel_with_remote_files(mocker, capsys):
+    mocker.patch('Tests.scripts.hook_validations.conf_json.ConfJsonValidator.load_conf_file', return_value={})
+    mocker.patch.object(test_utils, '_REMOTE_FILES_CACHE', {})
+    mocker.patch.object(FilesValidator, 'validate_remote_file', validate_remote_file_mock, create=True)
+    # start the `git cat-file` process of the parent before the workers are forked
+    assert get_remote_file('Integrations/Gmail/Gmail.yml', 'HEAD')['commonfields']['id'] == 'Gmail'
+    file_paths = ['Integrations/integration-Cylance_Protect.yml', 'Integrations/Gmail/Gmail.yml',
+                  'Scripts/FindSimilarIncidentsByText/FindSimilarIncidentsByText.yml'] * 4
+
+    file_validator = FilesValidator(jobs=2)
+    file_validator.run_validations('validate_remote_file', [(file_path,) for file_path in file_paths])
+    assert capsys.readouterr().out.splitlines() == [
+        '{} {}'.format(file_path, get_yaml(file_path)['commonfields']['id']) for file_path in file_paths]
@@ -2,7 +2,8 @@ import os
 import re
 import unittest
 
-from Tests.scripts.configure_tests import get_modified_files, get_test_list
+from Tests.scripts.configure_tests import get_modified_files, get_test_list, ReverseDependencies, \
+    enrich_for_integration_id, enrich_for_script_id, enrich_for_playbook_id
 
 FILTER_CONF = "Tests/filter_file.txt"
 
@@ -174,5 +175,76 @@ A       Integrations/Active_Directory_Query/key.pem
         self.assertIn('Integrations/Active_Directory_Query/Active_Directory_Query.yml', files_list)
 
 
+class TestConfigureTests_ReverseDependencies(unittest.TestCase):
+    SCRIPT_SET = [
+        {'ScriptA': {'name': 'ScriptA', 'file_path': 'Scripts/script-ScriptA.yml', 'depends_on': ['my-command'],
+                     'command_to_integration': {'my-command': 'MyIntegration'}, 'tests': ['ScriptA Test']}},
+        {'ScriptB': {'name': 'ScriptB', 'file_path': 'Scripts/script-ScriptB.yml', 'script_executions': ['ScriptA'],
+                     'tests': ['ScriptB Test']}},
+        {'ScriptC': {'name': 'ScriptC', 'file_path': 'Scripts/script-ScriptC.yml',
+                     'script_executions': ['ScriptB', 'ScriptC']}},
+        {'DeprecatedScript': {'name': 'DeprecatedScript', 'file_path': 'Scripts/script-DeprecatedScript.yml',
+                              'script_executions': ['ScriptA'], 'deprecated': True, 'tests': ['Deprecated Test']}},
+        {'OldScript': {'name': 'OldScript', 'file_path': 'Scripts/script-OldScript.yml', 'toversion': '4.0.0',
+                       'script_executions': ['ScriptA'], 'tests': ['OldScript Test']}},
+        {'OtherScript': {'name': 'OtherScript', 'file_path': 'Scripts/script-OtherScript.yml',
+                         'depends_on': ['my-command'], 'command_to_integration': {'my-command': 'OtherIntegration'},
+                         'tests': ['OtherScript Test']}}
+    ]
+    PLAYBOOK_SET = [
+        {'PlaybookA': {'name': 'PlaybookA', 'command_to_integration': {'my-command': ''}, 'tests': ['PlaybookA Test']}},
+        {'PlaybookB': {'name': 'PlaybookB', 'implementing_playbooks': ['PlaybookA', 'PlaybookC'],
+                       'tests': ['PlaybookB Test']}},
+        {'PlaybookC': {'name': 'PlaybookC', 'implementing_playbooks': ['PlaybookB'], 'tests': ['PlaybookC Test']}},
+        {'PlaybookD': {'name': 'PlaybookD', 'implementing_scripts': ['ScriptC']}},
+        {'OtherPlaybook': {'name': 'OtherPlaybook', 'command_to_integration': {'my-command': 'OtherIntegration'},
+                           'implementing_scripts': ['OtherScript'], 'tests': ['OtherPlaybook Test']}}
+    ]
+
+    def setUp(self):
+        self.dependencies = ReverseDependencies(self.SCRIPT_SET, self.PLAYBOOK_SET)
+        self.script_names, self.playbook_names = set([]), set([])
+        self.updated_script_names, self.updated_playbook_names = set([]), set([])
+        self.catched_scripts, self.catched_playbooks, self.tests_set = set([]), set([]), set([])
+
+    def test_changed_integration(self):
+        enrich_for_integration_id('MyIntegration', ('0.0.0', '99.99.99'), ['my-command'], self.dependencies,
+                                  self.playbook_names, self.script_names, self.updated_script_names,
+                                  self.updated_playbook_names, self.catched_scripts, self.catched_playbooks,
+                                  self.tests_set)
+
+        self.assertEqual(self.updated_script_names, {'ScriptA', 'ScriptB', 'ScriptC'})
+        self.assertEqual(self.updated_playbook_names, {'PlaybookA', 'PlaybookB', 'PlaybookC', 'PlaybookD'})
+        self.assertEqual(self.catched_scripts, {'ScriptA', 'ScriptB'})
+        self.assertEqual(self.catched_playbooks, {'PlaybookA', 'PlaybookB', 'PlaybookC'})
+
+    def test_changed_script(self):
+        self.script_names.add('ScriptB')
+        enrich_for_script_id('ScriptB', ('0.0.0', '99.99.99'), self.script_names, self.dependencies,
+                             self.playbook_names, self.updated_script_names, self.updated_playbook_names,
+                             self.catched_scripts, self.catched_playbooks, self.tests_set)
+
+        self.assertEqual(self.updated_script_names, {'ScriptC'})
+        self.assertEqual(self.updated_playbook_names, {'PlaybookD'})
+        self.assertEqual(self.catched_scripts, set([]))
+
+    def test_changed_old_script(self):
+        enrich_for_script_id('ScriptA', ('0.0.0', '3.5.0'), self.script_names, self.dependencies,
+                             self.playbook_names, self.updated_script_names, self.updated_playbook_names,
+                             self.catched_scripts, self.catched_playbooks, self.tests_set)
+
+        self.assertEqual(self.updated_script_names, {'ScriptB', 'ScriptC', 'OldScript'})
+        self.assertEqual(self.updated_playbook_names, {'PlaybookD'})
+        self.assertEqual(self.catched_scripts, {'ScriptB', 'OldScript'})
+
+    def test_changed_playbook(self):
+        self.playbook_names.add('PlaybookA')
+        enrich_for_playbook_id('PlaybookA', ('0.0.0', '99.99.99'), self.playbook_names, self.dependencies,
+                               self.updated_playbook_names, self.catched_playbooks, self.tests_set)
+
+        self.assertEqual(self.updated_playbook_names, {'PlaybookB', 'PlaybookC'})
+        self.assertEqual(self.catched_playbooks, {'PlaybookB', 'PlaybookC'})
+
+
 if __name__ == '__main__':
     unittest.main()
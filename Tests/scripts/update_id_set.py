@@ -4,6 +4,7 @@ import re
 import os
 import glob
 import json
+import hashlib
 import argparse
 from collections import OrderedDict
 from multiprocessing import Pool, cpu_count
@@ -18,9 +19,30 @@ sys.path.append(CONTENT_DIR)
 
 from Tests.scripts.constants import *  # noqa: E402
 from Tests.test_utils import get_yaml, get_to_version, get_from_version, collect_ids, get_script_or_integration_id, \
-    LOG_COLORS, print_color, run_command, print_error, print_warning  # noqa: E402
+    LOG_COLORS, print_color, run_command, print_error, print_warning, get_file_changes, git_diff_name_status  # noqa: E402
 
 
+ID_SET_CACHE_DIR = os.path.join(CONTENT_DIR, 'Tests', '.id_set_cache')
+
+# bump to invalidate every cached id_set record, e.g. when the format of the records changes
+ID_SET_CACHE_VERSION = 1
+
+# sources of the code extracting the id_set records, a change in any of them invalidates the cache
+ID_SET_EXTRACTOR_SOURCES = (
+    os.path.join(SCRIPT_DIR, 'update_id_set.py'),
+    os.path.join(SCRIPT_DIR, 'constants.py'),
+    os.path.join(CONTENT_DIR, 'Tests', 'test_utils.py'),
+)
+
+# number of content paths sent to a worker at once when re-creating the id_set
+ID_SET_CHUNK_SIZE = 16
+
+# directory of the id_set cache used by the current process (None means the cache is disabled)
+_id_set_cache_dir = None
+
+# digest of the cache version and the extractor sources, calculated once per process
+_id_set_extractor_digest = None
+
 CHECKED_TYPES_REGEXES = (
     # Integrations
     INTEGRATION_REGEX,
@@ -46,20 +68,12 @@ def checked_type(file_path, regex_list=CHECKED_TYPES_REGEXES):
 
 
 def get_changed_files(files_string):
-    all_files = files_string.split('\n')
     deleted_files = set([])
     added_files_list = set([])
     added_script_list = set([])
     modified_script_list = set([])
     modified_files_list = set([])
-    for f in all_files:
-        file_data = f.split()
-        if not file_data:
-            continue
-
-        file_status = file_data[0]
-        file_path = file_data[1]
-
+    for file_status, file_path, _ in get_file_changes(files_string):
         if file_status.lower() == 'a' and checked_type(file_path) and not file_path.startswith('.'):
             added_files_list.add(file_path)
         elif file_status.lower() == 'm' and checked_type(file_path) and not file_path.startswith('.'):
@@ -228,6 +242,152 @@ def get_depends_on(data_dict):
     return depends_on_list, command_to_integration
 
 
+def init_id_set_cache(cache_dir):
+    """Set the id_set cache directory of the current process. Used as the initializer of the worker pool.
+
+    Args:
+        cache_dir (str): path to the cache directory, None disables the cache.
+    """
+    global _id_set_cache_dir
+    _id_set_cache_dir = cache_dir
+    if cache_dir and not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            # another worker created it in the meantime
+            if not os.path.isdir(cache_dir):
+                raise
+
+
+def get_extractor_digest():
+    """Calculate the digest of the cache version and the sources of the id_set extractors, so records created by an
+    older version of the extractors are not served from the cache (which is kept between CI builds).
+
+    Returns:
+        str. The hex digest of the extractors.
+    """
+    global _id_set_extractor_digest
+    if _id_set_extractor_digest is None:
+        sha1 = hashlib.sha1()
+        sha1.update(str(ID_SET_CACHE_VERSION).encode('utf-8'))
+        for source_path in ID_SET_EXTRACTOR_SOURCES:
+            with open(source_path, 'rb') as source_file:
+                sha1.update(source_file.read())
+        _id_set_extractor_digest = sha1.hexdigest()
+
+    return _id_set_extractor_digest
+
+
+def get_cache_key(get_data, file_paths):
+    """Calculate the cache key of a data record - sha1 of the extractors digest, the extractor name, the file paths
+    and their content.
+
+    Args:
+        get_data (function): the function extracting the record (get_integration_data, get_script_data...).
+        file_paths (list): paths of all the files the record is extracted from.
+
+    Returns:
+        str. The hex digest of the key.
+    """
+    sha1 = hashlib.sha1()
+    sha1.update(get_extractor_digest().encode('utf-8'))
+    sha1.update(get_data.__name__.encode('utf-8'))
+    for file_path in file_paths:
+        sha1.update('\n{}\n'.format(file_path).encode('utf-8'))
+        with open(file_path, 'rb') as content_file:
+            sha1.update(content_file.read())
+
+    return sha1.hexdigest()
+
+
+def load_cached_data(cache_key):
+    """Load a record from the id_set cache of the current process.
+
+    Args:
+        cache_key (str): the key of the record.
+
+    Returns:
+        dict. The cached record, None if the cache is disabled or the record is not in it.
+    """
+    if not _id_set_cache_dir:
+        return None
+
+    cache_path = os.path.join(_id_set_cache_dir, cache_key + '.json')
+    if not os.path.isfile(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'r') as cache_file:
+            data = json.load(cache_file, object_pairs_hook=OrderedDict)
+        # mark the entry as used, so it will not be pruned at the end of the run
+        os.utime(cache_path, None)
+    except (IOError, OSError, ValueError):
+        # corrupted entry, the file will be parsed again
+        return None
+
+    return data
+
+
+def store_cached_data(cache_key, data):
+    """Store a record in the id_set cache of the current process.
+
+    Every record is stored in its own file, so the workers of the pool can use the cache without any coordination.
+
+    Args:
+        cache_key (str): the key of the record.
+        data (dict): the record.
+    """
+    if not _id_set_cache_dir:
+        return
+
+    cache_path = os.path.join(_id_set_cache_dir, cache_key + '.json')
+    tmp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    with open(tmp_path, 'w') as cache_file:
+        json.dump(data, cache_file)
+    try:
+        os.rename(tmp_path, cache_path)
+    except OSError:
+        # the entry was written by another worker
+        os.remove(tmp_path)
+
+
+def get_cached_data(get_data, file_path):
+    """Get the id_set record of a yml file, parsing the file only if its content is not in the id_set cache.
+
+    Args:
+        get_data (function): the function extracting the record (get_integration_data, get_script_data...).
+        file_path (str): path to the yml file.
+
+    Returns:
+        dict. The id_set record of the file.
+    """
+    if not _id_set_cache_dir:
+        return get_data(file_path)
+
+    cache_key = get_cache_key(get_data, [file_path])
+    data = load_cached_data(cache_key)
+    if data is None:
+        data = get_data(file_path)
+        store_cached_data(cache_key, data)
+
+    return data
+
+
+def prune_id_set_cache(cache_dir, start_time):
+    """Remove the cache entries that were not used since the given time (deleted or changed files).
+
+    Args:
+        cache_dir (str): path to the cache directory.
+        start_time (float): the time the id_set creation started.
+    """
+    for cache_path in glob.glob(os.path.join(cache_dir, '*.json')):
+        try:
+            if os.path.getmtime(cache_path) < start_time - 1:
+                os.remove(cache_path)
+        except OSError:
+            pass
+
+
 def update_object_in_id_set(obj_id, obj_data, file_path, instances_set):
     change_string = run_command("git diff HEAD {0}".format(file_path))
     is_added_from_version = True if re.search(r'\+fromversion: .*', change_string) else False
@@ -322,7 +482,7 @@ def process_integration(file_path):
     if os.path.isfile(file_path):
         if checked_type(file_path, (INTEGRATION_REGEX, BETA_INTEGRATION_REGEX, PACKS_INTEGRATION_REGEX)):
             print("adding {0} to id_set".format(file_path))
-            res.append(get_integration_data(file_path))
+            res.append(get_cached_data(get_integration_data, file_path))
     else:
         # package integration
         package_name = os.path.basename(file_path)
@@ -330,7 +490,7 @@ def process_integration(file_path):
         if os.path.isfile(file_path):
             # locally, might have leftover dirs without committed files
             print("adding {0} to id_set".format(file_path))
-            res.append(get_integration_data(file_path))
+            res.append(get_cached_data(get_integration_data, file_path))
 
     return res
 
@@ -340,12 +500,22 @@ def process_script(file_path):
     if os.path.isfile(file_path):
         if checked_type(file_path, (SCRIPT_REGEX, PACKS_SCRIPT_YML_REGEX)):
             print("adding {0} to id_set".format(file_path))
-            res.append(get_script_data(file_path))
+            res.append(get_cached_data(get_script_data, file_path))
     else:
         # package script
-        yml_path, code = get_script_package_data(file_path)
         print("adding {0} to id_set".format(file_path))
-        res.append(get_script_data(yml_path, script_code=code))
+        # the record depends on both the yml and the code, so every file of the package is a part of the key
+        cache_key = None
+        if _id_set_cache_dir:
+            package_files = sorted(path for path in glob.glob(os.path.join(file_path, '*')) if os.path.isfile(path))
+            cache_key = get_cache_key(get_script_data, package_files)
+        data = load_cached_data(cache_key) if cache_key else None
+        if data is None:
+            yml_path, code = get_script_package_data(file_path)
+            data = get_script_data(yml_path, script_code=code)
+            if cache_key:
+                store_cached_data(cache_key, data)
+        res.append(data)
 
     return res
 
@@ -354,7 +524,7 @@ def process_playbook(file_path):
     res = []
     if checked_type(file_path, (PACKS_PLAYBOOK_YML_REGEX, PLAYBOOK_REGEX, BETA_PLAYBOOK_REGEX)):
         print('adding {0} to id_set'.format(file_path))
-        res.append(get_playbook_data(file_path))
+        res.append(get_cached_data(get_playbook_data, file_path))
     return res
 
 
@@ -372,16 +542,31 @@ def process_test_playbook_path(file_path):
     script = None
     playbook = None
     if checked_type(file_path, (TEST_SCRIPT_REGEX, PACKS_TEST_PLAYBOOKS_REGEX, TEST_PLAYBOOK_REGEX)):
+        if _id_set_cache_dir:
+            # avoid parsing the yml just to tell if it is a script or a playbook
+            script = load_cached_data(get_cache_key(get_script_data, [file_path]))
+            playbook = load_cached_data(get_cache_key(get_playbook_data, [file_path])) if script is None else None
+            if script is not None or playbook is not None:
+                return playbook, script
+
         yml_data = get_yaml(file_path)
         if 'commonfields' in yml_data:
             # script files contain this key
-            script = get_script_data(file_path)
+            script = get_cached_data(get_script_data, file_path)
         else:
-            playbook = get_playbook_data(file_path)
+            playbook = get_cached_data(get_playbook_data, file_path)
 
     return playbook, script
 
 
+ID_SET_PROCESSORS = {
+    'integrations': process_integration,
+    'playbooks': process_playbook,
+    'scripts': process_script,
+    'TestPlaybooks': process_test_playbook_path,
+}
+
+
 def get_integrations_paths():
     path_list = [
         ['Integrations', '*'],
@@ -433,34 +618,80 @@ def get_test_playbooks_paths():
     return test_playbook_files
 
 
-def re_create_id_set():
+def process_id_set_task(task):
+    """Process a single content path of the id_set creation. Used as the worker function of the pool.
+
+    Arguments:
+        task {tuple} -- (index, content type, path) where content type is one of ID_SET_PROCESSORS keys
+
+    Returns:
+        tuple -- (index, content type, result of the content type processor)
+    """
+    index, content_type, file_path = task
+    return index, content_type, ID_SET_PROCESSORS[content_type](file_path)
+
+
+def get_id_set_tasks():
+    """Collect the paths of all the content entities which are a part of the id_set.
+
+    Returns:
+        list -- (index, content type, path) tuples, the index keeps the results in the original order
+    """
+    paths_by_type = (
+        ('integrations', get_integrations_paths()),
+        ('playbooks', get_playbooks_paths()),
+        ('scripts', get_scripts_paths()),
+        ('TestPlaybooks', get_test_playbooks_paths()),
+    )
+    tasks = []
+    for content_type, paths in paths_by_type:
+        for file_path in paths:
+            tasks.append((len(tasks), content_type, file_path))
+
+    return tasks
+
+
+def re_create_id_set(cache_dir=ID_SET_CACHE_DIR, workers=None):
+    """Create the id_set.json from scratch.
+
+    All the content paths go through a single pool pipeline, so no content type waits for the slowest file of
+    another one.
+
+    Args:
+        cache_dir (str): directory of the id_set cache, files which did not change since the last run are not
+            parsed again. None disables the cache.
+        workers (int): number of worker processes, defaults to the number of CPUs.
+    """
     start_time = time.time()
     scripts_list = []
     playbooks_list = []
     integration_list = []
     testplaybooks_list = []
 
-    pool = Pool(processes=cpu_count() * 2)
-
     print_color("Starting the creation of the id_set", LOG_COLORS.GREEN)
-    print_color("Starting iterating over Integrations", LOG_COLORS.GREEN)
-    for arr in pool.map(process_integration, get_integrations_paths()):
-        integration_list.extend(arr)
-
-    print_color("Starting iterating over Playbooks", LOG_COLORS.GREEN)
-    for arr in pool.map(process_playbook, get_playbooks_paths()):
-        playbooks_list.extend(arr)
-
-    print_color("Starting iterating over Scripts", LOG_COLORS.GREEN)
-    for arr in pool.map(process_script, get_scripts_paths()):
-        scripts_list.extend(arr)
-
-    print_color("Starting iterating over TestPlaybooks", LOG_COLORS.GREEN)
-    for pair in pool.map(process_test_playbook_path, get_test_playbooks_paths()):
-        if pair[0]:
-            testplaybooks_list.append(pair[0])
-        if pair[1]:
-            scripts_list.append(pair[1])
+    tasks = get_id_set_tasks()
+    init_id_set_cache(cache_dir)
+    pool = Pool(processes=workers or cpu_count(), initializer=init_id_set_cache, initargs=(cache_dir,))
+    try:
+        # results arrive as soon as they are ready, sort them back so the id_set does not depend on scheduling
+        results = sorted(pool.imap_unordered(process_id_set_task, tasks, chunksize=ID_SET_CHUNK_SIZE))
+    finally:
+        pool.close()
+        pool.join()
+
+    for _, content_type, result in results:
+        if content_type == 'integrations':
+            integration_list.extend(result)
+        elif content_type == 'playbooks':
+            playbooks_list.extend(result)
+        elif content_type == 'scripts':
+            scripts_list.extend(result)
+        else:
+            playbook, script = result
+            if playbook:
+                testplaybooks_list.append(playbook)
+            if script:
+                scripts_list.append(script)
 
     new_ids_dict = OrderedDict()
     # we sort each time the whole set in case someone manually changed something
@@ -472,6 +703,8 @@ def re_create_id_set():
 
     with open('./Tests/id_set.json', 'w') as id_set_file:
         json.dump(new_ids_dict, id_set_file, indent=4)
+    if cache_dir:
+        prune_id_set_cache(cache_dir, start_time)
     exec_time = time.time() - start_time
     print_color("Finished the creation of the id_set. Total time: {} seconds".format(exec_time), LOG_COLORS.GREEN)
 
@@ -481,74 +714,96 @@ def re_create_id_set():
 
 
 def find_duplicates(id_set):
-    scripts = id_set['scripts']
-    script_ids = set(list(script.keys())[0] for script in scripts)
+    """Find the duplicated IDs in every section of the id_set.
 
-    scripts_list = []
-    for script_id in script_ids:
-        if has_duplicate(scripts, script_id):
-            scripts_list.append(script_id)
+    Returns:
+        tuple. Lists of the duplicated scripts, integrations, playbooks and test playbooks IDs.
+    """
+    return tuple(get_duplicate_ids(id_set[section]) for section in
+                 ('scripts', 'integrations', 'playbooks', 'TestPlaybooks'))
 
-    integrations = id_set['integrations']
-    integration_ids = set(list(integration.keys())[0] for integration in integrations)
 
-    integration_list = []
-    for integration_id in integration_ids:
-        if has_duplicate(integrations, integration_id):
-            integration_list.append(integration_id)
+def get_version_key(version):
+    """Parse a content version once, to a key which compares the same as LooseVersion.
 
-    playbooks = id_set['playbooks']
-    playbook_ids = set(list(playbook.keys())[0] for playbook in playbooks)
+    Args:
+        version (str): version string, e.g. '4.5.0'.
 
-    playbooks_list = []
-    for playbook_id in playbook_ids:
-        if has_duplicate(playbooks, playbook_id):
-            integration_list.append(playbook_id)
+    Returns:
+        tuple. The comparable version key, e.g. (4, 5, 0).
+    """
+    return tuple(LooseVersion(str(version)).version)
 
-    test_playbooks = id_set['TestPlaybooks']
-    test_playbook_ids = set(list(test_playbook.keys())[0] for test_playbook in test_playbooks)
 
-    test_playbooks_list = []
-    for test_playbook_id in test_playbook_ids:
-        if has_duplicate(test_playbooks, test_playbook_id):
-            test_playbooks_list.append(test_playbook_id)
+def get_duplicate_ids(id_set_section):
+    """Find the IDs which appear more than once in a section of the id_set with overlapping versions.
 
-    return scripts_list, integration_list, playbooks_list, test_playbooks_list
+    The entities are grouped by ID in a single pass, and each group is checked with a sort-and-sweep over its
+    [fromversion, toversion) ranges, so the whole section is checked in O(N log N).
 
+    Args:
+        id_set_section (list): the entities of an id_set section, each is a dict of {id: data}.
 
-def has_duplicate(id_set, id_to_check):
-    duplicates = [duplicate for duplicate in id_set if duplicate.get(id_to_check)]
-
-    if len(duplicates) < 2:
-        return False
-
-    for dup1, dup2 in itertools.combinations(duplicates, 2):
-        dict1 = list(dup1.values())[0]
-        dict2 = list(dup2.values())[0]
-        dict1_from_version = LooseVersion(dict1.get('fromversion', '0.0.0'))
-        dict2_from_version = LooseVersion(dict2.get('fromversion', '0.0.0'))
-        dict1_to_version = LooseVersion(dict1.get('toversion', '99.99.99'))
-        dict2_to_version = LooseVersion(dict2.get('toversion', '99.99.99'))
-
-        if dict1['name'] != dict2['name']:
-            print_warning('The following objects has the same ID but different names: '
-                          '"{}", "{}".'.format(dict1['name'], dict2['name']))
-
-        # A: 3.0.0 - 3.6.0
-        # B: 3.5.0 - 4.5.0
-        # C: 3.5.2 - 3.5.4
-        # D: 4.5.0 - 99.99.99
-        if any([
-                dict1_from_version <= dict2_from_version < dict1_to_version,  # will catch (B, C), (A, B), (A, C)
-                dict1_from_version < dict2_to_version <= dict1_to_version,  # will catch (B, C), (A, C)
-                dict2_from_version <= dict1_from_version < dict2_to_version,  # will catch (C, B), (B, A), (C, A)
-                dict2_from_version < dict1_to_version <= dict2_to_version,  # will catch (C, B), (C, A)
-        ]):
+    Returns:
+        list. The duplicated IDs, in the order of their first appearance in the section.
+    """
+    id_to_entities = OrderedDict()  # type: OrderedDict
+    for entity in id_set_section:
+        for entity_id, entity_data in entity.items():
+            id_to_entities.setdefault(entity_id, []).append(entity_data)
+
+    return [entity_id for entity_id, entities in id_to_entities.items()
+            if len(entities) > 1 and is_versions_overlap(entities)]
+
+
+def is_versions_overlap(entities):
+    """Check if the version ranges of entities with the same ID overlap.
+
+    Args:
+        entities (list): the data of the entities (name, fromversion, toversion...).
+
+    Returns:
+        bool. Whether any two entities are available in the same server version.
+    """
+    names = sorted(set(entity['name'] for entity in entities))
+    for name1, name2 in itertools.combinations(names, 2):
+        print_warning('The following objects has the same ID but different names: '
+                      '"{}", "{}".'.format(name1, name2))
+
+    # A: 3.0.0 - 3.6.0
+    # B: 3.5.0 - 4.5.0
+    # C: 3.5.2 - 3.5.4
+    # D: 4.5.0 - 99.99.99
+    # E: 4.5.0 - 4.5.0
+    # sorted by fromversion, a range overlaps a previous one if it starts before the latest end seen so far,
+    # which will catch (A, B), (A, C), (B, C) and not (B, D). An empty range overlaps a non-empty range it is
+    # within or at the boundary of, which will catch (B, E), (E, D), but not another empty range.
+    version_ranges = sorted((get_version_key(entity.get('fromversion', '0.0.0')),
+                             get_version_key(entity.get('toversion', '99.99.99'))) for entity in entities)
+    max_to_version = None
+    prev_from_version = None
+    for from_version, to_version in version_ranges:
+        if from_version < to_version:
+            # an empty range which starts at the same version is sorted right before this one
+            if from_version == prev_from_version or (max_to_version is not None and from_version < max_to_version):
+                return True
+
+            max_to_version = to_version if max_to_version is None else max(max_to_version, to_version)
+
+        elif max_to_version is not None and from_version <= max_to_version:
             return True
 
+        prev_from_version = from_version
+
     return False
 
 
+def has_duplicate(id_set, id_to_check):
+    duplicates = [list(duplicate.values())[0] for duplicate in id_set if duplicate.get(id_to_check)]
+
+    return len(duplicates) > 1 and is_versions_overlap(duplicates)
+
+
 def sort(data):
     data.sort(key=lambda r: list(r.keys())[0].lower())  # Sort data by key value
     return data
@@ -560,10 +815,8 @@ def update_id_set():
     branch_name = branch_name_reg.group(1)
 
     print("Getting added files")
-    files_string = run_command("git diff --name-status HEAD")
-    second_files_string = run_command("git diff --name-status origin/master...{}".format(branch_name))
-    added_files, modified_files, added_scripts, modified_scripts = \
-        get_changed_files(files_string + '\n' + second_files_string)
+    changed_files = git_diff_name_status('HEAD') + git_diff_name_status('origin/master...{}'.format(branch_name))
+    added_files, modified_files, added_scripts, modified_scripts = get_changed_files(changed_files)
 
     if added_files or modified_files or added_scripts or modified_scripts:
         print("Updating id_set.json")
@@ -668,11 +921,17 @@ def update_id_set():
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Utility CircleCI usage')
     parser.add_argument('-r', '--reCreate', action='store_true', help='Is re-create id_set or update it')
+    parser.add_argument('--cacheDir', default=ID_SET_CACHE_DIR,
+                        help='Directory of the cache used for re-creating the id_set')
+    parser.add_argument('--noCache', action='store_true', help='Re-create the id_set without using the cache')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of processes used for re-creating the id_set (default: number of CPUs)')
     options = parser.parse_args()
+    cache_dir = None if options.noCache else options.cacheDir
 
     if options.reCreate:
         print("Re creating the id_set.json")
-        re_create_id_set()
+        re_create_id_set(cache_dir, options.workers)
 
     else:
         if os.path.isfile('./Tests/id_set.json'):
@@ -680,4 +939,4 @@ if __name__ == '__main__':
             update_id_set()
         else:
             print("./Tests/id_set.json is missing. Recreating...")
-            re_create_id_set()
+            re_create_id_set(cache_dir, options.workers)
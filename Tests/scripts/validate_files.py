@@ -18,8 +18,14 @@ import glob
 import logging
 import argparse
 import subprocess
+from multiprocessing import Pool
 import yaml
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../..')
 sys.path.append(CONTENT_DIR)
@@ -37,7 +43,44 @@ from Tests.scripts.hook_validations.incident_field import IncidentFieldValidator
 from Tests.scripts.hook_validations.pack_unique_files import PackUniqueFilesValidator  # noqa: E402
 from Tests.scripts.hook_validations.docker import DockerImageValidator  # noqa: E402
 from Tests.test_utils import checked_type, run_command, print_error, print_warning, print_color, LOG_COLORS, \
-    get_yaml, filter_packagify_changes, collect_ids, str2bool, is_file_path_in_pack, get_pack_name  # noqa: E402
+    get_yaml, filter_packagify_changes, collect_ids, str2bool, is_file_path_in_pack, get_pack_name, \
+    prefetch_remote_files, get_file_changes, git_diff_name_status, git_objects  # noqa: E402
+
+# the files validator of a validation worker process
+_worker_files_validator = None
+
+
+def init_validation_worker(files_validator):
+    global _worker_files_validator
+    _worker_files_validator = files_validator
+    # the `git cat-file` process of the parent is inherited with its pipes - sharing it between the workers would mix
+    # their lookups, so every worker starts its own process on its first lookup
+    git_objects.process = None
+
+
+def run_file_validation(task):
+    """Run a validation of a single file in a validation worker process.
+
+    Args:
+        task (tuple): The name of the FilesValidator method to run and its arguments.
+
+    Returns:
+        tuple. Whether the file is valid and the output of its validation.
+    """
+    method_name, args = task
+    _worker_files_validator._is_valid = True
+    stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        getattr(_worker_files_validator, method_name)(*args)
+    except SystemExit:
+        # a pool worker which exits loses its task and leaves the parent waiting for it, so a file whose validation
+        # exits (e.g. run_command on a git error) is reported as invalid instead
+        _worker_files_validator._is_valid = False
+    finally:
+        sys.stdout = stdout
+
+    return _worker_files_validator._is_valid, output.getvalue()
 
 
 class FilesValidator(object):
@@ -51,12 +94,14 @@ class FilesValidator(object):
         print_ignored_files (bool): should print ignored files when iterating over changed files.
         conf_json_validator (ConfJsonValidator): object for validating the conf.json file.
         id_set_validator (IDSetValidator): object for validating the id_set.json file(Created in Circle only).
+        jobs (int): number of processes to validate the files with.
     """
 
-    def __init__(self, is_circle=False, print_ignored_files=False):
+    def __init__(self, is_circle=False, print_ignored_files=False, jobs=1):
         self._is_valid = True
         self.is_circle = is_circle
         self.print_ignored_files = print_ignored_files
+        self.jobs = jobs
 
         self.conf_json_validator = ConfJsonValidator()
         self.id_set_validator = IDSetValidator(is_circle)
@@ -79,29 +124,23 @@ class FilesValidator(object):
         """Get lists of the modified files in your branch according to the files string.
 
         Args:
-            files_string (string): String that was calculated by git using `git diff` command.
+            files_string (string|list): String that was calculated by git using `git diff` command, or its
+                GitFileChange records.
             tag (string): String of git tag used to update modified files.
             print_ignored_files (bool): should print ignored files.
 
         Returns:
             (modified_files_list, added_files_list, deleted_files). Tuple of sets.
         """
-        all_files = files_string.split('\n')
         deleted_files = set([])
         added_files_list = set([])
         modified_files_list = set([])
         old_format_files = set([])
-        for f in all_files:
-            file_data = f.split()
-            if not file_data:
-                continue
-
-            file_status = file_data[0]
-            file_path = file_data[1]
+        for file_status, changed_file_path, old_file_path in get_file_changes(files_string):
+            file_path = changed_file_path
 
             if file_status.lower().startswith('r'):
                 file_status = 'r'
-                file_path = file_data[2]
 
             if checked_type(file_path, CODE_FILES_REGEX) and file_status.lower() != 'd' \
                     and not file_path.endswith('_test.py'):
@@ -121,10 +160,10 @@ class FilesValidator(object):
                 deleted_files.add(file_path)
             elif file_status.lower().startswith('r') and checked_type(file_path):
                 # if a code file changed, take the associated yml file.
-                if checked_type(file_data[2], CODE_FILES_REGEX):
+                if checked_type(changed_file_path, CODE_FILES_REGEX):
                     modified_files_list.add(file_path)
                 else:
-                    modified_files_list.add((file_data[1], file_data[2]))
+                    modified_files_list.add((old_file_path, changed_file_path))
 
             elif checked_type(file_path, [SCHEMA_REGEX]):
                 modified_files_list.add(file_path)
@@ -158,24 +197,22 @@ class FilesValidator(object):
         # Two dots is the default in git diff, it will compare with the last known commit as the base
         # Three dots will compare with the last known shared commit as the base
         compare_type = '.' if 'master' in tag else ''
-        all_changed_files_string = run_command(
-            'git diff --name-status {tag}..{compare_type}refs/heads/{branch}'.format(tag=tag,
-                                                                                     branch=branch_name,
-                                                                                     compare_type=compare_type))
+        all_changed_files = git_diff_name_status(
+            '{tag}..{compare_type}refs/heads/{branch}'.format(tag=tag, branch=branch_name, compare_type=compare_type))
         modified_files, added_files, _, old_format_files = self.get_modified_files(
-            all_changed_files_string,
+            all_changed_files,
             tag=tag,
             print_ignored_files=self.print_ignored_files)
 
         if not is_circle:
-            files_string = run_command('git diff --name-status --no-merges HEAD')
+            non_committed_files = git_diff_name_status('--no-merges', 'HEAD')
             non_committed_modified_files, non_committed_added_files, non_committed_deleted_files, \
-                non_committed_old_format_files = self.get_modified_files(files_string,
+                non_committed_old_format_files = self.get_modified_files(non_committed_files,
                                                                          print_ignored_files=self.print_ignored_files)
 
-            all_changed_files_string = run_command('git diff --name-status {}'.format(tag))
+            all_changed_files = git_diff_name_status(tag)
             modified_files_from_tag, added_files_from_tag, _, _ = \
-                self.get_modified_files(all_changed_files_string, print_ignored_files=self.print_ignored_files)
+                self.get_modified_files(all_changed_files, print_ignored_files=self.print_ignored_files)
 
             old_format_files = old_format_files.union(non_committed_old_format_files)
             modified_files = modified_files.union(
@@ -204,113 +241,197 @@ class FilesValidator(object):
 
         return packs
 
-    def validate_modified_files(self, modified_files, is_backward_check=True, old_branch='master'):
-        """Validate the modified files from your branch.
+    def run_validations(self, method_name, files_args):
+        """Run a validation method over files, in a process pool when more than one job is used.
 
-        In case we encounter an invalid file we set the self._is_valid param to False.
+        The output of each file is printed in the order of the files, and an invalid file sets the self._is_valid
+        param to False, same as when running in a single process.
+
+        Args:
+            method_name (str): The name of the method which validates a single file.
+            files_args (list): The arguments of the method for each of the files.
+        """
+        if self.jobs <= 1 or len(files_args) <= 1:
+            for args in files_args:
+                getattr(self, method_name)(*args)
+            return
+
+        pool = Pool(min(self.jobs, len(files_args)), initializer=init_validation_worker, initargs=(self,))
+        try:
+            for is_valid, output in pool.imap(run_file_validation, [(method_name, args) for args in files_args]):
+                sys.stdout.write(output)
+                if not is_valid:
+                    self._is_valid = False
+        finally:
+            pool.close()
+            pool.join()
+
+    @staticmethod
+    def get_old_entity_files(modified_files, old_branch='master'):
+        """Get the old paths of the modified files which are compared to their previous version.
+
+        The paths and branches match the ones the validators of validate_modified_file request.
 
         Args:
             modified_files (set): A set of the modified files in the current branch.
-            is_backward_check (bool): When set to True will run backward compatibility checks
             old_branch (str): Old git branch to compare backward compatibility check to
+
+        Returns:
+            dict. The paths of the files in the old branch, by the branch they are compared to.
         """
+        old_entity_files = {}  # type: dict
         for file_path in modified_files:
             old_file_path = None
-
             if isinstance(file_path, tuple):
                 old_file_path, file_path = file_path
 
-            is_python_file = FilesValidator.is_py_script_or_integration(file_path)
+            tag = old_branch
+            if any(re.match(regex, file_path, re.IGNORECASE) for regex in
+                   (INTEGRATION_REGEX, INTEGRATION_YML_REGEX, SCRIPT_REGEX, INCIDENT_FIELD_REGEX)):
+                old_file_path = old_file_path or file_path
 
-            print('Validating {}'.format(file_path))
-            if not checked_type(file_path):
-                print_warning('- Skipping validation of non-content entity file.')
+            elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
+                    re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
+                # beta integrations are compared to master
+                tag = 'master'
+                old_file_path = old_file_path or file_path
+
+            elif re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
+                    re.match(SCRIPT_PY_REGEX, file_path, re.IGNORECASE) or \
+                    re.match(SCRIPT_JS_REGEX, file_path, re.IGNORECASE):
+                # package scripts are compared through the yml of the package
+                yml_files = glob.glob(os.path.join(os.path.dirname(file_path), '*.yml'))
+                old_file_path = old_file_path or (yml_files[0] if yml_files else None)
+
+            else:
                 continue
 
-            structure_validator = StructureValidator(file_path, is_added_file=not (False or is_backward_check),
-                                                     is_renamed=old_file_path is not None)
-            if not structure_validator.is_file_valid():
-                self._is_valid = False
+            if old_file_path and old_file_path not in old_entity_files.get(tag, []):
+                old_entity_files.setdefault(tag, []).append(old_file_path)
+
+        return old_entity_files
+
+    def validate_modified_files(self, modified_files, is_backward_check=True, old_branch='master'):
+        """Validate the modified files from your branch.
+
+        In case we encounter an invalid file we set the self._is_valid param to False.
+
+        Args:
+            modified_files (set): A set of the modified files in the current branch.
+            is_backward_check (bool): When set to True will run backward compatibility checks
+            old_branch (str): Old git branch to compare backward compatibility check to
+        """
+        if is_backward_check:
+            for tag, old_entity_files in self.get_old_entity_files(modified_files, old_branch).items():
+                prefetch_remote_files(old_entity_files, tag)
+
+        self.run_validations('validate_modified_file',
+                             [(file_path, is_backward_check, old_branch) for file_path in modified_files])
+
+    def validate_modified_file(self, file_path, is_backward_check=True, old_branch='master'):
+        """Validate a modified file from your branch.
+
+        Args:
+            file_path (str|tuple): The modified file, or a tuple of its old and new paths if it was renamed.
+            is_backward_check (bool): When set to True will run backward compatibility checks
+            old_branch (str): Old git branch to compare backward compatibility check to
+        """
+        old_file_path = None
+
+        if isinstance(file_path, tuple):
+            old_file_path, file_path = file_path
+
+        is_python_file = FilesValidator.is_py_script_or_integration(file_path)
+
+        print('Validating {}'.format(file_path))
+        if not checked_type(file_path):
+            print_warning('- Skipping validation of non-content entity file.')
+            return
+
+        structure_validator = StructureValidator(file_path, is_added_file=not (False or is_backward_check),
+                                                 is_renamed=old_file_path is not None)
+        if not structure_validator.is_file_valid():
+            self._is_valid = False
+
+        if not self.id_set_validator.is_file_valid_in_set(file_path):
+            self._is_valid = False
 
-            if not self.id_set_validator.is_file_valid_in_set(file_path):
+        elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
+                re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
+
+            image_validator = ImageValidator(file_path)
+            if not image_validator.is_valid():
                 self._is_valid = False
 
-            elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
+            description_validator = DescriptionValidator(file_path)
+            if not description_validator.is_valid():
+                self._is_valid = False
 
-                image_validator = ImageValidator(file_path)
-                if not image_validator.is_valid():
-                    self._is_valid = False
+            integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path,
+                                                         old_git_branch=old_branch)
+            if is_backward_check and not integration_validator.is_backward_compatible():
+                self._is_valid = False
+            if not integration_validator.is_valid_integration():
+                self._is_valid = False
 
-                description_validator = DescriptionValidator(file_path)
-                if not description_validator.is_valid():
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
-                integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path,
-                                                             old_git_branch=old_branch)
-                if is_backward_check and not integration_validator.is_backward_compatible():
-                    self._is_valid = False
-                if not integration_validator.is_valid_integration():
+        elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
+                re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
+            description_validator = DescriptionValidator(file_path)
+            if not description_validator.is_valid_beta_description():
+                self._is_valid = False
+            integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path)
+            if not integration_validator.is_valid_beta_integration():
+                self._is_valid = False
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
+        elif re.match(SCRIPT_REGEX, file_path, re.IGNORECASE):
+            script_validator = ScriptValidator(file_path, old_file_path=old_file_path, old_git_branch=old_branch)
+            if is_backward_check and not script_validator.is_backward_compatible():
+                self._is_valid = False
+            if not script_validator.is_valid_script():
+                self._is_valid = False
 
-            elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
-                description_validator = DescriptionValidator(file_path)
-                if not description_validator.is_valid_beta_description():
-                    self._is_valid = False
-                integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path)
-                if not integration_validator.is_valid_beta_integration():
-                    self._is_valid = False
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
-
-            elif re.match(SCRIPT_REGEX, file_path, re.IGNORECASE):
-                script_validator = ScriptValidator(file_path, old_file_path=old_file_path, old_git_branch=old_branch)
-                if is_backward_check and not script_validator.is_backward_compatible():
-                    self._is_valid = False
-                if not script_validator.is_valid_script():
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=True,
+                                                              is_integration=False)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True,
-                                                                  is_integration=False)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
+        elif re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
+                re.match(SCRIPT_PY_REGEX, file_path, re.IGNORECASE) or \
+                re.match(SCRIPT_JS_REGEX, file_path, re.IGNORECASE):
 
-            elif re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(SCRIPT_PY_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(SCRIPT_JS_REGEX, file_path, re.IGNORECASE):
+            yml_path, _ = get_script_package_data(os.path.dirname(file_path))
+            script_validator = ScriptValidator(yml_path, old_file_path=old_file_path, old_git_branch=old_branch)
+            if is_backward_check and not script_validator.is_backward_compatible():
+                self._is_valid = False
 
-                yml_path, _ = get_script_package_data(os.path.dirname(file_path))
-                script_validator = ScriptValidator(yml_path, old_file_path=old_file_path, old_git_branch=old_branch)
-                if is_backward_check and not script_validator.is_backward_compatible():
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=True,
+                                                              is_integration=False)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True,
-                                                                  is_integration=False)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
-
-            elif re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
-                image_validator = ImageValidator(file_path)
-                if not image_validator.is_valid():
-                    self._is_valid = False
+        elif re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
+            image_validator = ImageValidator(file_path)
+            if not image_validator.is_valid():
+                self._is_valid = False
 
-            elif re.match(INCIDENT_FIELD_REGEX, file_path, re.IGNORECASE):
-                incident_field_validator = IncidentFieldValidator(file_path, old_file_path=old_file_path,
-                                                                  old_git_branch=old_branch)
-                if not incident_field_validator.is_valid():
-                    self._is_valid = False
-                if is_backward_check and not incident_field_validator.is_backward_compatible():
-                    self._is_valid = False
+        elif re.match(INCIDENT_FIELD_REGEX, file_path, re.IGNORECASE):
+            incident_field_validator = IncidentFieldValidator(file_path, old_file_path=old_file_path,
+                                                              old_git_branch=old_branch)
+            if not incident_field_validator.is_valid():
+                self._is_valid = False
+            if is_backward_check and not incident_field_validator.is_backward_compatible():
+                self._is_valid = False
 
     def validate_added_files(self, added_files):
         """Validate the added files from your branch.
@@ -320,82 +441,89 @@ class FilesValidator(object):
         Args:
             added_files (set): A set of the modified files in the current branch.
         """
-        for file_path in added_files:
-            is_python_file = FilesValidator.is_py_script_or_integration(file_path)
-            print('Validating {}'.format(file_path))
+        self.run_validations('validate_added_file', [(file_path,) for file_path in added_files])
 
-            structure_validator = StructureValidator(file_path, is_added_file=True)
-            if not structure_validator.is_file_valid():
-                self._is_valid = False
+    def validate_added_file(self, file_path):
+        """Validate an added file from your branch.
 
-            if not self.id_set_validator.is_file_valid_in_set(file_path):
-                self._is_valid = False
-
-            if self.id_set_validator.is_file_has_used_id(file_path):
-                self._is_valid = False
+        Args:
+            file_path (str): The added file.
+        """
+        is_python_file = FilesValidator.is_py_script_or_integration(file_path)
+        print('Validating {}'.format(file_path))
 
-            if re.match(TEST_PLAYBOOK_REGEX, file_path, re.IGNORECASE):
-                if not self.conf_json_validator.is_test_in_conf_json(collect_ids(file_path)):
-                    self._is_valid = False
+        structure_validator = StructureValidator(file_path, is_added_file=True)
+        if not structure_validator.is_file_valid():
+            self._is_valid = False
 
-            elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
+        if not self.id_set_validator.is_file_valid_in_set(file_path):
+            self._is_valid = False
 
-                image_validator = ImageValidator(file_path)
-                if not image_validator.is_valid():
-                    self._is_valid = False
+        if self.id_set_validator.is_file_has_used_id(file_path):
+            self._is_valid = False
 
-                description_validator = DescriptionValidator(file_path)
-                if not description_validator.is_valid():
-                    self._is_valid = False
+        if re.match(TEST_PLAYBOOK_REGEX, file_path, re.IGNORECASE):
+            if not self.conf_json_validator.is_test_in_conf_json(collect_ids(file_path)):
+                self._is_valid = False
 
-                integration_validator = IntegrationValidator(file_path)
-                if not integration_validator.is_valid_integration():
-                    self._is_valid = False
+        elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
+                re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE) or \
+                re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
 
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
-                                                                  is_integration=True)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
+            image_validator = ImageValidator(file_path)
+            if not image_validator.is_valid():
+                self._is_valid = False
 
-            elif re.match(SCRIPT_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(SCRIPT_PY_REGEX, file_path, re.IGNORECASE):
+            description_validator = DescriptionValidator(file_path)
+            if not description_validator.is_valid():
+                self._is_valid = False
 
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
-                                                                  is_integration=False)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
+            integration_validator = IntegrationValidator(file_path)
+            if not integration_validator.is_valid_integration():
+                self._is_valid = False
 
-            elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
-                    re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
-                description_validator = DescriptionValidator(file_path)
-                if not description_validator.is_valid_beta_description():
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
+                                                              is_integration=True)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
-                integration_validator = IntegrationValidator(file_path)
-                if not integration_validator.is_valid_beta_integration(is_new=True):
+        elif re.match(SCRIPT_REGEX, file_path, re.IGNORECASE) or \
+                re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
+                re.match(SCRIPT_PY_REGEX, file_path, re.IGNORECASE):
+
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
+                                                              is_integration=False)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
-                if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
-                                                                  is_integration=True)
-                    if not docker_image_validator.is_docker_image_valid():
-                        self._is_valid = False
+        elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
+                re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
+            description_validator = DescriptionValidator(file_path)
+            if not description_validator.is_valid_beta_description():
+                self._is_valid = False
 
-            elif re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
-                image_validator = ImageValidator(file_path)
-                if not image_validator.is_valid():
-                    self._is_valid = False
+            integration_validator = IntegrationValidator(file_path)
+            if not integration_validator.is_valid_beta_integration(is_new=True):
+                self._is_valid = False
 
-            elif re.match(INCIDENT_FIELD_REGEX, file_path, re.IGNORECASE):
-                incident_field_validator = IncidentFieldValidator(file_path)
-                if not incident_field_validator.is_valid():
+            if is_python_file:
+                docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
+                                                              is_integration=True)
+                if not docker_image_validator.is_docker_image_valid():
                     self._is_valid = False
 
+        elif re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
+            image_validator = ImageValidator(file_path)
+            if not image_validator.is_valid():
+                self._is_valid = False
+
+        elif re.match(INCIDENT_FIELD_REGEX, file_path, re.IGNORECASE):
+            incident_field_validator = IncidentFieldValidator(file_path)
+            if not incident_field_validator.is_valid():
+                self._is_valid = False
+
     def validate_no_old_format(self, old_format_files):
         """ Validate there are no files in the old format(unified yml file for the code and configuration).
 
@@ -453,24 +581,28 @@ class FilesValidator(object):
                 if root not in DIR_LIST:  # Skipping in case we entered a package
                     continue
                 print_color('Validating {} directory:'.format(directory), LOG_COLORS.GREEN)
-                for file_name in files:
-                    file_path = os.path.join(root, file_name)
-                    # skipping hidden files
-                    if file_name.startswith('.'):
-                        continue
-
-                    print('Validating ' + file_name)
-                    structure_validator = StructureValidator(file_path)
-                    if not structure_validator.is_valid_scheme():
-                        self._is_valid = False
+                # skipping hidden files
+                files_to_validate = [(os.path.join(root, file_name), file_name) for file_name in files
+                                     if not file_name.startswith('.')]
 
                 if root in PACKAGE_SUPPORTING_DIRECTORIES:
                     for inner_dir in dirs:
                         file_path = glob.glob(os.path.join(root, inner_dir, '*.yml'))[0]
-                        print('Validating ' + file_path)
-                        structure_validator = StructureValidator(file_path)
-                        if not structure_validator.is_valid_scheme():
-                            self._is_valid = False
+                        files_to_validate.append((file_path, file_path))
+
+                self.run_validations('validate_file_scheme', files_to_validate)
+
+    def validate_file_scheme(self, file_path, file_name):
+        """Validate a file against the schema of its type.
+
+        Args:
+            file_path (str): The path of the file.
+            file_name (str): The name of the file to print.
+        """
+        print('Validating ' + file_name)
+        structure_validator = StructureValidator(file_path)
+        if not structure_validator.is_valid_scheme():
+            self._is_valid = False
 
     def is_valid_structure(self, branch_name, is_backward_check=True, prev_ver=None):
         """Check if the structure is valid for the case we are in, master - all files, branch - changed files.
@@ -537,6 +669,7 @@ def main():
     parser.add_argument('-b', '--backwardComp', type=str2bool, default=True, help='To check backward compatibility.')
     parser.add_argument('-t', '--test-filter', type=str2bool, default=False, help='Check that tests are valid.')
     parser.add_argument('-p', '--prev-ver', help='Previous branch or SHA1 commit to run checks against.')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of processes to validate the files with.')
     options = parser.parse_args()
     is_circle = options.circle
     is_backward_check = options.backwardComp
@@ -544,7 +677,7 @@ def main():
     logging.basicConfig(level=logging.CRITICAL)
 
     print_color('Starting validating files structure', LOG_COLORS.GREEN)
-    files_validator = FilesValidator(is_circle, print_ignored_files=True)
+    files_validator = FilesValidator(is_circle, print_ignored_files=True, jobs=options.jobs)
     if not files_validator.is_valid_structure(branch_name, is_backward_check=is_backward_check,
                                               prev_ver=options.prev_ver):
         sys.exit(1)
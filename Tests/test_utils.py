@@ -3,7 +3,9 @@ import os
 import sys
 import json
 import argparse
+from collections import namedtuple
 from subprocess import Popen, PIPE
+from multiprocessing.pool import ThreadPool
 from distutils.version import LooseVersion
 import yaml
 import requests
@@ -11,9 +13,27 @@ import requests
 from Tests.scripts.constants import CHECKED_TYPES_REGEXES, PACKAGE_SUPPORTING_DIRECTORIES, CONTENT_GITHUB_LINK, \
     PACKAGE_YML_FILE_REGEX, UNRELEASE_HEADER, RELEASE_NOTES_REGEX, PACKS_DIR_REGEX, PACKS_DIR
 
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
 # disable insecure warnings
 requests.packages.urllib3.disable_warnings()
 
+# parsed files by (load method, file path) -> ((mtime, size), data), shared by all the validators of the process
+_PARSED_FILES_CACHE = {}  # type: dict
+
+# old revisions of files by (tag, file path) -> (details, error)
+_REMOTE_FILES_CACHE = {}  # type: dict
+REMOTE_FILES_FETCH_THREADS = 8
+
+# parsed `git diff --name-status` outputs by the diff arguments
+_GIT_DIFFS_CACHE = {}  # type: dict
+
+# a changed file in `git diff --name-status` output, old_file_path is set for renamed and copied files only
+GitFileChange = namedtuple('GitFileChange', ['status', 'file_path', 'old_file_path'])
+
 
 class LOG_COLORS:
     NATIVE = '\033[m'
@@ -39,17 +59,18 @@ def run_command(command, is_silenced=True, exit_on_error=True):
     """Run a bash command in the shell.
 
     Args:
-        command (string): The string of the command you want to execute.
+        command (string|list): The string of the command you want to execute, or its arguments.
         is_silenced (bool): Whether to print command output.
         exit_on_error (bool): Whether to exit on command error.
 
     Returns:
         string. The output of the command you are trying to execute.
     """
+    command_args = command if isinstance(command, list) else command.split()
     if is_silenced:
-        p = Popen(command.split(), stdout=PIPE, stderr=PIPE, universal_newlines=True)
+        p = Popen(command_args, stdout=PIPE, stderr=PIPE, universal_newlines=True)
     else:
-        p = Popen(command.split())
+        p = Popen(command_args)
 
     output, err = p.communicate()
     if err:
@@ -62,7 +83,105 @@ def run_command(command, is_silenced=True, exit_on_error=True):
     return output
 
 
-def get_remote_file(full_file_path, tag='master'):
+class GitObjectResolver(object):
+    """Reads the content of files in old revisions from the local repository.
+
+    A single `git cat-file --batch` process serves all the lookups of the run, instead of a process (or a GitHub
+    request) per file.
+
+    Attributes:
+        process (Popen): the running `git cat-file --batch` process.
+        is_available (bool): False when git could not be started or the process stopped responding.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.is_available = True
+
+    def get_process(self):
+        if self.process is None and self.is_available:
+            try:
+                self.process = Popen(['git', 'cat-file', '--batch'], stdin=PIPE, stdout=PIPE,
+                                     stderr=open(os.devnull, 'w'))
+            except OSError:
+                self.is_available = False
+
+        return self.process
+
+    @staticmethod
+    def get_revisions(tag):
+        """The compared tag may be a local branch, a remote branch or a commit - try both of its forms.
+
+        The remote branch is tried first, as it matches the GitHub revision better than a possibly stale local branch.
+        """
+        if tag.startswith('origin/'):
+            return [tag, tag[len('origin/'):]]
+
+        return ['origin/' + tag, tag]
+
+    def read_object(self, object_name):
+        """Read a blob from the repository.
+
+        Args:
+            object_name (str): the object in `<revision>:<path>` format.
+
+        Returns:
+            bytes. The content of the blob, None if it is not in the repository.
+        """
+        process = self.get_process()
+        if process is None:
+            return None
+
+        try:
+            process.stdin.write('{}\n'.format(object_name).encode('utf-8'))
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if not header:
+                raise IOError('git cat-file has stopped')
+
+            # "<object> missing" or "<object> ambiguous"
+            if header[-1] in (b'missing', b'ambiguous'):
+                return None
+
+            _, object_type, object_size = header
+            content = process.stdout.read(int(object_size))
+            process.stdout.read(1)
+        except (IOError, ValueError):
+            self.is_available = False
+            self.process = None
+            return None
+
+        return content if object_type == b'blob' else None
+
+    def get_file_content(self, file_path, tag='master'):
+        object_path = file_path.replace('\\', '/')
+        if object_path.startswith('./'):
+            object_path = object_path[len('./'):]
+
+        for revision in self.get_revisions(tag):
+            content = self.read_object('{}:{}'.format(revision, object_path))
+            if content is not None:
+                return content
+
+        return None
+
+
+git_objects = GitObjectResolver()
+
+
+def parse_remote_file(full_file_path, content):
+    if full_file_path.endswith('json'):
+        return json.loads(content)
+
+    return load_yaml(content)
+
+
+def fetch_remote_file(full_file_path, tag='master'):
+    """Fetch an old revision of a file from GitHub.
+
+    Returns:
+        tuple. The parsed file and the error message in case the file could not be fetched.
+    """
     # 'origin/' prefix is used to compared with remote branches but it is not a part of the github url.
     tag = tag.lstrip('origin/')
 
@@ -72,19 +191,127 @@ def get_remote_file(full_file_path, tag='master'):
         res = requests.get(github_path, verify=False)
         res.raise_for_status()
     except Exception as exc:
-        print_warning('Could not find the old entity file under "{}".\n'
-                      'please make sure that you did not break backward compatibility. '
-                      'Reason: {}'.format(github_path, exc))
-        return {}
+        return {}, 'Could not find the old entity file under "{}".\n' \
+                   'please make sure that you did not break backward compatibility. ' \
+                   'Reason: {}'.format(github_path, exc)
 
-    if full_file_path.endswith('json'):
-        details = json.loads(res.content)
-    else:
-        details = yaml.safe_load(res.content)
+    return parse_remote_file(full_file_path, res.content), None
+
+
+def prefetch_remote_files(file_paths, tag='master'):
+    """Load the old revisions of the given files into the remote files cache.
+
+    The files are read from the local repository, and only the files which are missing from it are fetched from
+    GitHub, concurrently.
+
+    Args:
+        file_paths (iterable): paths of the files in the repository.
+        tag (str): the revision to compare to.
+    """
+    missing_file_paths = []
+    for file_path in file_paths:
+        if (tag, file_path) in _REMOTE_FILES_CACHE or file_path in missing_file_paths:
+            continue
+
+        content = git_objects.get_file_content(file_path, tag)
+        if content is None:
+            missing_file_paths.append(file_path)
+        else:
+            _REMOTE_FILES_CACHE[(tag, file_path)] = (parse_remote_file(file_path, content), None)
+
+    if not missing_file_paths:
+        return
+
+    pool = ThreadPool(min(len(missing_file_paths), REMOTE_FILES_FETCH_THREADS))
+    try:
+        fetched_files = pool.map(lambda file_path: fetch_remote_file(file_path, tag), missing_file_paths)
+    finally:
+        pool.close()
+        pool.join()
+
+    for file_path, fetched_file in zip(missing_file_paths, fetched_files):
+        _REMOTE_FILES_CACHE[(tag, file_path)] = fetched_file
+
+
+def get_remote_file(full_file_path, tag='master'):
+    """Get an old revision of a file, from the local repository when it is there and from GitHub otherwise.
+
+    The parsed file is cached for the rest of the run and is shared between the callers - do not change it.
+    """
+    prefetch_remote_files([full_file_path], tag)
+    details, error = _REMOTE_FILES_CACHE[(tag, full_file_path)]
+    if error:
+        print_warning(error)
 
     return details
 
 
+def get_file_changes(files_string):
+    """Parse `git diff --name-status` output to GitFileChange records.
+
+    Args:
+        files_string (str|list): The output of `git diff --name-status`, with or without `-z`. Records which were
+            already parsed are returned as they are.
+
+    Returns:
+        list. The GitFileChange records of the changed files.
+    """
+    if isinstance(files_string, list):
+        return files_string
+
+    file_changes = []
+    if '\0' in files_string:
+        fields = files_string.split('\0')
+        i = 0
+        while i < len(fields) and fields[i]:
+            status = fields[i]
+            if status[0].lower() in ('r', 'c'):
+                file_changes.append(GitFileChange(status, fields[i + 2], fields[i + 1]))
+                i += 3
+            else:
+                file_changes.append(GitFileChange(status, fields[i + 1], None))
+                i += 2
+
+        return file_changes
+
+    for line in files_string.split('\n'):
+        file_data = line.split()
+        if not file_data:
+            continue
+
+        if len(file_data) > 2:
+            file_changes.append(GitFileChange(file_data[0], file_data[2], file_data[1]))
+        else:
+            file_changes.append(GitFileChange(file_data[0], file_data[1], None))
+
+    return file_changes
+
+
+def format_file_changes(file_changes):
+    """Format GitFileChange records as `git diff --name-status` output."""
+    return '\n'.join('\t'.join(field for field in (status, old_file_path, file_path) if field)
+                     for status, file_path, old_file_path in file_changes)
+
+
+def git_diff_name_status(*diff_args):
+    """Get the files changed in a git diff.
+
+    Each distinct diff runs once per process, and its `--name-status -z` output is parsed to GitFileChange records,
+    so file names are not split on whitespace.
+
+    Args:
+        diff_args (str): The revisions and options of the diff, e.g. 'origin/master...my_branch'.
+
+    Returns:
+        list. The GitFileChange records of the changed files.
+    """
+    if diff_args not in _GIT_DIFFS_CACHE:
+        files_string = run_command(['git', 'diff', '--name-status', '-z'] + list(diff_args))
+        _GIT_DIFFS_CACHE[diff_args] = get_file_changes(files_string)
+
+    return list(_GIT_DIFFS_CACHE[diff_args])
+
+
 def filter_packagify_changes(modified_files, added_files, removed_files, tag='master'):
     """
     Mark scripts/integrations that were removed and added as modifiied.
@@ -98,6 +325,8 @@ def filter_packagify_changes(modified_files, added_files, removed_files, tag='ma
     """
     # map IDs to removed files
     packagify_diff = {}  # type: dict
+    prefetch_remote_files([file_path for file_path in removed_files
+                           if file_path.split("/")[0] in PACKAGE_SUPPORTING_DIRECTORIES], tag)
     for file_path in removed_files:
         if file_path.split("/")[0] in PACKAGE_SUPPORTING_DIRECTORIES:
             details = get_remote_file(file_path, tag)
@@ -112,8 +341,7 @@ def filter_packagify_changes(modified_files, added_files, removed_files, tag='ma
     updated_added_files = set()
     for file_path in added_files:
         if file_path.split("/")[0] in PACKAGE_SUPPORTING_DIRECTORIES:
-            with open(file_path) as f:
-                details = yaml.safe_load(f.read())
+            details = get_yaml(file_path)
 
             uniq_identifier = '_'.join([
                 details['name'],
@@ -151,9 +379,31 @@ def get_last_release_version():
     return tags[0]
 
 
+def load_yaml(stream):
+    """Parse a yml stream with the libyaml based loader when it is available."""
+    return yaml.load(stream, Loader=YamlSafeLoader)
+
+
 def get_file(method, file_path, type_of_file):
+    """Load a file of the given type as a dictionary.
+
+    The parsed file is cached by its path, modification time and size, so a file which is loaded by several
+    validators is only parsed once. The returned dictionary is shared between the callers and must not be changed.
+    """
+    file_path = os.path.expanduser(file_path)
+    cache_key = (method, os.path.abspath(file_path))
+    try:
+        file_stat = os.stat(file_path)
+        file_version = (file_stat.st_mtime, file_stat.st_size)
+    except OSError:
+        # let open() report a missing file as it always did
+        file_version = None
+    cached_file = _PARSED_FILES_CACHE.get(cache_key)
+    if file_version and cached_file and cached_file[0] == file_version:
+        return cached_file[1]
+
     data_dictionary = None
-    with open(os.path.expanduser(file_path), "r") as f:
+    with open(file_path, "r") as f:
         if file_path.endswith(type_of_file):
             try:
                 data_dictionary = method(f)
@@ -161,13 +411,16 @@ def get_file(method, file_path, type_of_file):
                 print_error(
                     "{} has a structure issue of file type{}. Error was: {}".format(file_path, type_of_file, str(e)))
                 return {}
-    if type(data_dictionary) is dict:
-        return data_dictionary
-    return {}
+    if type(data_dictionary) is not dict:
+        data_dictionary = {}
+
+    if file_version:
+        _PARSED_FILES_CACHE[cache_key] = (file_version, data_dictionary)
+    return data_dictionary
 
 
 def get_yaml(file_path):
-    return get_file(yaml.safe_load, file_path, ('yml', 'yaml'))
+    return get_file(load_yaml, file_path, ('yml', 'yaml'))
 
 
 def get_json(file_path):
@@ -2,7 +2,21 @@ import os
 import threading
 import sys
 import json
+import struct
+import hashlib
 import traceback
+import __future__
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 if sys.version_info[0] < 3:
     import Queue as queue
@@ -46,6 +60,115 @@ def __readWhileAvailable():
         return buff
 
 
+# the protocol with the server - newline delimited json messages, unless the server negotiates length prefixed frames
+# by sending {"type": "protocol", "framing": "length", "encodings": [...]} (see negotiate_protocol)
+protocol = {'framing': 'line', 'encoding': 'json'}
+FRAME_HEADER = struct.Struct('>I')
+
+
+def get_available_encodings():
+    encodings = ['json']
+    if orjson:
+        encodings.append('orjson')
+    if msgpack:
+        encodings.append('msgpack')
+
+    return encodings
+
+
+def get_binary_stream(stream):
+    # python 2 streams are binary
+    return getattr(stream, 'buffer', stream)
+
+
+def encode_message(message):
+    if protocol['encoding'] == 'msgpack':
+        return msgpack.packb(message, use_bin_type=True)
+
+    if protocol['encoding'] == 'orjson':
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(message).encode('utf-8')
+
+
+def decode_message(payload):
+    if protocol['encoding'] == 'msgpack':
+        return msgpack.unpackb(payload, raw=False)
+
+    if protocol['encoding'] == 'orjson':
+        return orjson.loads(payload)
+
+    return json.loads(payload.decode('utf-8'))
+
+
+def read_frame():
+    """Reads a length prefixed frame from stdin, returns None when stdin is closed"""
+    stdin = get_binary_stream(sys.stdin)
+    header = stdin.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+
+    size = FRAME_HEADER.unpack(header)[0]
+    payload = stdin.read(size)
+    if len(payload) < size:
+        # large frames may arrive in several reads
+        payload = bytearray(payload)
+        while len(payload) < size:
+            chunk = stdin.read(size - len(payload))
+            if not chunk:
+                return None
+            payload += chunk
+
+    return payload
+
+
+def send_message(message, line_end='\n'):
+    if protocol['framing'] != 'length':
+        json.dump(message, sys.stdout)
+        sys.stdout.write(line_end)
+        sys.stdout.flush()
+        return
+
+    payload = encode_message(message)
+    sys.stdout.flush()
+    stdout = get_binary_stream(sys.stdout)
+    # the header and the payload are written separately, so large payloads are not copied
+    stdout.write(FRAME_HEADER.pack(len(payload)))
+    stdout.write(payload)
+    stdout.flush()
+
+
+def read_message():
+    if protocol['framing'] != 'length':
+        data = __readWhileAvailable()
+        if data.find('$$##') > -1:
+            raise ValueError(data[4:])
+        return json.loads(data)
+
+    payload = read_frame()
+    if payload is None:
+        raise ValueError('stdin was closed')
+    if payload[:4] == b'$$##':
+        raise ValueError(bytes(payload[4:]).decode('utf-8'))
+
+    return decode_message(payload)
+
+
+def negotiate_protocol(request):
+    """Answers a protocol request of the server in the current protocol and switches to the agreed protocol.
+    The server should send framed messages only after it reads the answer.
+    """
+    encodings = [encoding for encoding in request.get('encodings', ['json']) if encoding in get_available_encodings()]
+    # the windows stdin reading thread reads lines
+    if request.get('framing') == 'length' and encodings and not win:
+        agreed_protocol = {'framing': 'length', 'encoding': encodings[0]}
+    else:
+        agreed_protocol = {'framing': 'line', 'encoding': 'json'}
+
+    send_message(dict(agreed_protocol, type='protocol'), line_end='\\n')
+    protocol.update(agreed_protocol)
+
+
 """Demisto instance for scripts only"""
 
 template_code = '''
@@ -65,9 +188,7 @@ class Demisto:
             os.environ['DEMISTO_MACHINE_LEARNING_MAGIC_KEY'] = args['demisto_machine_learning_magic_key']
 
     def log(self, msg):
-        json.dump({'type': 'entryLog', 'args': {'message': msg}}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__sendMessage']({'type': 'entryLog', 'args': {'message': msg}})
 
     def investigation(self):
         return self.callingContext[u'context'][u'Inv']
@@ -150,18 +271,11 @@ class Demisto:
 
     def __do(self, cmd):
         # Watch out there is another defintion like this
-        # prepare command to send to server
-        json.dump(cmd, sys.stdout)
-        sys.stdout.write('\\n')
-
         # send command to Demisto server
-        sys.stdout.flush()
+        globals()['__sendMessage'](cmd)
 
         # wait to receive response from Demisto server
-        data = globals()['__readWhileAvailable']()
-        if data.find('$$##') > -1:
-            raise ValueError(data[4:])
-        return json.loads(data)
+        return globals()['__readMessage']()
 
 
     def convert(self, results):
@@ -189,9 +303,7 @@ class Demisto:
         else:
             res.append(converted)
 
-        json.dump({'type': 'result', 'results': res}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__sendMessage']({'type': 'result', 'results': res})
 
 demisto = Demisto(context)
 
@@ -234,9 +346,7 @@ class Demisto:
             os.environ['DEMISTO_MACHINE_LEARNING_MAGIC_KEY'] = args['demisto_machine_learning_magic_key']
 
     def log(self, msg):
-        json.dump({'type': 'entryLog', 'args': {'message': 'Integration log: ' + msg}}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__sendMessage']({'type': 'entryLog', 'args': {'message': 'Integration log: ' + msg}})
 
     def investigation(self):
         return self.callingContext[u'context'][u'Inv']
@@ -325,13 +435,8 @@ class Demisto:
 
     def __do(self, cmd):
         # Watch out there is another defintion like this
-        json.dump(cmd, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
-        data = globals()['__readWhileAvailable']()
-        if data.find('$$##') > -1:
-            raise ValueError(data[4:])
-        return json.loads(data)
+        globals()['__sendMessage'](cmd)
+        return globals()['__readMessage']()
 
     def __convert(self, results):
         """ Convert whatever result into entry """
@@ -356,9 +461,7 @@ class Demisto:
             res = converted
         else:
             res.append(converted)
-        json.dump({'type': 'result', 'results': res}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        globals()['__sendMessage']({'type': 'result', 'results': res})
 
     def incidents(self, incidents):
         self.results({'Type': 1, 'Contents': json.dumps(incidents), 'ContentsFormat': 'json'})
@@ -388,6 +491,109 @@ print = demisto_print
 ###CODE_HERE###
 '''
 
+# compiled code of the recently executed scripts, by the hash of the script and the integration flag
+# (least recently used first)
+CODE_CACHE_SIZE = 16
+code_cache = OrderedDict()
+code_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_compiled_code(code_string, is_integ_script, with_template=True, first_line=1):
+    key = (hashlib.sha1(code_string.encode('utf-8')).hexdigest(), bool(is_integ_script), with_template, first_line)
+    code = code_cache.pop(key, None)
+    if code is None:
+        code_cache_stats['misses'] += 1
+        flags = 0
+        if not with_template:
+            # keep the line numbers of the code in the complete script, and the print function of the template
+            complete_code = '\n' * (first_line - 1) + code_string
+            flags = __future__.print_function.compiler_flag
+        elif is_integ_script:
+            complete_code = integ_template_code.replace('###CODE_HERE###', code_string)
+        else:
+            complete_code = template_code.replace('###CODE_HERE###', code_string)
+
+        code = compile(complete_code, '<string>', 'exec', flags)
+        if len(code_cache) >= CODE_CACHE_SIZE:
+            code_cache.popitem(last=False)
+    else:
+        code_cache_stats['hits'] += 1
+
+    code_cache[key] = code
+    return code
+
+
+# shared base namespace mode - the Demisto class and CommonServerPython are executed once per container, and each run
+# executes only its own script in their namespace, which is rolled back to its previous globals after the run.
+# note that the rollback is shallow, changes inside the shared objects (e.g. CommonServerPython dicts) are kept.
+SHARED_NAMESPACE_MODE = os.environ.get('PYTHON_LOOP_SHARED_NAMESPACE', '').lower() == 'true'
+COMMON_SERVER_END_MARKER = '\n# END OF COMMON SERVER PYTHON\n'
+SHARED_NAMESPACES_SIZE = 4
+shared_namespaces = OrderedDict()
+
+# CommonServerPython globals which depend on the params and debug mode of the run
+common_server_run_init_code = compile('''
+if 'IntegrationLogger' in globals():
+    LOG = IntegrationLogger()
+if 'DebugLogger' in globals():
+    _requests_logger = None
+    try:
+        if is_debug_mode():
+            _requests_logger = DebugLogger()
+    except Exception as ex:
+        demisto.info('Failed initializing DebugLogger: {}'.format(ex))
+''', '<string>', 'exec')
+
+
+def get_shared_namespace(common_code, is_integ_script, context):
+    key = (hashlib.sha1(common_code.encode('utf-8')).hexdigest(), bool(is_integ_script))
+    namespace = shared_namespaces.pop(key, None)
+    if namespace is None:
+        namespace = {
+            '__readWhileAvailable': __readWhileAvailable,
+            '__sendMessage': send_message,
+            '__readMessage': read_message,
+            'context': context,
+            'win': win
+        }
+        exec(get_compiled_code(common_code, is_integ_script), namespace, namespace)  # guardrails-disable-line
+        # do not keep the debug logger of the first run
+        namespace['_requests_logger'] = None
+        if len(shared_namespaces) >= SHARED_NAMESPACES_SIZE:
+            shared_namespaces.popitem(last=False)
+
+    shared_namespaces[key] = namespace
+    return namespace
+
+
+def exec_in_shared_namespace(code_string, is_integ_script, context):
+    common_code_end = code_string.find(COMMON_SERVER_END_MARKER)
+    if common_code_end == -1:
+        return False
+
+    common_code_end += len(COMMON_SERVER_END_MARKER)
+    common_code = code_string[:common_code_end]
+    template = integ_template_code if is_integ_script else template_code
+    first_line = template[:template.index('###CODE_HERE###')].count('\n') + common_code.count('\n') + 1
+    code = get_compiled_code(code_string[common_code_end:], is_integ_script, with_template=False,
+                             first_line=first_line)
+
+    namespace = get_shared_namespace(common_code, is_integ_script, context)
+    base_globals = dict(namespace)
+    try:
+        namespace['context'] = context
+        namespace['demisto'] = namespace['Demisto'](context)
+        exec(common_server_run_init_code, namespace, namespace)  # guardrails-disable-line
+        exec(code, namespace, namespace)  # guardrails-disable-line
+    finally:
+        # the globals are restored to the objects they were bound to before the run, the objects are not copied, so
+        # a module level dict or list which the script mutates in place is shared with the next runs
+        namespace.clear()
+        namespace.update(base_globals)
+
+    return True
+
+
 # rollback file system to its previous state
 # delete home dir and tmp dir
 
@@ -395,9 +601,7 @@ print = demisto_print
 # notifies demisto server that the current executed script is completed
 # and the process is ready to execute the next script
 def send_script_completed():
-    json.dump({'type': 'completed'}, sys.stdout)
-    sys.stdout.write('\\n')
-    sys.stdout.flush()
+    send_message({'type': 'completed'}, line_end='\\n')
 
 
 def send_script_exception(exc_type, exc_value, exc_traceback):
@@ -405,21 +609,28 @@ def send_script_exception(exc_type, exc_value, exc_traceback):
     if ex_string == 'None\n':
         ex_string = str(ex)
 
-    json.dump({'type': 'exception', 'args': {'exception': ex_string}}, sys.stdout)
-    sys.stdout.write('\\n')
-    sys.stdout.flush()
+    send_message({'type': 'exception', 'args': {'exception': ex_string}}, line_end='\\n')
 
 
 def send_pong():
-    json.dump({'type': 'pong'}, sys.stdout)
-    sys.stdout.write('\\n')
-    sys.stdout.flush()
+    send_message({'type': 'pong', 'codeCache': {'hits': code_cache_stats['hits'], 'misses': code_cache_stats['misses'],
+                                                'size': len(code_cache)},
+                  'sharedNamespaces': len(shared_namespaces)}, line_end='\\n')
 
 
 # receives ping and sends back pong until we get something else
 # the the function stopped and returns the received string
 def do_ping_pong():
     while True:
+        if protocol['framing'] == 'length':
+            frame = read_frame()
+            if frame is None:
+                return ''
+            if frame == b'ping':
+                send_pong()
+                continue
+            return decode_message(frame)
+
         ping = __readWhileAvailable()
         if ping == 'ping\n':
             send_pong()  # return pong to server to indicate that everything is fine
@@ -444,28 +655,30 @@ while True:
         # finish executing python
         break
 
-    contextJSON = json.loads(contextString)
+    # framed messages are decoded while they are read
+    contextJSON = contextString if isinstance(contextString, dict) else json.loads(contextString)
+    if contextJSON.get('type') == 'protocol' and 'script' not in contextJSON:
+        negotiate_protocol(contextJSON)
+        continue
 
     code_string = contextJSON['script']
     contextJSON.pop('script', None)
 
     is_integ_script = contextJSON['integration']
-    complete_code = ''
-    if is_integ_script:
-        complete_code = integ_template_code.replace('###CODE_HERE###', code_string)
-    else:
-        complete_code = template_code.replace('###CODE_HERE###', code_string)
 
     try:
-        code = compile(complete_code, '<string>', 'exec')
-
-        sub_globals = {
-            '__readWhileAvailable': __readWhileAvailable,
-            'context': contextJSON,
-            'win': win
-        }
-
-        exec(code, sub_globals, sub_globals)  # guardrails-disable-line
+        if not (SHARED_NAMESPACE_MODE and exec_in_shared_namespace(code_string, is_integ_script, contextJSON)):
+            code = get_compiled_code(code_string, is_integ_script)
+
+            sub_globals = {
+                '__readWhileAvailable': __readWhileAvailable,
+                '__sendMessage': send_message,
+                '__readMessage': read_message,
+                'context': contextJSON,
+                'win': win
+            }
+
+            exec(code, sub_globals, sub_globals)  # guardrails-disable-line
 
     except Exception as ex:
         exc_type, exc_value, exc_traceback = sys.exc_info()
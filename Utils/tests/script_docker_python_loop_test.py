@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import select
+import struct
+import subprocess
+
+import pytest
+
+LOOP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '_script_docker_python_loop.py')
+READ_TIMEOUT = 30
+FRAME_HEADER = struct.Struct('>I')
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'), reason='the loop reads stdin in a thread on windows')
+
+
+class PythonLoop(object):
+    """Runs the docker python loop in a subprocess and talks to it the way the server does"""
+
+    def __init__(self, env=None):
+        loop_env = dict(os.environ)
+        loop_env.update(env or {})
+        self.process = subprocess.Popen([sys.executable, LOOP_PATH], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        env=loop_env)
+        self.buffer = b''
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+
+    def write(self, data):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def send_line(self, message):
+        self.write((message if isinstance(message, str) else json.dumps(message)).encode('utf-8') + b'\n')
+
+    def read_bytes(self, size):
+        while len(self.buffer) < size:
+            self._read_more()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def read_line_message(self):
+        """Reads a json message of the line protocol, the loop ends some of them with a literal \\n"""
+        decoder = json.JSONDecoder()
+        while True:
+            text = self.buffer.decode('utf-8').lstrip()
+            while text.startswith('\\n'):
+                text = text[2:].lstrip()
+            try:
+                message, end = decoder.raw_decode(text)
+            except ValueError:
+                self._read_more()
+                continue
+
+            self.buffer = text[end:].encode('utf-8')
+            return message
+
+    def _read_more(self):
+        ready, _, _ = select.select([self.process.stdout], [], [], READ_TIMEOUT)
+        assert ready, 'the loop did not answer in {} seconds'.format(READ_TIMEOUT)
+        data = os.read(self.process.stdout.fileno(), 1 << 16)
+        assert data, 'the loop exited'
+        self.buffer += data
+
+    def run_script(self, code, integration=False):
+        """Runs a script in the line protocol, returns the messages it sent up to its completion"""
+        self.send_line(script_message(code, integration))
+        return self.read_line_messages_until_completed()
+
+    def read_line_messages_until_completed(self):
+        messages = []
+        while True:
+            message = self.read_line_message()
+            if message['type'] == 'completed':
+                return messages
+            messages.append(message)
+
+    def ping(self):
+        self.send_line('ping')
+        return self.read_line_message()
+
+    def negotiate(self, framing='length', encodings=('json',)):
+        self.send_line({'type': 'protocol', 'framing': framing, 'encodings': list(encodings)})
+        answer = self.read_line_message()
+        # the answer ends with a literal \\n, which must be read before the frames
+        assert self.read_bytes(2) == b'\\n'
+        return answer
+
+    def send_frame(self, message):
+        payload = message if isinstance(message, bytes) else json.dumps(message).encode('utf-8')
+        self.write(FRAME_HEADER.pack(len(payload)) + payload)
+
+    def read_frame(self):
+        size = FRAME_HEADER.unpack(self.read_bytes(FRAME_HEADER.size))[0]
+        return json.loads(self.read_bytes(size).decode('utf-8'))
+
+
+def script_message(code, integration=False):
+    return {'script': code, 'integration': integration, 'native': False, 'args': {}, 'context': {}}
+
+
+def result_contents(messages):
+    return [message['results'][0]['Contents'] for message in messages if message['type'] == 'result']
+
+
+@pytest.fixture
+def python_loop():
+    loop = PythonLoop()
+    yield loop
+    loop.close()
+
+
+def test_code_cache_hits_and_misses(python_loop):
+    """
+    Given
+    - A running python loop.
+
+    When
+    - Running the same script twice, and then another script.
+
+    Then
+    - Ensure the second run of the script is served from the code cache, and the stats are returned in the pong.
+    """
+    assert result_contents(python_loop.run_script('demisto.results("first")')) == ['first']
+    assert result_contents(python_loop.run_script('demisto.results("first")')) == ['first']
+    assert result_contents(python_loop.run_script('demisto.results("second")')) == ['second']
+    # the same code is cached separately for integrations, which are compiled with another template
+    assert result_contents(python_loop.run_script('demisto.results("first")', integration=True)) == ['first']
+
+    pong = python_loop.ping()
+    assert pong['type'] == 'pong'
+    assert pong['codeCache'] == {'hits': 1, 'misses': 3, 'size': 3}
+
+
+def test_code_cache_eviction(python_loop):
+    """
+    Given
+    - A running python loop with a full code cache.
+
+    When
+    - Running a script which is not cached.
+
+    Then
+    - Ensure the least recently used script is evicted, and the cache does not grow beyond its size.
+    """
+    cache_size = 16
+    scripts = ['demisto.results({})'.format(i) for i in range(cache_size + 1)]
+    for i, script in enumerate(scripts):
+        assert result_contents(python_loop.run_script(script)) == [str(i)]
+
+    assert python_loop.ping()['codeCache'] == {'hits': 0, 'misses': cache_size + 1, 'size': cache_size}
+
+    # the last script is still cached, the first one was evicted
+    python_loop.run_script(scripts[-1])
+    python_loop.run_script(scripts[0])
+    assert python_loop.ping()['codeCache'] == {'hits': 1, 'misses': cache_size + 2, 'size': cache_size}
+
+
+COMMON_SERVER_CODE = '''
+COUNTER = 0
+SEEN = []
+
+
+def count():
+    return COUNTER
+'''
+COMMON_SERVER_END_MARKER = '\n# END OF COMMON SERVER PYTHON\n'
+
+
+@pytest.fixture
+def shared_namespace_loop():
+    loop = PythonLoop({'PYTHON_LOOP_SHARED_NAMESPACE': 'true'})
+    yield loop
+    loop.close()
+
+
+def test_shared_namespace_rollback(shared_namespace_loop):
+    """
+    Given
+    - A python loop in the shared base namespace mode.
+
+    When
+    - Running scripts which rebind the CommonServerPython globals, define new ones and mutate a global list.
+
+    Then
+    - Ensure the rebound globals are restored and the new ones are removed after every run.
+    - Ensure the mutated list is kept, since the rollback is shallow.
+    - Ensure CommonServerPython is executed only once for all the runs.
+    """
+    script = COMMON_SERVER_CODE + COMMON_SERVER_END_MARKER + '''
+COUNTER += 1
+SEEN.append(COUNTER)
+demisto.results(str([count(), 'NEW_GLOBAL' in globals(), SEEN]))
+NEW_GLOBAL = True
+'''
+    assert result_contents(shared_namespace_loop.run_script(script)) == ['[1, False, [1]]']
+    assert result_contents(shared_namespace_loop.run_script(script)) == ['[1, False, [1, 1]]']
+
+    pong = shared_namespace_loop.ping()
+    assert pong['sharedNamespaces'] == 1
+    # the common code is compiled once, the script is compiled once and then served from the cache
+    assert pong['codeCache'] == {'hits': 1, 'misses': 2, 'size': 2}
+
+
+def test_shared_namespace_exception(shared_namespace_loop):
+    """
+    Given
+    - A python loop in the shared base namespace mode.
+
+    When
+    - Running a script which raises an exception after rebinding a global, and then another script.
+
+    Then
+    - Ensure the exception is reported with the line of the script in the complete code.
+    - Ensure the global is restored for the next run.
+    """
+    failing_script = COMMON_SERVER_CODE + COMMON_SERVER_END_MARKER + 'COUNTER = 5\nraise ValueError("bad run")\n'
+    messages = shared_namespace_loop.run_script(failing_script)
+    assert [message['type'] for message in messages] == ['exception']
+    exception = ''.join(messages[0]['args']['exception'])
+    assert 'ValueError: bad run' in exception
+    template_lines = get_template_line_count()
+    failing_line = template_lines + (COMMON_SERVER_CODE + COMMON_SERVER_END_MARKER).count('\n') + 2
+    assert 'line {}'.format(failing_line) in exception
+
+    script = COMMON_SERVER_CODE + COMMON_SERVER_END_MARKER + 'demisto.results(count())\n'
+    assert result_contents(shared_namespace_loop.run_script(script)) == ['0']
+
+
+def get_template_line_count():
+    """The number of lines of the script template before the code of the script"""
+    with open(LOOP_PATH) as loop_file:
+        loop_code = loop_file.read()
+    template = loop_code[loop_code.index("template_code = '''") + len("template_code = '''"):]
+    return template[:template.index('###CODE_HERE###')].count('\n')
+
+
+def test_line_protocol_without_negotiation(python_loop):
+    """
+    Given
+    - A python loop which did not get a protocol request.
+
+    When
+    - Pinging it and running a script which executes a command.
+
+    Then
+    - Ensure the loop keeps using newline delimited json messages.
+    """
+    assert python_loop.ping()['type'] == 'pong'
+    python_loop.send_line(script_message('demisto.results(demisto.executeCommand("getList", {"listName": "a"}))'))
+    assert python_loop.read_line_message() == {'type': 'executeCommand', 'command': 'getList',
+                                               'args': {'listName': 'a'}}
+    python_loop.send_line({'Type': 1, 'Contents': 'list', 'ContentsFormat': 'text'})
+    assert result_contents(python_loop.read_line_messages_until_completed()) == ['list']
+
+
+def test_negotiation_of_unsupported_protocol(python_loop):
+    """
+    Given
+    - A running python loop.
+
+    When
+    - Requesting length prefixed frames only with encodings the loop does not support.
+
+    Then
+    - Ensure the loop answers that it stays with newline delimited json messages, and keeps using them.
+    """
+    assert python_loop.negotiate(encodings=['unknown']) == {'type': 'protocol', 'framing': 'line', 'encoding': 'json'}
+    assert result_contents(python_loop.run_script('demisto.results("line")')) == ['line']
+
+
+def test_length_prefixed_frames(python_loop):
+    """
+    Given
+    - A python loop which agreed on length prefixed json frames.
+
+    When
+    - Pinging it, and running a script which executes a command with a result larger than the pipe buffer.
+
+    Then
+    - Ensure the pong, the command and the results are sent in frames, and the large frames are read completely.
+    """
+    answer = python_loop.negotiate(encodings=['unknown', 'json'])
+    assert answer == {'type': 'protocol', 'framing': 'length', 'encoding': 'json'}
+    python_loop.send_frame(b'ping')
+    assert python_loop.read_frame()['type'] == 'pong'
+
+    python_loop.send_frame(script_message('demisto.results(demisto.executeCommand("getList", {})["Contents"])'))
+    assert python_loop.read_frame() == {'type': 'executeCommand', 'command': 'getList', 'args': {}}
+    large_contents = 'x' * (1 << 20)
+    python_loop.send_frame({'Type': 1, 'Contents': large_contents, 'ContentsFormat': 'text'})
+    assert python_loop.read_frame()['results'][0]['Contents'] == large_contents
+    assert python_loop.read_frame() == {'type': 'completed'}